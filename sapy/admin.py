@@ -3,7 +3,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import Application, ApplicationDependency, ApplicationEnvironment, DeploymentLog
+from .models import Application, ApplicationDependency, ApplicationEnvironment, DeploymentLog, Job
 
 class ApplicationDependencyInline(admin.TabularInline):
     """Inline para gestionar dependencias"""
@@ -338,4 +338,65 @@ class DeploymentLogAdmin(admin.ModelAdmin):
     
     def has_add_permission(self, request):
         """No permitir agregar logs manualmente"""
-        return False
\ No newline at end of file
+        return False
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin para la cola de trabajos"""
+
+    list_display = [
+        'id',
+        'kind',
+        'state',
+        'application',
+        'attempts',
+        'locked_by',
+        'created_at',
+        'finished_at'
+    ]
+
+    list_filter = [
+        'state',
+        'kind',
+        'application'
+    ]
+
+    search_fields = [
+        'application__name',
+        'locked_by',
+        'error'
+    ]
+
+    readonly_fields = [
+        'kind',
+        'application',
+        'payload',
+        'result',
+        'error',
+        'attempts',
+        'locked_by',
+        'heartbeat_at',
+        'started_at',
+        'finished_at',
+        'created_by',
+        'created_at',
+        'updated_at'
+    ]
+
+    actions = ['requeue_jobs']
+
+    def requeue_jobs(self, request, queryset):
+        """Vuelve a poner en cola trabajos fallidos"""
+        from django.utils import timezone
+        count = queryset.filter(state=Job.State.FAILED).update(
+            state=Job.State.QUEUED,
+            attempts=0,
+            run_after=timezone.now(),
+            finished_at=None
+        )
+        self.message_user(request, f'{count} trabajo(s) reencolados.')
+    requeue_jobs.short_description = 'Reencolar trabajos fallidos'
+
+    def has_add_permission(self, request):
+        """Los trabajos se crean desde la aplicación"""
+        return False
@@ -7,12 +7,16 @@ urlpatterns = [
     # Aplicaciones
     path('applications/', views.application_list, name='application_list'),
     path('applications/new/', views.application_create, name='application_create'),
+    path('applications/bulk-deploy/', views.application_bulk_deploy, name='application_bulk_deploy'),
+    path('applications/bulk-deploy/<str:batch>/progress/', views.application_bulk_deploy_progress, name='application_bulk_deploy_progress'),
     path('applications/<int:pk>/', views.application_detail, name='application_detail'),
     path('applications/<int:pk>/edit/', views.application_edit, name='application_edit'),
     path('applications/<int:pk>/delete/', views.application_delete, name='application_delete'),
     path('applications/<int:pk>/deploy/', views.application_deploy, name='application_deploy'),
     path('applications/<int:pk>/status/', views.application_status, name='application_status'),
+    path('applications/<int:pk>/status/wait/', views.application_status_wait, name='application_status_wait'),
     path('applications/<int:pk>/tables/', views.application_tables, name='application_tables'),
+    path('applications/<int:pk>/schema-diff/', views.application_schema_diff, name='application_schema_diff'),
     path('applications/<int:app_pk>/tables/<int:table_pk>/', views.application_table_detail, name='application_table_detail'),
     path('applications/<int:pk>/tables/search/', views.application_tables_search, name='application_tables_search'),
     # Menús por aplicación
@@ -21,6 +25,9 @@ urlpatterns = [
     path('applications/<int:pk>/generate-pages/', views.application_generate_pages, name='application_generate_pages'),
     path('api/menu/<str:app_name>/', views.application_dynamic_menu, name='application_dynamic_menu'),
 
+    # Cola de trabajos
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+
     # Logs de deployment
     path('applications/<int:pk>/logs/<int:log_pk>/', views.deployment_log_detail, name='deployment_log_detail'),
     path('applications/<int:pk>/logs/<int:log_pk>/stream/', views.deployment_log_stream, name='deployment_log_stream'),
@@ -42,7 +49,10 @@ urlpatterns = [
 
     # Datos y toggle activo
     path('db/tables/<int:pk>/data/', views.db_table_data_list, name='db_table_data_list'),
+    path('db/tables/<int:pk>/data/export/', views.db_table_data_export, name='db_table_data_export'),
+    path('db/tables/<int:pk>/data/import/', views.db_table_data_import, name='db_table_data_import'),
     path('db/tables/<int:pk>/data/<int:row_id>/toggle/activo/', views.db_table_toggle_activo, name='db_table_toggle_activo'),
+    path('db/tables/<int:pk>/data/activo/bulk/', views.db_table_bulk_activo, name='db_table_bulk_activo'),
 
     # Todas las columnas BD
     path('db/columns/', views.db_column_list, name='db_column_list'),
@@ -64,6 +74,7 @@ urlpatterns = [
     path('pages/modal/<int:modal_id>/update/', views.modal_update, name='modal_update'),
     path('pages/modal/<int:modal_id>/field-override/save/', views.modal_form_field_override_save, name='modal_form_field_override_save'),
     path('pages/generate-from-dbtable/', views.page_generate_from_dbtable, name='page_generate_from_dbtable'),
+    path('pages/generate-from-dbtables/', views.pages_generate_from_dbtables, name='pages_generate_from_dbtables'),
     path('pages/<int:page_id>/effective-config/', views.page_effective_config, name='page_effective_config'),
 
     # Menús
@@ -86,6 +97,7 @@ urlpatterns = [
 
     # Catálogo de íconos (para picker)
     path('icons/search/', views.icons_search, name='icons_search'),
+    path('icons/catalog/', views.icons_catalog, name='icons_catalog'),
     path('icons/', views.icons_list, name='icons_list'),
     path('icons/import/', views.icons_import, name='icons_import'),
 ]
@@ -0,0 +1,334 @@
+"""
+Motor DDL: crea las tablas de una aplicación destino directamente desde el catálogo
+(DbTable / DbTableColumn / DbColumn), sin pasar por makemigrations/migrate.
+
+`apply_tables` compila el DDL de todo el conjunto de tablas y lo ejecuta en una
+sola transacción sobre una conexión del pool (sapy.target_db). En la misma
+transacción registra en django_migrations una migración, escrita en la app
+destino, cuyas operaciones CreateModel describen exactamente esas tablas: la app
+queda con su estado de migraciones al día y, en una BD nueva, `migrate` crea
+las mismas tablas.
+"""
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .models import DbTable, DbTableColumn
+
+MAX_IDENTIFIER = 63  # NAMEDATALEN - 1 en PostgreSQL
+
+_INTEGER_TYPES = ('integer', 'bigint', 'smallint', 'serial', 'bigserial')
+_NUMBER_RE = re.compile(r'^-?\d+(\.\d+)?$')
+
+
+class DdlError(Exception):
+    """Metadatos que no se pueden compilar a DDL."""
+
+
+def qn(name: str) -> str:
+    """Identificador entre comillas dobles (escapando comillas internas)."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _identifier(*parts: str) -> str:
+    name = '_'.join(p for p in parts if p)
+    return name[:MAX_IDENTIFIER]
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def column_spec(tc: DbTableColumn) -> dict:
+    """Valores efectivos de una columna de tabla (el override de DbTableColumn gana sobre DbColumn)."""
+    from .views import fk_referenced_table_name
+    col = tc.column
+    pk = bool(tc.get_effective_value('is_primary_key'))
+    return {
+        'name': col.name,
+        'data_type': col.data_type,
+        'length': col.length,
+        'precision': col.numeric_precision,
+        'scale': col.numeric_scale,
+        'nullable': bool(tc.get_effective_value('is_nullable')) and not pk,
+        'unique': bool(tc.get_effective_value('is_unique')) and not pk,
+        'index': bool(tc.get_effective_value('is_index')),
+        'primary_key': pk,
+        'auto_increment': bool(tc.get_effective_value('is_auto_increment')),
+        'default': (tc.default_value or col.default_value or '').strip(),
+        'references': fk_referenced_table_name(tc, col),
+        'on_delete': tc.on_delete or DbTableColumn.OnDelete.CASCADE,
+        'fk_name': tc.fk_constraint_name(),
+    }
+
+
+def sql_type(spec: dict) -> str:
+    """Tipo PostgreSQL equivalente al campo que genera generate_field_parts."""
+    data_type = spec['data_type']
+    if spec['primary_key'] and (spec['auto_increment'] or data_type in ('serial', 'bigserial')):
+        base = 'bigint' if data_type in ('bigint', 'bigserial') else 'integer'
+        return f'{base} GENERATED BY DEFAULT AS IDENTITY'
+    if data_type == 'serial':
+        return 'integer'
+    if data_type == 'bigserial':
+        return 'bigint'
+    if data_type == 'varchar':
+        return f"varchar({spec['length'] or 255})"
+    if data_type == 'numeric':
+        # Igual que el modelo generado: max_digits = precision + scale
+        scale = spec['scale'] or 0
+        if spec['precision']:
+            return f"numeric({spec['precision'] + scale}, {scale})"
+        return 'numeric'
+    if data_type == 'timestamp':
+        # DateTimeField con USE_TZ
+        return 'timestamp with time zone'
+    if data_type in ('integer', 'bigint', 'smallint', 'text', 'boolean', 'date'):
+        return data_type
+    return 'varchar(255)'
+
+
+def sql_default(spec: dict) -> Optional[str]:
+    value = spec['default']
+    if not value or spec['name'] in ('created_at', 'updated_at'):
+        return None
+    data_type = spec['data_type']
+    if data_type == 'boolean':
+        return 'true' if value.lower() in ('true', '1', 't') else 'false'
+    if data_type in _INTEGER_TYPES or data_type == 'numeric':
+        if not _NUMBER_RE.match(value):
+            raise DdlError(f"Valor por defecto no numérico para {spec['name']}: {value}")
+        return value
+    if data_type in ('date', 'timestamp') and value.lower() in ('now()', 'current_date', 'current_timestamp'):
+        return value
+    return _literal(value.strip("'"))
+
+
+def compile_table(table: DbTable, specs: Sequence[dict]) -> Dict[str, List[str]]:
+    """DDL de una tabla: {'create': [...], 'indexes': [...], 'foreign_keys': [...]}.
+
+    Las FK van aparte para poder crearlas cuando todas las tablas del lote existen.
+    """
+    if not specs:
+        raise DdlError(f"La tabla {table.name} no tiene columnas definidas")
+    tname = qn(table.name)
+    lines = []
+    pks = []
+    for spec in specs:
+        parts = [qn(spec['name']), sql_type(spec)]
+        if not spec['nullable']:
+            parts.append('NOT NULL')
+        default = sql_default(spec)
+        if default is not None:
+            parts.append(f'DEFAULT {default}')
+        lines.append(' '.join(parts))
+        if spec['primary_key']:
+            pks.append(spec['name'])
+    if pks:
+        lines.append(f"CONSTRAINT {qn(_identifier(table.name, 'pkey'))} PRIMARY KEY ({', '.join(qn(p) for p in pks)})")
+    for spec in specs:
+        if spec['unique']:
+            lines.append(f"CONSTRAINT {qn(_identifier(table.name, spec['name'], 'key'))} UNIQUE ({qn(spec['name'])})")
+    create = f"CREATE TABLE {tname} (\n    " + ',\n    '.join(lines) + "\n)"
+
+    indexes = []
+    foreign_keys = []
+    for spec in specs:
+        name = spec['name']
+        if spec['references']:
+            ref = spec['references']
+            fk_name = spec['fk_name'] or _identifier('fk', table.name, name)
+            foreign_keys.append(
+                f"ALTER TABLE {tname} ADD CONSTRAINT {qn(fk_name[:MAX_IDENTIFIER])} "
+                f"FOREIGN KEY ({qn(name)}) REFERENCES {qn(ref)} ({qn('id')}) "
+                f"ON DELETE {spec['on_delete']} DEFERRABLE INITIALLY DEFERRED"
+            )
+        if (spec['index'] or spec['references']) and not (spec['unique'] or spec['primary_key']):
+            indexes.append(
+                f"CREATE INDEX {qn(_identifier(table.name, name, 'idx'))} ON {tname} ({qn(name)})"
+            )
+    return {'create': [create], 'indexes': indexes, 'foreign_keys': foreign_keys}
+
+
+def load_table_columns(tables: Iterable[DbTable]) -> Dict[int, List[DbTableColumn]]:
+    """Columnas (DbTableColumn) de varias tablas, en orden, con una sola consulta."""
+    tables = list(tables)
+    table_columns: Dict[int, List[DbTableColumn]] = {t.id: [] for t in tables}
+    qs = (
+        DbTableColumn.objects.filter(table__in=tables)
+        .select_related('column', 'table', 'references_table')
+        .order_by('table_id', 'position', 'id')
+    )
+    for tc in qs:
+        table_columns[tc.table_id].append(tc)
+    return table_columns
+
+
+def compile_tables(tables: Sequence[DbTable], table_columns: Optional[Dict[int, list]] = None) -> List[str]:
+    """Sentencias para crear un conjunto de tablas: CREATE TABLE, luego índices y al final FKs."""
+    if table_columns is None:
+        table_columns = load_table_columns(tables)
+    creates, indexes, fks = [], [], []
+    for table in tables:
+        compiled = compile_table(table, [column_spec(tc) for tc in table_columns[table.id]])
+        creates += compiled['create']
+        indexes += compiled['indexes']
+        fks += compiled['foreign_keys']
+    return creates + indexes + fks
+
+
+# ---- Estado de migraciones de la app destino ----
+
+_MIGRATION_RE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+
+def _leaf_migration(migrations_dir: str) -> Optional[tuple]:
+    """(número, nombre) de la última migración del directorio (se asume historia lineal)."""
+    leaf = None
+    for fname in os.listdir(migrations_dir):
+        m = _MIGRATION_RE.match(fname)
+        if m and (leaf is None or int(m.group(1)) > leaf[0]):
+            leaf = (int(m.group(1)), fname[:-3])
+    return leaf
+
+
+def field_expression(tc: DbTableColumn) -> tuple:
+    """(nombre, expresión Django) del campo, idéntica a la que se escribe en models.py."""
+    from .views import generate_field_parts
+    return generate_field_parts(tc, tc.column)
+
+
+def create_model_operation(table: DbTable, table_columns: Sequence[DbTableColumn]) -> str:
+    """Operación CreateModel (como código) con los mismos campos que models.py."""
+    fields = []
+    for tc in table_columns:
+        name, expr = field_expression(tc)
+        fields.append(f"                ({name!r}, {expr}),")
+    options = {'db_table': table.name}
+    if table.description:
+        options['verbose_name'] = table.description
+    return (
+        "        migrations.CreateModel(\n"
+        f"            name={table.name.title()!r},\n"
+        "            fields=[\n" + "\n".join(fields) + "\n            ],\n"
+        f"            options={options!r},\n"
+        "        ),"
+    )
+
+
+def render_migration(app_label: str, operations: Sequence[str], dependency: Optional[str]) -> str:
+    """Código de una migración de la app destino con las operaciones dadas."""
+    deps = []
+    if dependency:
+        deps.append(f"        ({app_label!r}, {dependency!r}),")
+    if any('settings.AUTH_USER_MODEL' in op for op in operations):
+        deps.append("        migrations.swappable_dependency(settings.AUTH_USER_MODEL),")
+    return (
+        "# Generada por sapy (motor DDL). Los cambios ya se aplicaron en la BD de la app\n"
+        "# y esta migración quedó registrada como aplicada.\n\n"
+        "from django.conf import settings\n"
+        "from django.db import migrations, models\n\n\n"
+        "class Migration(migrations.Migration):\n\n"
+        f"    initial = {dependency is None}\n\n"
+        "    dependencies = [\n" + "\n".join(deps) + ("\n" if deps else "") + "    ]\n\n"
+        "    operations = [\n" + "\n".join(operations) + "\n    ]\n"
+    )
+
+
+def execute_with_state(application, statements: Sequence[str], operations: Sequence[str],
+                       model_tables: Sequence[DbTable], table_columns: Dict[int, list],
+                       label: str = 'sapy_ddl') -> dict:
+    """Ejecuta `statements` en una transacción y registra el estado de Django de la app destino.
+
+    Si hay `operations`, reescribe en models.py las clases de `model_tables`,
+    escribe una migración con esas operaciones y la inserta en django_migrations
+    dentro de la misma transacción. Si algo falla se revierten la BD y los archivos.
+    """
+    from . import target_db
+    from .models_file import ModelsFile
+    from .views import _prepare_app_for_migrations, _prepare_models_file, generate_model_code
+
+    written: List[tuple] = []  # (ruta, contenido anterior o None si el archivo es nuevo)
+    migration_name = None
+    try:
+        if operations:
+            app_dir = f"{application.base_path.rstrip('/')}/{application.name}"
+            model_file_path, error = _prepare_models_file(application)
+            if error:
+                raise DdlError(error)
+            error = _prepare_app_for_migrations(application, app_dir)
+            if error:
+                raise DdlError(error)
+
+            with open(model_file_path, 'r', encoding='utf-8') as f:
+                previous = f.read()
+            models_file = ModelsFile(previous)
+            for t in model_tables:
+                models_file.set_model(t.name, generate_model_code(application, t, table_columns[t.id]))
+            content = models_file.render()
+
+            migrations_dir = f"{app_dir}/{application.name}/migrations"
+            leaf = _leaf_migration(migrations_dir)
+            number = (leaf[0] + 1) if leaf else 1
+            migration_name = f"{number:04d}_{label}_{time.strftime('%Y%m%d_%H%M%S')}"
+            migration_code = render_migration(application.name, operations, leaf[1] if leaf else None)
+
+            with open(model_file_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            written.append((model_file_path, previous))
+            migration_path = f"{migrations_dir}/{migration_name}.py"
+            with open(migration_path, 'w', encoding='utf-8') as f:
+                f.write(migration_code)
+            written.append((migration_path, None))
+
+        with target_db.connection(application) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL lock_timeout = '5s'")
+                for stmt in statements:
+                    cur.execute(stmt)
+                if migration_name:
+                    cur.execute("SELECT to_regclass('django_migrations') IS NOT NULL")
+                    if cur.fetchone()[0]:
+                        cur.execute(
+                            "INSERT INTO django_migrations (app, name, applied) VALUES (%s, %s, now())",
+                            (application.name, migration_name),
+                        )
+            conn.commit()
+    except Exception as exc:
+        for path, previous in reversed(written):
+            try:
+                if previous is None:
+                    os.remove(path)
+                else:
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(previous)
+            except Exception:
+                pass
+        return {'success': False, 'error': str(exc)}
+    return {'success': True, 'migration': migration_name}
+
+
+def apply_tables(application, tables: Sequence[DbTable], record_migration: bool = True) -> dict:
+    """Crea `tables` (ya ordenadas por dependencias) en la BD de la app en una sola transacción.
+
+    Si `record_migration`, escribe los modelos en models.py y una migración
+    equivalente (un CreateModel por tabla) marcada como aplicada.
+    """
+    started = time.monotonic()
+    tables = list(tables)
+    result = {'success': True, 'tables': [t.name for t in tables]}
+    table_columns = load_table_columns(tables)
+    try:
+        statements = compile_tables(tables, table_columns)
+    except DdlError as exc:
+        return {**result, 'success': False, 'error': str(exc)}
+    result['statements'] = len(statements)
+
+    operations = [create_model_operation(t, table_columns[t.id]) for t in tables] if record_migration else []
+    outcome = execute_with_state(application, statements, operations, tables, table_columns)
+    if not outcome['success']:
+        return {**result, 'success': False, 'error': outcome['error']}
+    result['migration'] = outcome['migration']
+    result['elapsed_ms'] = int((time.monotonic() - started) * 1000)
+    return result
@@ -0,0 +1,232 @@
+"""
+Grafo de dependencias (FK) entre las tablas del catálogo.
+
+Una columna de DbTableColumn depende de otra tabla cuando tiene
+`references_table` explícita o sigue la convención id_<tabla> (igual que
+`fk_referenced_table_name`). El grafo completo se arma con una sola consulta
+sobre DbTableColumn (unida a DbColumn y DbTable) y se guarda en memoria por
+revisión del catálogo: cualquier alta, baja o cambio en DbTable, DbColumn o
+DbTableColumn incrementa CatalogRevision('tables').
+
+El orden de generación se calcula con el algoritmo de Kahn por niveles sobre
+el grafo con cada ciclo (componente fuertemente conexa) condensado en un solo
+nodo: cada nivel solo depende de niveles anteriores, los miembros de un ciclo
+comparten nivel (sus FK se crean al final del lote) y los ciclos se reportan
+explícitamente.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from .models import CatalogRevision, DbTable, DbTableColumn
+
+CATALOG = 'tables'
+
+# Tablas base de Django que la app destino ya trae; no se exigen en el catálogo
+EXTERNAL_TABLES = {'auth_user'}
+
+
+class DependencyGraph:
+    """Grafo de una revisión concreta del catálogo de tablas."""
+
+    def __init__(self, revision: int, names: Dict[int, str], references: Dict[int, Set[str]]):
+        self.revision = revision
+        self.names = names
+        self.ids = {name: table_id for table_id, name in names.items()}
+        # Nombres referenciados por tabla (pueden no existir en el catálogo)
+        self.references = references
+        self.edges: Dict[int, Set[int]] = {}
+        for table_id, refs in references.items():
+            self.edges[table_id] = {
+                self.ids[ref] for ref in refs if ref in self.ids and self.ids[ref] != table_id
+            }
+
+    def dependencies(self, table_id: int) -> Set[int]:
+        """Tablas del catálogo de las que depende directamente `table_id`."""
+        return self.edges.get(table_id, set())
+
+    def missing_references(self, table_id: int) -> Set[str]:
+        """Nombres referenciados por `table_id` que no existen en el catálogo."""
+        return {ref for ref in self.references.get(table_id, ()) if ref not in self.ids}
+
+    def closure(self, table_ids: Iterable[int]) -> Set[int]:
+        """`table_ids` más todas sus dependencias transitivas."""
+        result: Set[int] = set()
+        stack = [t for t in table_ids if t in self.names]
+        while stack:
+            table_id = stack.pop()
+            if table_id in result:
+                continue
+            result.add(table_id)
+            stack.extend(self.dependencies(table_id) - result)
+        return result
+
+    def levels(self, table_ids: Iterable[int]) -> tuple:
+        """Kahn por niveles sobre el subgrafo `table_ids`, con cada ciclo condensado en un nodo.
+
+        Devuelve (niveles, ciclos): cada nivel es una lista de ids ordenada por
+        nombre; los miembros de un ciclo comparten nivel y las tablas que
+        dependen de un ciclo quedan en niveles posteriores. Cada ciclo es una
+        lista de ids que se referencian entre sí.
+        """
+        nodes = set(table_ids)
+        components = self._components(nodes)
+        component_of = {t: i for i, component in enumerate(components) for t in component}
+        deps: List[Set[int]] = [set() for _ in components]
+        for i, component in enumerate(components):
+            for t in component:
+                deps[i] |= {component_of[d] for d in self.dependencies(t) & nodes}
+            deps[i].discard(i)
+        pending = {i: len(d) for i, d in enumerate(deps)}
+        dependents: Dict[int, List[int]] = {i: [] for i in pending}
+        for i, d in enumerate(deps):
+            for dep in d:
+                dependents[dep].append(i)
+
+        levels: List[List[int]] = []
+        current = [i for i, count in pending.items() if count == 0]
+        while current:
+            levels.append(sorted((t for i in current for t in components[i]), key=self.names.__getitem__))
+            following = []
+            for i in current:
+                del pending[i]
+                for child in dependents[i]:
+                    pending[child] -= 1
+                    if pending[child] == 0:
+                        following.append(child)
+            current = following
+        if pending:
+            # El grafo condensado es acíclico: esto solo ocurre por un error de programación
+            raise RuntimeError(f"Componentes sin nivel: {sorted(pending)}")
+        cycles = sorted(
+            (sorted(c, key=self.names.__getitem__) for c in components if len(c) > 1),
+            key=lambda c: self.names[c[0]],
+        )
+        return levels, cycles
+
+    def _components(self, nodes: Set[int]) -> List[List[int]]:
+        """Componentes fuertemente conexas (Tarjan) de `nodes`, incluidas las de un solo nodo."""
+        index: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        on_stack: Set[int] = set()
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for start in sorted(nodes, key=self.names.__getitem__):
+            if start in index:
+                continue
+            # Versión iterativa para no depender del límite de recursión
+            work = [(start, iter(sorted(self.dependencies(start) & nodes)))]
+            index[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(self.dependencies(child) & nodes))))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def plan(self, table_ids: Iterable[int]) -> dict:
+        """Plan de generación para `table_ids` y sus dependencias.
+
+        Claves: 'levels' (listas de ids), 'order' (niveles aplanados) y
+        'cycles' (listas de nombres). Toda tabla pedida o de la que dependan
+        aparece en 'order', también las que dependen de un ciclo.
+        """
+        nodes = self.closure(table_ids)
+        levels, cycles = self.levels(nodes)
+        order = [t for level in levels for t in level]
+        if set(order) != nodes or len(order) != len(nodes):
+            missing = sorted(self.names[t] for t in nodes - set(order))
+            raise RuntimeError(f"El orden de generación no cubre todas las tablas: {', '.join(missing)}")
+        return {
+            'levels': levels,
+            'order': order,
+            'cycles': [[self.names[t] for t in cycle] for cycle in cycles],
+        }
+
+
+def referenced_name(column_name: str, references_table_name: Optional[str]) -> Optional[str]:
+    """Tabla referenciada por una columna (explícita o id_<tabla>); None si no es FK o es externa."""
+    referenced = references_table_name
+    if not referenced:
+        column_name = (column_name or '').strip()
+        if not (column_name.startswith('id_') and len(column_name) > 3):
+            return None
+        referenced = column_name[3:]
+    return None if referenced in EXTERNAL_TABLES else referenced
+
+
+def table_references(table: DbTable) -> Set[str]:
+    """Nombres de tablas referenciadas por `table` (una consulta, sin pasar por el grafo)."""
+    rows = table.table_columns.values_list('column__name', 'references_table__name')
+    refs = {referenced_name(column_name, ref) for column_name, ref in rows}
+    refs.discard(None)
+    refs.discard(table.name)
+    return refs
+
+
+def build_graph(revision: int) -> DependencyGraph:
+    names = dict(DbTable.objects.values_list('id', 'name'))
+    references: Dict[int, Set[str]] = {table_id: set() for table_id in names}
+    rows = DbTableColumn.objects.values_list('table_id', 'column__name', 'references_table__name')
+    for table_id, column_name, ref in rows:
+        referenced = referenced_name(column_name, ref)
+        if referenced:
+            references.setdefault(table_id, set()).add(referenced)
+    return DependencyGraph(revision, names, references)
+
+
+_lock = threading.Lock()
+_graph: Optional[DependencyGraph] = None
+
+
+def get_graph() -> DependencyGraph:
+    """Grafo de la revisión actual del catálogo (se reconstruye solo si cambió)."""
+    global _graph
+    revision = CatalogRevision.current(CATALOG)
+    graph = _graph
+    if graph is not None and graph.revision == revision:
+        return graph
+    with _lock:
+        if _graph is None or _graph.revision != revision:
+            _graph = build_graph(revision)
+        return _graph
+
+
+def generation_plan(tables: Iterable[DbTable]) -> dict:
+    """Plan de generación de `tables`: como `DependencyGraph.plan` pero con instancias de DbTable."""
+    graph = get_graph()
+    plan = graph.plan(t.id for t in tables)
+    by_id = DbTable.objects.in_bulk(plan['order'])
+    return {
+        'levels': [[by_id[t] for t in level] for level in plan['levels']],
+        'order': [by_id[t] for t in plan['order']],
+        'cycles': plan['cycles'],
+    }
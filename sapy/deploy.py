@@ -0,0 +1,106 @@
+"""
+Programación de instalaciones (individuales y masivas) sobre la cola de trabajos.
+
+Cada instalación crea su propio DeploymentLog y un Job 'install' cuya
+concurrency_key es el host de BD de la aplicación; el planificador de
+`sapy.jobs` limita cuántas corren a la vez en total y por host.
+"""
+import uuid
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import Application, DeploymentLog, Job
+
+INSTALL_SCRIPT = '/srv/scripts/install_application_noninteractive.sh'
+ACTIVE_STATES = (Job.State.QUEUED, Job.State.RUNNING)
+
+
+def has_active_install(application: Application) -> bool:
+    return application.jobs.filter(kind=Job.Kind.INSTALL, state__in=ACTIVE_STATES).exists()
+
+
+def start_deploy(application: Application, user=None, batch: str = '') -> Job:
+    """Marca la aplicación como (re)instalando, crea su log y encola la instalación."""
+    with transaction.atomic():
+        # Permitir reinstalación si ya está desplegada
+        application.status = 'reinstalling' if application.status == 'deployed' else 'installing'
+        application.save()
+        deployment_log = DeploymentLog.objects.create(
+            application=application,
+            log_type='install',
+            command=INSTALL_SCRIPT,
+            executed_by=user if getattr(user, 'is_authenticated', False) else None,
+        )
+        return enqueue(
+            Job.Kind.INSTALL,
+            payload={'deployment_log_id': deployment_log.pk},
+            application=application,
+            created_by=user,
+            concurrency_key=f"db:{application.db_host}",
+            batch=batch,
+        )
+
+
+def schedule_bulk_deploy(applications: Iterable[Application], user=None) -> tuple[str, List[Application]]:
+    """Encola la instalación de varias aplicaciones bajo un mismo lote.
+
+    Devuelve el id del lote y las aplicaciones omitidas por tener ya una
+    instalación en curso.
+    """
+    batch = uuid.uuid4().hex[:12]
+    skipped: List[Application] = []
+    for application in applications:
+        if has_active_install(application):
+            skipped.append(application)
+            continue
+        start_deploy(application, user, batch=batch)
+    return batch, skipped
+
+
+def _tail(text: Optional[str], lines: int = 1) -> str:
+    parts = [l for l in (text or '').splitlines() if l.strip()]
+    return '\n'.join(parts[-lines:])
+
+
+def batch_progress(batch: str) -> dict:
+    """Progreso agregado de un lote: conteos por estado y detalle por aplicación."""
+    jobs = list(
+        Job.objects.filter(batch=batch, kind=Job.Kind.INSTALL)
+        .select_related('application')
+        .order_by('id')
+    )
+    log_ids = [j.payload.get('deployment_log_id') for j in jobs]
+    logs = {l.pk: l for l in DeploymentLog.objects.filter(pk__in=[i for i in log_ids if i])}
+    counts = {state: 0 for state in Job.State.values}
+    now = timezone.now()
+    items = []
+    for job in jobs:
+        counts[job.state] += 1
+        log = logs.get(job.payload.get('deployment_log_id'))
+        end = job.finished_at or now
+        items.append({
+            'job_id': job.pk,
+            'application_id': job.application_id,
+            'application': job.application.name if job.application else '',
+            'state': job.state,
+            'state_display': job.get_state_display(),
+            'app_status': job.application.status if job.application else '',
+            'deployment_log_id': log.pk if log else None,
+            'last_line': _tail(log.output if log else ''),
+            'error': job.error,
+            'elapsed': int((end - job.started_at).total_seconds()) if job.started_at else None,
+        })
+    started = [j.started_at for j in jobs if j.started_at]
+    finished = counts[Job.State.SUCCEEDED] + counts[Job.State.FAILED]
+    return {
+        'batch': batch,
+        'total': len(jobs),
+        'finished': finished,
+        'done': bool(jobs) and finished == len(jobs),
+        'counts': counts,
+        'wall_time': int((max(j.finished_at or now for j in jobs) - min(started)).total_seconds()) if started else None,
+        'items': items,
+    }
@@ -0,0 +1,146 @@
+"""
+Índice invertido en memoria del catálogo de íconos (selector de íconos).
+
+El catálogo solo cambia con `sync_icons`, `icons_import` o ediciones desde el
+admin, y cada cambio incrementa CatalogRevision('icons'). Cada proceso
+construye el índice una vez por revisión y responde las búsquedas sin tocar
+la BD; la revisión se vuelve a consultar como mucho cada
+SAPY_ICON_INDEX_CHECK_INTERVAL segundos.
+"""
+import gzip
+import json
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .models import CatalogRevision, Icon
+
+CATALOG = 'icons'
+FIELDS = ('class_name', 'label', 'tags', 'name', 'provider', 'style', 'library')
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Peso de cada campo al puntuar coincidencias (exacta, por prefijo)
+_WEIGHTS = {
+    'name': (8, 4),
+    'class_name': (6, 3),
+    'label': (4, 2),
+    'tags': (3, 1),
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+class IconIndex:
+    """Índice de una revisión concreta del catálogo."""
+
+    def __init__(self, revision: int, entries: List[dict]):
+        self.revision = revision
+        self.entries = entries
+        self._haystacks = [
+            '\n'.join((e['class_name'], e['name'], e['label'], e['tags'])).lower() for e in entries
+        ]
+        postings: Dict[str, Dict[int, tuple]] = {}
+        for idx, entry in enumerate(entries):
+            for field, weights in _WEIGHTS.items():
+                for token in tokenize(entry[field]):
+                    best = postings.setdefault(token, {}).get(idx)
+                    if best is None or best[0] < weights[0]:
+                        postings[token][idx] = weights
+        self._postings = postings
+        self._tokens = sorted(postings)
+        self._payload: Optional[bytes] = None
+        self._payload_gzip: Optional[bytes] = None
+
+    def _prefix_scores(self, term: str) -> Dict[int, int]:
+        """Puntuación por ícono para un término (coincidencia exacta o por prefijo de token)."""
+        scores: Dict[int, int] = {}
+        i = bisect_left(self._tokens, term)
+        while i < len(self._tokens) and self._tokens[i].startswith(term):
+            token = self._tokens[i]
+            exact = token == term
+            for idx, (w_exact, w_prefix) in self._postings[token].items():
+                score = w_exact if exact else w_prefix
+                if scores.get(idx, 0) < score:
+                    scores[idx] = score
+            i += 1
+        return scores
+
+    def search(self, q: str, provider: str = '', limit: int = 400) -> List[dict]:
+        terms = tokenize(q)
+        if not terms:
+            matches = [(0, idx) for idx in range(len(self.entries))]
+        else:
+            total: Optional[Dict[int, int]] = None
+            for term in terms:
+                scores = self._prefix_scores(term)
+                if total is None:
+                    total = scores
+                else:
+                    total = {idx: total[idx] + s for idx, s in scores.items() if idx in total}
+                if not total:
+                    break
+            if total:
+                matches = [(-score, idx) for idx, score in total.items()]
+            else:
+                # Sin coincidencia por token: subcadena, como el icontains original
+                needle = q.strip().lower()
+                matches = [(0, idx) for idx, hay in enumerate(self._haystacks) if needle in hay]
+        if provider:
+            matches = [m for m in matches if self.entries[m[1]]['provider'] == provider]
+        # Las entradas ya vienen en orden (provider, class_name); a igual puntuación se respeta
+        matches.sort()
+        return [self.entries[idx] for _, idx in matches[:limit]]
+
+    def payload(self, compressed: bool) -> bytes:
+        """Catálogo completo serializado en JSON (opcionalmente en gzip)."""
+        if self._payload is None:
+            self._payload = json.dumps(
+                {'revision': self.revision, 'results': self.entries},
+                ensure_ascii=False, separators=(',', ':'),
+            ).encode('utf-8')
+            self._payload_gzip = gzip.compress(self._payload, compresslevel=6)
+        return self._payload_gzip if compressed else self._payload
+
+
+_lock = threading.Lock()
+_index: Optional[IconIndex] = None
+_checked_at = 0.0
+_checked_revision = -1
+
+
+def current_revision() -> int:
+    """Revisión del catálogo, consultada como mucho cada SAPY_ICON_INDEX_CHECK_INTERVAL segundos."""
+    global _checked_at, _checked_revision
+    now = time.monotonic()
+    if _checked_revision < 0 or now - _checked_at >= settings.SAPY_ICON_INDEX_CHECK_INTERVAL:
+        _checked_revision = CatalogRevision.current(CATALOG)
+        _checked_at = now
+    return _checked_revision
+
+
+def get_index() -> IconIndex:
+    global _index
+    revision = current_revision()
+    index = _index
+    if index is not None and index.revision == revision:
+        return index
+    with _lock:
+        if _index is None or _index.revision != revision:
+            entries = list(
+                Icon.objects.filter(activo=True).order_by('provider', 'class_name').values(*FIELDS)
+            )
+            _index = IconIndex(revision, entries)
+        return _index
+
+
+def invalidate() -> None:
+    """Fuerza a releer la revisión en la próxima consulta (tras importar en este proceso)."""
+    global _checked_revision
+    _checked_revision = -1
@@ -0,0 +1,313 @@
+"""
+Cola de trabajos persistida en BD.
+
+Los trabajos se encolan desde las vistas con `enqueue()` y los ejecuta el worker
+`manage.py run_jobs`, que los reclama con SELECT ... FOR UPDATE SKIP LOCKED para
+que varios procesos/hilos nunca tomen el mismo trabajo. Cada tipo de trabajo
+(`Job.kind`) tiene un handler registrado con `@register`.
+"""
+import io
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Job], Optional[dict]]
+FailHook = Callable[[Job, str], None]
+
+_HANDLERS: Dict[str, Tuple[Handler, Optional[FailHook]]] = {}
+
+# Espera entre reintentos: 30s, 60s, 120s... (tope 10 min)
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 600
+
+# Clave arbitraria para serializar reclamos con pg_advisory_xact_lock
+_CLAIM_LOCK_KEY = 0x5A910B5
+
+
+def register(kind: str, on_fail: Optional[FailHook] = None):
+    """Registra el handler de un tipo de trabajo.
+
+    `on_fail(job, error)` se invoca cuando el trabajo queda definitivamente
+    fallido (agotó reintentos o su worker murió) para dejar consistente el
+    estado de los objetos relacionados.
+    """
+    def decorator(func: Handler) -> Handler:
+        _HANDLERS[kind] = (func, on_fail)
+        return func
+    return decorator
+
+
+def enqueue(kind: str, payload: Optional[dict] = None, application=None, created_by=None,
+            priority: int = 0, max_attempts: int = 1, run_after=None,
+            concurrency_key: str = '', batch: str = '') -> Job:
+    """Crea un trabajo en cola. El worker lo tomará en cuanto haya capacidad."""
+    if kind not in Job.Kind.values:
+        raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+    if created_by is not None and not getattr(created_by, 'is_authenticated', False):
+        created_by = None
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        application=application,
+        created_by=created_by,
+        priority=priority,
+        max_attempts=max(1, max_attempts),
+        run_after=run_after or timezone.now(),
+        concurrency_key=concurrency_key or '',
+        batch=batch or '',
+    )
+
+
+def _saturated() -> Tuple[set, set, set]:
+    """Tipos, concurrency_keys y aplicaciones que ya alcanzaron su límite de trabajos en ejecución.
+
+    Cada aplicación admite un solo trabajo a la vez, sea cual sea su tipo: la
+    instalación y los generadores reescriben models.py, urls.py y las
+    migraciones de la misma app, y dos en paralelo partirían de la misma copia.
+    """
+    kind_limits = getattr(settings, 'SAPY_JOBS_KIND_LIMITS', {}) or {}
+    key_limit = getattr(settings, 'SAPY_JOBS_PER_KEY_LIMIT', 0) or 0
+    kinds: Dict[str, int] = {}
+    keys: Dict[str, int] = {}
+    busy_apps = set()
+    running = (
+        Job.objects.filter(state=Job.State.RUNNING)
+        .values('kind', 'concurrency_key', 'application_id')
+        .annotate(n=Count('id'))
+    )
+    for row in running:
+        kinds[row['kind']] = kinds.get(row['kind'], 0) + row['n']
+        if row['concurrency_key']:
+            keys[row['concurrency_key']] = keys.get(row['concurrency_key'], 0) + row['n']
+        if row['application_id']:
+            busy_apps.add(row['application_id'])
+    full_kinds = {k for k, n in kinds.items() if k in kind_limits and n >= kind_limits[k]}
+    full_keys = {k for k, n in keys.items() if key_limit and n >= key_limit}
+    return full_kinds, full_keys, busy_apps
+
+
+def claim_next(worker_id: str) -> Optional[Job]:
+    """Reclama el siguiente trabajo disponible o devuelve None si no hay."""
+    now = timezone.now()
+    with transaction.atomic():
+        # Los límites se evalúan contando trabajos en ejecución; el lock evita que
+        # dos workers los rebasen al reclamar a la vez
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", [_CLAIM_LOCK_KEY])
+        full_kinds, full_keys, busy_apps = _saturated()
+        qs = Job.objects.filter(state=Job.State.QUEUED, run_after__lte=now)
+        if full_kinds:
+            qs = qs.exclude(kind__in=full_kinds)
+        if full_keys:
+            qs = qs.exclude(concurrency_key__in=full_keys)
+        if busy_apps:
+            qs = qs.exclude(application_id__in=busy_apps)
+        job = (
+            qs.select_for_update(skip_locked=True)
+            .order_by('priority', 'run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.state = Job.State.RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.heartbeat_at = now
+        job.started_at = now
+        job.finished_at = None
+        job.save(update_fields=['state', 'attempts', 'locked_by', 'heartbeat_at',
+                                'started_at', 'finished_at', 'updated_at'])
+    return job
+
+
+def heartbeat(job_ids: Iterable[int]) -> int:
+    """Marca como vivos los trabajos que el worker está ejecutando."""
+    ids = list(job_ids)
+    if not ids:
+        return 0
+    return Job.objects.filter(pk__in=ids, state=Job.State.RUNNING).update(heartbeat_at=timezone.now())
+
+
+def set_progress(job: Job, progress: dict) -> None:
+    """Publica el avance de un trabajo en ejecución sin tocar el resto de campos."""
+    job.progress = progress
+    Job.objects.filter(pk=job.pk).update(progress=progress, updated_at=timezone.now())
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_DELAY * (2 ** max(0, attempts - 1)), RETRY_MAX_DELAY))
+
+
+def _fail(job: Job, error: str) -> None:
+    """Marca el trabajo como fallido (o lo reencola si le quedan intentos)."""
+    now = timezone.now()
+    job.error = error[-8000:]
+    job.locked_by = ''
+    if job.attempts < job.max_attempts:
+        job.state = Job.State.QUEUED
+        job.run_after = now + _retry_delay(job.attempts)
+        job.save(update_fields=['state', 'error', 'locked_by', 'run_after', 'updated_at'])
+        return
+    job.state = Job.State.FAILED
+    job.finished_at = now
+    job.save(update_fields=['state', 'error', 'locked_by', 'finished_at', 'updated_at'])
+    _, on_fail = _HANDLERS.get(job.kind, (None, None))
+    if on_fail:
+        try:
+            on_fail(job, error)
+        except Exception:
+            logger.exception("on_fail de %s falló", job)
+
+
+def run_job(job: Job) -> None:
+    """Ejecuta un trabajo ya reclamado y guarda su resultado."""
+    handler, _ = _HANDLERS.get(job.kind, (None, None))
+    if handler is None:
+        _fail(job, f"No hay handler registrado para '{job.kind}'")
+        return
+    try:
+        result = handler(job) or {}
+    except Exception as e:
+        logger.exception("Trabajo %s falló", job)
+        _fail(job, f"{type(e).__name__}: {e}")
+        return
+    job.state = Job.State.SUCCEEDED
+    job.result = result
+    job.error = ''
+    job.locked_by = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['state', 'result', 'error', 'locked_by', 'finished_at', 'updated_at'])
+
+
+def requeue_stale(stale_after: int) -> int:
+    """Recupera trabajos 'running' cuyo worker dejó de latir hace más de `stale_after` segundos."""
+    limit = timezone.now() - timedelta(seconds=stale_after)
+    count = 0
+    stale_ids = list(
+        Job.objects.filter(state=Job.State.RUNNING, heartbeat_at__lt=limit).values_list('pk', flat=True)
+    )
+    for pk in stale_ids:
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(pk=pk, state=Job.State.RUNNING, heartbeat_at__lt=limit)
+                .first()
+            )
+            if job is None:
+                continue
+            _fail(job, f"Worker '{job.locked_by}' dejó de responder")
+            count += 1
+    return count
+
+
+# ==== Handlers ====
+
+def _install_failed(job: Job, error: str) -> None:
+    from .models import Application, DeploymentLog
+    log_id = job.payload.get('deployment_log_id')
+    if job.application_id:
+        Application.objects.filter(
+            pk=job.application_id, status__in=['installing', 'reinstalling']
+        ).update(status='error', updated_at=timezone.now())
+    if log_id:
+        log = DeploymentLog.objects.filter(pk=log_id, completed_at__isnull=True).first()
+        if log:
+            log.error_output = (log.error_output or '') + f"\n{error}"
+            log.success = False
+            log.completed_at = timezone.now()
+            log.save(update_fields=['error_output', 'success', 'completed_at'])
+
+
+@register(Job.Kind.INSTALL, on_fail=_install_failed)
+def handle_install(job: Job) -> dict:
+    from .models import Application, DeploymentLog
+    from .views import _run_install_job
+    log_id = job.payload['deployment_log_id']
+    _run_install_job(job.application_id, log_id)
+    status = Application.objects.filter(pk=job.application_id).values_list('status', flat=True).first()
+    if not DeploymentLog.objects.filter(pk=log_id, success=True).exists():
+        raise RuntimeError(f"La instalación terminó con estado '{status}'")
+    return {'status': status, 'deployment_log_id': log_id}
+
+
+@register(Job.Kind.GENERATE_PAGES)
+def handle_generate_pages(job: Job) -> dict:
+    from django.core.management import call_command
+    from .management.commands.generate_pages import Command as GeneratePagesCommand
+    p = job.payload
+    options = {
+        'app': p['app'],
+        'overwrite': bool(p.get('overwrite')),
+        'reload': bool(p.get('reload', True)),
+    }
+    if p.get('all_assigned'):
+        options['all_assigned'] = True
+    else:
+        options['tables'] = p.get('tables') or ''
+    if p.get('btn_title'):
+        options['btn_title'] = p['btn_title']
+    if p.get('menu'):
+        options['menu'] = p['menu']
+
+    out = io.StringIO()
+    tables: Dict[str, dict] = {}
+    progress = {'total': 0, 'done': 0, 'current': None, 'tables': [], 'log': ''}
+
+    def on_progress(event: dict) -> None:
+        entry = tables.setdefault(event['table'], {'name': event['table']})
+        entry['status'] = event['status']
+        if event.get('error'):
+            entry['error'] = event['error']
+        progress.update(
+            total=event['total'],
+            done=event['done'],
+            current=event['table'] if event['status'] == 'running' else None,
+            tables=list(tables.values()),
+            log=out.getvalue()[-4000:],
+        )
+        set_progress(job, progress)
+
+    command = GeneratePagesCommand()
+    command.progress_callback = on_progress
+    call_command(command, stdout=out, stderr=out, **options)
+    failed = [t['name'] for t in tables.values() if t['status'] == 'error']
+    progress.update(current=None, log=out.getvalue()[-4000:])
+    set_progress(job, progress)
+    return {'log': out.getvalue()[-4000:], 'tables': len(tables), 'failed_tables': failed}
+
+
+@register(Job.Kind.GENERATE_MODEL)
+def handle_generate_model(job: Job) -> dict:
+    from .models import DbTable
+    from .views import generate_django_model_for_table, generate_django_models_batch
+    if 'table_ids' in job.payload:
+        # Lote: un solo makemigrations/migrate para todas las tablas
+        tables = list(DbTable.objects.filter(pk__in=job.payload['table_ids']).order_by('name'))
+        result = generate_django_models_batch(job.application, tables)
+        if not result.get('success'):
+            raise RuntimeError(result.get('error') or 'Error desconocido')
+        return {
+            'tables': result['generated'],
+            'skipped': result['skipped'],
+            'levels': result.get('levels', []),
+            'cycles': result.get('cycles', []),
+            'message': result.get('message', ''),
+        }
+    table = DbTable.objects.get(pk=job.payload['table_id'])
+    if settings.SAPY_MODEL_ENGINE == 'ddl':
+        result = generate_django_models_batch(job.application, [table])
+    else:
+        result = generate_django_model_for_table(job.application, table)
+    if not result.get('success'):
+        raise RuntimeError(result.get('error') or 'Error desconocido')
+    return {'table': table.name, 'message': result.get('message', '')}
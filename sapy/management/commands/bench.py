@@ -0,0 +1,177 @@
+import io
+import json
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from sapy.models import ApplicationTable, CatalogRevision, DbColumn
+from sapy.synthetic import seed_catalog
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide tiempo y número de consultas de las vistas y comandos más usados sobre un catálogo "
+        "sintético (en una transacción que se revierte) y escribe el resultado en JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tables", type=int, default=200)
+        parser.add_argument("--columns", type=int, default=10)
+        parser.add_argument("--pages", type=int, default=None, help="Por defecto, una por tabla")
+        parser.add_argument("--menus", type=int, default=20)
+        parser.add_argument("--icons", type=int, default=2000)
+        parser.add_argument("--generate-tables", type=int, default=5,
+                            help="Tablas a procesar con generate_pages (default 5)")
+        parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por caso (default 5)")
+        parser.add_argument("--only", help="Casos a medir, separados por coma")
+        parser.add_argument("--output", help="Ruta del JSON de resultados")
+        parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+        parser.add_argument("--max-slowdown", type=float, default=0.25,
+                            help="Aumento relativo máximo de la mediana frente al baseline (default 0.25)")
+        parser.add_argument("--max-extra-queries", type=int, default=0,
+                            help="Consultas extra permitidas frente al baseline (default 0)")
+
+    def handle(self, *args, **opts):
+        baseline = None
+        if opts["baseline"]:
+            with open(opts["baseline"], encoding="utf-8") as f:
+                baseline = json.load(f)
+        sizes = {k: opts[k] for k in ("tables", "columns", "pages", "menus", "icons", "generate_tables")}
+
+        results = {}
+        with tempfile.TemporaryDirectory(prefix="sapy-bench-") as base_path:
+            try:
+                with transaction.atomic(), override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                    cases = self._prepare(opts, base_path)
+                    only = {c.strip() for c in (opts["only"] or "").split(",") if c.strip()}
+                    for name, run in cases:
+                        if only and name not in only:
+                            continue
+                        results[name] = self._measure(run, opts["repeat"])
+                        r = results[name]
+                        self.stdout.write(
+                            f"{name:<26} mediana {r['median_ms']:>9.1f} ms · min {r['min_ms']:>8.1f} · "
+                            f"máx {r['max_ms']:>8.1f} · {r['queries']:>5} consultas"
+                        )
+                    raise Rollback
+            except Rollback:
+                pass
+
+        report = {
+            "meta": {
+                "created_at": datetime.now(dt_timezone.utc).isoformat(),
+                "vendor": connection.vendor,
+                "python": platform.python_version(),
+                "repeat": opts["repeat"],
+                "sizes": sizes,
+            },
+            "results": results,
+        }
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultados en {opts['output']}")
+
+        if baseline is not None:
+            self._compare(report, baseline, opts)
+
+    def _prepare(self, opts, base_path):
+        """Siembra el catálogo y devuelve [(nombre, función a medir)]."""
+        from sapy.icon_index import invalidate
+        from sapy.page_scaffold import scaffold_pages
+        from sapy.ui_defaults import create_ui_defaults
+
+        sample = seed_catalog(
+            prefix="bench", tables=opts["tables"], columns=opts["columns"], pages=opts["pages"],
+            menus=opts["menus"], icons=opts["icons"],
+        )
+        # Componentes de UI y página completa (modal + formulario) como los tendría un catálogo real
+        create_ui_defaults(DbColumn.objects.filter(name__contains="bench"))
+        page = sample["page"]
+        scaffold_pages([page.db_table])
+        CatalogRevision.bump("icons")
+        invalidate()
+
+        application = sample["application"]
+        application.base_path = base_path
+        application.save(update_fields=["base_path"])
+        generate = list(
+            sample["table"].__class__.objects.filter(name__startswith="bench_t").order_by("name")[:opts["generate_tables"]]
+        )
+        ApplicationTable.objects.bulk_create([ApplicationTable(application=application, table=t) for t in generate])
+
+        user = User.objects.create_user(username="sapy-bench", password=None)
+        client = Client()
+        client.force_login(user)
+
+        def get(url):
+            def run():
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} respondió {response.status_code}")
+            return run
+
+        def generate_pages():
+            call_command(
+                "generate_pages", app=application.name, all_assigned=True, overwrite=True,
+                stdout=io.StringIO(), stderr=io.StringIO(),
+            )
+
+        return [
+            ("page_effective_config", get(reverse("sapy:page_effective_config", args=[page.pk]))),
+            ("page_detail", get(reverse("sapy:page_detail", args=[page.pk]))),
+            ("db_column_list", get(reverse("sapy:db_column_list"))),
+            ("application_dynamic_menu", get(reverse("sapy:application_dynamic_menu", args=[application.name]))),
+            ("icons_search", get(reverse("sapy:icons_search") + "?q=grupo1")),
+            ("generate_pages", generate_pages),
+        ]
+
+    def _measure(self, run, repeat):
+        run()  # calentamiento: cachés de proceso (índice de íconos, plantillas, grafo)
+        timings = []
+        queries = 0
+        for _ in range(max(repeat, 1)):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = len(ctx.captured_queries)
+        return {
+            "median_ms": round(statistics.median(timings), 2),
+            "min_ms": round(min(timings), 2),
+            "max_ms": round(max(timings), 2),
+            "queries": queries,
+        }
+
+    def _compare(self, report, baseline, opts):
+        failures = []
+        for name, current in report["results"].items():
+            previous = baseline.get("results", {}).get(name)
+            if not previous:
+                continue
+            limit_ms = previous["median_ms"] * (1 + opts["max_slowdown"])
+            limit_queries = previous["queries"] + opts["max_extra_queries"]
+            if current["median_ms"] > limit_ms:
+                failures.append(f"{name}: {current['median_ms']} ms > {limit_ms:.1f} ms")
+            if current["queries"] > limit_queries:
+                failures.append(f"{name}: {current['queries']} consultas > {limit_queries}")
+        if baseline.get("meta", {}).get("sizes") != report["meta"]["sizes"]:
+            self.stdout.write(self.style.WARNING("El baseline se midió con otros tamaños de catálogo"))
+        if failures:
+            raise CommandError("Regresiones frente al baseline:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Sin regresiones frente al baseline"))
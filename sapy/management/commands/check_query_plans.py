@@ -0,0 +1,106 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from sapy.models import DbTableColumn, DeploymentLog, Icon, MenuPage, Page
+from sapy.synthetic import seed_catalog
+
+# Consultas calientes del catálogo: (nombre, modelo, constructor del queryset a partir de la
+# muestra, si el índice debe entregar además el orden pedido)
+HOT_QUERIES = (
+    ('columnas de una tabla por posición', DbTableColumn,
+     lambda s: DbTableColumn.objects.filter(table=s['table']).order_by('position'), True),
+    ('páginas de un menú por sección y orden', MenuPage,
+     lambda s: MenuPage.objects.filter(menu=s['menu']).order_by('section', 'order_index'), True),
+    ('página generada desde una tabla', Page,
+     lambda s: Page.objects.filter(source_type=Page.SourceType.DBTABLE, db_table=s['table']), False),
+    ('íconos activos de un proveedor', Icon,
+     lambda s: Icon.objects.filter(activo=True, provider=Icon.Provider.BOOTSTRAP).order_by('provider', 'class_name')[:500],
+     True),
+    ('instalación en curso de una app', DeploymentLog,
+     lambda s: DeploymentLog.objects.filter(
+         application=s['application'], log_type='install', completed_at__isnull=True,
+     ).order_by('-started_at')[:1], True),
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+def full_scans(plan: str, table: str, limited: bool) -> bool:
+    """Indica si el plan recorre `table` completa (Seq Scan en PostgreSQL, SCAN en SQLite).
+
+    En SQLite, `SCAN t USING INDEX` recorre un índice en el orden pedido; con
+    LIMIT se detiene al completar el límite, así que solo cuenta sin él.
+    """
+    if connection.vendor == 'postgresql':
+        return re.search(rf'Seq Scan on {re.escape(table)}\b', plan) is not None
+    match = re.search(rf'\bSCAN {re.escape(table)}\b( USING (COVERING )?INDEX)?', plan)
+    return match is not None and not (match.group(1) and limited)
+
+
+def sorts(plan: str) -> bool:
+    """Indica si el plan ordena aparte (el índice no entrega el orden pedido)."""
+    if connection.vendor == 'postgresql':
+        return re.search(r'(^|->\s+)(Incremental )?Sort\b', plan, re.MULTILINE) is not None
+    return 'USE TEMP B-TREE FOR ORDER BY' in plan
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra un catálogo sintético (en una transacción que se revierte), obtiene EXPLAIN de las "
+        "consultas calientes y falla si alguna recorre completa una tabla por encima del umbral "
+        "o tiene que ordenar aparte lo que debería entregar un índice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tables", type=int, default=500)
+        parser.add_argument("--columns", type=int, default=12)
+        parser.add_argument("--menus", type=int, default=25)
+        parser.add_argument("--icons", type=int, default=5000)
+        parser.add_argument("--logs", type=int, default=2000)
+        parser.add_argument("--min-rows", type=int, default=1000,
+                            help="Tamaño mínimo de la tabla para exigir índice (default 1000)")
+        parser.add_argument("--verbose-plans", action="store_true", help="Mostrar el plan completo")
+
+    def handle(self, *args, **opts):
+        failures = []
+        try:
+            with transaction.atomic():
+                sample = seed_catalog(
+                    prefix="qplan", tables=opts["tables"], columns=opts["columns"], menus=opts["menus"],
+                    icons=opts["icons"], logs=opts["logs"],
+                )
+                # Estadísticas frescas para que el planificador vea el tamaño real
+                with connection.cursor() as cur:
+                    for _, model, _, _ in HOT_QUERIES:
+                        cur.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+                for name, model, build, ordered in HOT_QUERIES:
+                    table = model._meta.db_table
+                    rows = model.objects.count()
+                    queryset = build(sample)
+                    plan = queryset.explain()
+                    problem = None
+                    if full_scans(plan, table, queryset.query.high_mark is not None):
+                        problem = "FULL SCAN"
+                    elif ordered and sorts(plan):
+                        problem = "SORT"
+                    if problem and rows >= opts["min_rows"]:
+                        failures.append(f"{name} ({problem})")
+                        status = self.style.ERROR(problem)
+                    elif problem:
+                        status = self.style.WARNING(f"{problem} (solo {rows} filas)")
+                    else:
+                        status = self.style.SUCCESS("índice")
+                    self.stdout.write(f"{name} [{table}, {rows} filas]: {status}")
+                    if opts["verbose_plans"] or (problem and rows >= opts["min_rows"]):
+                        self.stdout.write("    " + plan.replace("\n", "\n    "))
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"Consultas sin índice adecuado: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("Todos los planes usan índices"))
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sapy.deploy import batch_progress, schedule_bulk_deploy
+from sapy.models import Application
+
+
+class Command(BaseCommand):
+    help = "Encola la (re)instalación de varias aplicaciones en un lote (las ejecuta run_jobs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("apps", nargs="*", help="Nombres de aplicación")
+        parser.add_argument("--all-deployed", action="store_true",
+                            help="Reinstalar todas las aplicaciones desplegadas")
+        parser.add_argument("--wait", action="store_true",
+                            help="Esperar y mostrar el progreso agregado hasta terminar")
+        parser.add_argument("--interval", type=float, default=3.0,
+                            help="Segundos entre reportes de progreso con --wait")
+
+    def handle(self, *args, **opts):
+        names = opts["apps"]
+        if opts["all_deployed"]:
+            qs = Application.objects.filter(status="deployed")
+        elif names:
+            qs = Application.objects.filter(name__in=names)
+            missing = set(names) - set(qs.values_list("name", flat=True))
+            if missing:
+                raise CommandError(f"Aplicaciones no encontradas: {', '.join(sorted(missing))}")
+        else:
+            raise CommandError("Indica nombres de aplicación o --all-deployed")
+
+        applications = list(qs.order_by("name"))
+        batch, skipped = schedule_bulk_deploy(applications)
+        for app in skipped:
+            self.stdout.write(self.style.WARNING(f"Omitida (instalación en curso): {app.name}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Lote {batch}: {len(applications) - len(skipped)} instalación(es) encoladas"
+        ))
+        if not opts["wait"] or len(skipped) == len(applications):
+            return
+
+        last = None
+        while True:
+            data = batch_progress(batch)
+            c = data["counts"]
+            line = (f"[{batch}] {data['finished']}/{data['total']} terminadas · "
+                    f"{c['running']} en ejecución · {c['queued']} en cola · {c['failed']} fallidas")
+            if line != last:
+                self.stdout.write(line)
+                last = line
+            if data["done"]:
+                break
+            time.sleep(max(0.5, opts["interval"]))
+
+        for item in data["items"]:
+            style = self.style.SUCCESS if item["state"] == "succeeded" else self.style.ERROR
+            self.stdout.write(style(f"  {item['application']}: {item['state_display']} ({item['elapsed']}s)"))
+        self.stdout.write(f"Tiempo total: {data['wall_time']}s")
+        if c["failed"]:
+            raise CommandError(f"{c['failed']} instalación(es) fallidas")
@@ -19,6 +19,9 @@ from .page_generators.service_manager import ServiceManager
 class Command(BaseCommand):
     help = "Generate CRUD pages and modals using real page configuration from database"
 
+    # Optional hook used by the job queue: called with a dict describing each table step
+    progress_callback = None
+
     def add_arguments(self, parser):
         parser.add_argument('--app', required=True, help='Target app name (e.g., facxy)')
         parser.add_argument('--tables', help='Comma-separated table names; omit for --all-assigned')
@@ -30,7 +33,6 @@ class Command(BaseCommand):
         parser.add_argument('--reload', action='store_true', help='Attempt to reload service after generation')
         parser.add_argument('--reload-service', help='Explicit systemd service name to reload (e.g., gunicorn@app)')
 
-    @transaction.atomic
     def handle(self, *args, **options):
         # Parse and validate arguments
         app_name = options['app']
@@ -59,14 +61,19 @@ class Command(BaseCommand):
         # Process each table
         has_errors = False
         
-        for table in tables:
+        total = len(tables)
+        for index, table in enumerate(tables):
+            self._notify_progress(total=total, done=index, table=table.name, status='running')
             try:
-                result = self._process_table(
-                    table, app_name, template_generator, file_manager,
-                    overwrite, with_modals, menu_slug, application, btn_title
-                )
+                # One transaction per table so a failure only rolls back its own objects
+                with transaction.atomic():
+                    result = self._process_table(
+                        table, app_name, template_generator, file_manager,
+                        overwrite, with_modals, menu_slug, application, btn_title
+                    )
                 all_created_files.extend(result['created'])
                 all_updated_files.extend(result['updated'])
+                self._notify_progress(total=total, done=index + 1, table=table.name, status='done')
                 
             except Exception as e:
                 has_errors = True
@@ -74,7 +81,8 @@ class Command(BaseCommand):
                     self.style.ERROR(f"Error processing table {table.name}: {e}")
                 )
                 import traceback
-                traceback.print_exc()
+                self.stderr.write(traceback.format_exc())
+                self._notify_progress(total=total, done=index + 1, table=table.name, status='error', error=str(e))
                 continue
 
         # Report results
@@ -94,6 +102,11 @@ class Command(BaseCommand):
         if do_reload or reload_service:
             ServiceManager.reload_service(app_name, reload_service)
 
+    def _notify_progress(self, **event):
+        """Forward a progress event to progress_callback, if any."""
+        if self.progress_callback:
+            self.progress_callback(event)
+
     def _get_application(self, app_name: str) -> Application:
         """Get and validate application."""
         application = Application.objects.filter(name=app_name).first()
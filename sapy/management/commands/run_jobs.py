@@ -0,0 +1,113 @@
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from sapy import jobs
+
+
+class Command(BaseCommand):
+    help = "Worker de la cola de trabajos (instalaciones, generación de páginas y modelos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=settings.SAPY_JOBS_CONCURRENCY,
+                            help="Trabajos simultáneos máximos en este worker")
+        parser.add_argument("--poll-interval", type=float, default=settings.SAPY_JOBS_POLL_INTERVAL,
+                            help="Segundos de espera cuando la cola está vacía")
+        parser.add_argument("--stale-after", type=int, default=settings.SAPY_JOBS_STALE_AFTER,
+                            help="Segundos sin heartbeat para considerar muerto un trabajo")
+        parser.add_argument("--once", action="store_true",
+                            help="Procesar lo que haya en cola y terminar")
+
+    def handle(self, *args, **opts):
+        concurrency = max(1, opts["concurrency"])
+        poll_interval = max(0.1, opts["poll_interval"])
+        stale_after = max(10, opts["stale_after"])
+        once = opts["once"]
+
+        self.stop = threading.Event()
+        self.active: dict[str, int] = {}
+        self.active_lock = threading.Lock()
+        base_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, self._request_stop)
+
+        recovered = jobs.requeue_stale(stale_after)
+        if recovered:
+            self.stdout.write(self.style.WARNING(f"Trabajos huérfanos recuperados: {recovered}"))
+        connection.close()
+
+        self.stdout.write(self.style.NOTICE(
+            f"→ Worker {base_id} con {concurrency} hilo(s), poll {poll_interval}s"
+        ))
+
+        workers = [
+            threading.Thread(
+                target=self._worker_loop,
+                args=(f"{base_id}:{i}", poll_interval, once),
+                name=f"sapy-job-{i}",
+            )
+            for i in range(concurrency)
+        ]
+        for t in workers:
+            t.start()
+
+        # El hilo principal late por los trabajos activos y recupera huérfanos
+        beat = max(1.0, min(settings.SAPY_JOBS_HEARTBEAT_INTERVAL, stale_after / 3))
+        alive = workers
+        while alive:
+            alive[0].join(timeout=beat)
+            self._beat(stale_after)
+            alive = [t for t in workers if t.is_alive()]
+        connection.close()
+        self.stdout.write(self.style.SUCCESS("Worker detenido."))
+
+    def _request_stop(self, signum, frame):
+        self.stdout.write(self.style.WARNING("Deteniendo: se terminarán los trabajos en curso..."))
+        self.stop.set()
+
+    def _beat(self, stale_after: int):
+        with self.active_lock:
+            ids = list(self.active.values())
+        try:
+            jobs.heartbeat(ids)
+            jobs.requeue_stale(stale_after)
+        except Exception as e:
+            self.stderr.write(f"Error en heartbeat: {e}")
+        finally:
+            close_old_connections()
+
+    def _worker_loop(self, worker_id: str, poll_interval: float, once: bool):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                try:
+                    job = jobs.claim_next(worker_id)
+                except Exception as e:
+                    self.stderr.write(f"[{worker_id}] Error reclamando trabajo: {e}")
+                    connection.close()
+                    self.stop.wait(poll_interval)
+                    continue
+                if job is None:
+                    if once:
+                        break
+                    self.stop.wait(poll_interval)
+                    continue
+                with self.active_lock:
+                    self.active[worker_id] = job.pk
+                self.stdout.write(f"[{worker_id}] {job.kind} #{job.pk} (intento {job.attempts}/{job.max_attempts})")
+                try:
+                    jobs.run_job(job)
+                finally:
+                    with self.active_lock:
+                        self.active.pop(worker_id, None)
+                style = self.style.SUCCESS if job.state == job.State.SUCCEEDED else self.style.ERROR
+                self.stdout.write(style(f"[{worker_id}] {job.kind} #{job.pk} → {job.get_state_display()}"))
+        finally:
+            connection.close()
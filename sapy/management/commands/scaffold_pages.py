@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sapy.models import DbTable
+from sapy.page_scaffold import scaffold_pages
+
+
+class Command(BaseCommand):
+    help = "Genera páginas por defecto (tabla, modal, formulario) para varias tablas del catálogo en una transacción."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tables", nargs="*", help="Nombres de las tablas (DbTable.name)")
+        parser.add_argument("--all", action="store_true", help="Todas las tablas activas")
+
+    def handle(self, *args, **opts):
+        if opts["all"]:
+            tables = list(DbTable.objects.filter(activo=1).order_by("name"))
+        elif opts["tables"]:
+            tables = list(DbTable.objects.filter(name__in=opts["tables"]).order_by("name"))
+            missing = sorted(set(opts["tables"]) - {t.name for t in tables})
+            if missing:
+                raise CommandError(f"Tablas no encontradas: {', '.join(missing)}")
+        else:
+            raise CommandError("Indica tablas o --all")
+
+        results = scaffold_pages(tables)
+        for r in results:
+            status = "creada" if r["created"] else "existente"
+            extras = []
+            if not r["created"] and r["page_table_created"]:
+                extras.append("tabla")
+            if not r["created"] and r["modal_created"]:
+                extras.append("modal")
+            if r["form_questions"]:
+                extras.append(f"{r['form_questions']} pregunta(s)")
+            detail = f" (+{', '.join(extras)})" if extras else ""
+            self.stdout.write(f"{r['table']}: página {status} {r['route_path']}{detail}")
+        created = sum(1 for r in results if r["created"])
+        self.stdout.write(self.style.SUCCESS(f"{created} página(s) creadas, {len(results) - created} ya existían"))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sapy.models import Application
+from sapy.schema_diff import apply_plan, build_plan
+
+
+class Command(BaseCommand):
+    help = "Compara el catálogo con la BD de una aplicación y muestra (o aplica) el plan de ALTERs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("app", help="Nombre de la aplicación")
+        parser.add_argument("--apply", action="store_true", help="Aplicar el plan (por defecto solo se muestra)")
+        parser.add_argument("--include-unsafe", action="store_true",
+                            help="Aplicar también cambios no seguros (reescrituras, SET NOT NULL, reducciones)")
+
+    def handle(self, *args, **opts):
+        application = Application.objects.filter(name=opts["app"]).first()
+        if not application:
+            raise CommandError(f"Aplicación no encontrada: {opts['app']}")
+
+        plan = build_plan(application)
+        for error in plan["errors"]:
+            self.stdout.write(self.style.ERROR(error))
+        if not plan["steps"]:
+            self.stdout.write(self.style.SUCCESS("Sin diferencias"))
+            return
+        for step in plan["steps"]:
+            target = f"{step['table']}.{step['column']}" if step["column"] else step["table"]
+            flag = "" if step["safe"] else " [NO SEGURO]"
+            self.stdout.write(f"-- {target}: {step['action']}{flag} {step['detail']}".rstrip())
+            if step["sql"]:
+                self.stdout.write(step["sql"] + ";")
+
+        if not opts["apply"]:
+            return
+        result = apply_plan(application, plan, include_unsafe=opts["include_unsafe"])
+        self.stdout.write(
+            f"Aplicados: {result['applied']} · no seguros omitidos: {result['skipped_unsafe']}"
+            + (f" · migración {result['migration']}" if result["migration"] else "")
+        )
+        if not result["success"]:
+            raise CommandError(" | ".join(result["errors"]))
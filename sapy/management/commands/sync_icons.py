@@ -5,10 +5,11 @@ from pathlib import Path
 
 import requests
 import yaml
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
-from sapy.models import Icon
+from sapy.icon_index import invalidate
+from sapy.models import CatalogRevision, Icon
 
 
 BI_DEFAULT_VERSION = os.getenv("BI_VERSION", "latest")
@@ -25,6 +26,17 @@ RE_BI = re.compile(
 
 ALLOWED_STYLES_FA = ("solid", "regular", "brands")
 
+# Nombres de archivo aceptados con --from-dir (copias locales de los paquetes npm)
+BI_LOCAL_FILES = ("bootstrap-icons.css", "font/bootstrap-icons.css")
+FA_LOCAL_FILES = ("icons.yml", "metadata/icons.yml")
+
+RE_BI_VERSION = re.compile(r"Bootstrap Icons v(\d+(?:\.\d+)*)")
+
+# Columnas que se actualizan cuando el ícono ya existe (class_name es la clave)
+UPSERT_FIELDS = ["provider", "library", "version", "name", "style", "unicode", "label", "tags", "activo", "updated_at"]
+
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def fetch_text(url: str, timeout=30) -> str:
     resp = requests.get(url, timeout=timeout)
@@ -64,8 +76,47 @@ def parse_bootstrap_icons(css_text: str, version: str):
     return rows
 
 
-def parse_fontawesome_free(yml_text: str, version: str):
-    data = yaml.safe_load(yml_text) or {}
+def find_local_file(base: Path, candidates) -> Path | None:
+    for name in candidates:
+        path = base / name
+        if path.is_file():
+            return path
+    return None
+
+
+def iter_yaml_mapping(lines):
+    """Recorre un mapping YAML de primer nivel entrada por entrada.
+
+    icons.yml de Font Awesome pesa varios MB; en lugar de cargarlo completo se
+    acumula cada bloque de primer nivel (una línea sin sangría y sus líneas
+    sangradas) y se parsea por separado.
+    """
+    block: list[str] = []
+
+    def flush():
+        if not block:
+            return None
+        data = yaml.load("".join(block), Loader=YamlLoader) or {}
+        block.clear()
+        return data
+
+    for line in lines:
+        if not line.endswith("\n"):
+            line += "\n"
+        starts_entry = line[:1] not in (" ", "\t", "#", "\n", "\r", "-")
+        if starts_entry and block:
+            data = flush()
+            if isinstance(data, dict):
+                yield from data.items()
+        if starts_entry or block:
+            block.append(line)
+    data = flush()
+    if isinstance(data, dict):
+        yield from data.items()
+
+
+def parse_fontawesome_free(yml_lines, version: str):
+    """Filas de íconos a partir de las líneas de icons.yml (iterable, se procesa en streaming)."""
     rows = []
 
     def style_prefix(style: str) -> str:
@@ -75,7 +126,7 @@ def parse_fontawesome_free(yml_text: str, version: str):
             return "fa-regular"
         return "fa-solid"
 
-    for name, info in data.items():
+    for name, info in iter_yaml_mapping(yml_lines):
         if not isinstance(info, dict):
             continue
         free_styles = info.get("free") or []
@@ -121,6 +172,8 @@ def write_csv(rows, path: Path):
                 "css_class",
                 "unicode",
                 "provider",
+                "label",
+                "tags",
             ],
         )
         writer.writeheader()
@@ -128,19 +181,70 @@ def write_csv(rows, path: Path):
             writer.writerow(r)
 
 
+def to_icon(r) -> Icon:
+    return Icon(
+        provider=r["provider"],
+        class_name=r["css_class"],
+        library=r["library"],
+        version=r["version"],
+        name=r["name"],
+        style=r["style"],
+        unicode=r["unicode"],
+        label=r.get("label", ""),
+        tags=r.get("tags", ""),
+        activo=True,
+    )
+
+
 class Command(BaseCommand):
     help = "Sincroniza íconos de Bootstrap Icons y Font Awesome 6 Free (DB y/o CSV)."
 
     def add_arguments(self, parser):
         parser.add_argument("--bs-version", default=BI_DEFAULT_VERSION)
         parser.add_argument("--fa-version", default=FA_DEFAULT_VERSION)
+        parser.add_argument("--from-dir", default="",
+                            help="Leer bootstrap-icons.css e icons.yml de este directorio en lugar de descargarlos")
         parser.add_argument("--csv-dir", default="")
         parser.add_argument("--save-db", action="store_true")
-        parser.add_argument("--replace", action="store_true")
+        parser.add_argument("--replace", action="store_true",
+                            help="Eliminar los íconos de cada librería que ya no vienen en la nueva versión")
+
+    def load_sources(self, from_dir: Path | None, bs_ver: str, fa_ver: str):
+        """Filas de Bootstrap Icons y Font Awesome, desde archivos locales o desde unpkg."""
+        if from_dir is None:
+            bi_rows = parse_bootstrap_icons(fetch_text(BI_CSS_URL.format(ver=bs_ver)), bs_ver)
+            fa_rows = parse_fontawesome_free(fetch_text(FA_YML_URL.format(ver=fa_ver)).splitlines(), fa_ver)
+            return bi_rows, fa_rows
+
+        if not from_dir.is_dir():
+            raise CommandError(f"No existe el directorio {from_dir}")
+        bi_path = find_local_file(from_dir, BI_LOCAL_FILES)
+        fa_path = find_local_file(from_dir, FA_LOCAL_FILES)
+        if not bi_path and not fa_path:
+            raise CommandError(f"No se encontró bootstrap-icons.css ni icons.yml en {from_dir}")
+
+        bi_rows, fa_rows = None, None
+        if bi_path:
+            css_text = bi_path.read_text(encoding="utf-8", errors="ignore")
+            if bs_ver == "latest":
+                m = RE_BI_VERSION.search(css_text[:2000])
+                bs_ver = m.group(1) if m else bs_ver
+            self.stdout.write(f"  {bi_path} (v{bs_ver})")
+            bi_rows = parse_bootstrap_icons(css_text, bs_ver)
+        else:
+            self.stdout.write(self.style.WARNING("  bootstrap-icons.css no encontrado: se omite Bootstrap Icons"))
+        if fa_path:
+            self.stdout.write(f"  {fa_path}")
+            with fa_path.open(encoding="utf-8", errors="ignore") as fh:
+                fa_rows = parse_fontawesome_free(fh, fa_ver)
+        else:
+            self.stdout.write(self.style.WARNING("  icons.yml no encontrado: se omite Font Awesome"))
+        return bi_rows, fa_rows
 
     def handle(self, *args, **opts):
         bs_ver = opts["bs_version"]
         fa_ver = opts["fa_version"]
+        from_dir = Path(opts["from_dir"]) if opts["from_dir"] else None
         csv_dir = Path(opts["csv_dir"]) if opts["csv_dir"] else None
         to_db = bool(opts["save_db"])
         replace = bool(opts["replace"])
@@ -155,62 +259,52 @@ class Command(BaseCommand):
             )
             return
 
-        bi_css = fetch_text(BI_CSS_URL.format(ver=bs_ver))
-        fa_yml = fetch_text(FA_YML_URL.format(ver=fa_ver))
-
-        bi_rows = parse_bootstrap_icons(bi_css, bs_ver)
-        fa_rows = parse_fontawesome_free(fa_yml, fa_ver)
-
-        self.stdout.write(f"Bootstrap Icons: {len(bi_rows)} íconos")
-        self.stdout.write(f"Font Awesome 6 Free: {len(fa_rows)} íconos")
+        bi_rows, fa_rows = self.load_sources(from_dir, bs_ver, fa_ver)
+        sources = [
+            ("bootstrap-icons", "Bootstrap Icons", "bootstrap_icons.csv", bi_rows),
+            ("fontawesome6", "Font Awesome 6 Free", "fontawesome6_free.csv", fa_rows),
+        ]
+        sources = [src for src in sources if src[3] is not None]
+        for _, title, _, rows in sources:
+            self.stdout.write(f"{title}: {len(rows)} íconos")
 
         if csv_dir:
-            write_csv(bi_rows, csv_dir / "bootstrap_icons.csv")
-            write_csv(fa_rows, csv_dir / "fontawesome6_free.csv")
+            for _, _, filename, rows in sources:
+                write_csv(rows, csv_dir / filename)
             self.stdout.write(self.style.SUCCESS(f"CSV guardados en {csv_dir}"))
 
         if to_db:
+            table = connection.ops.quote_name(Icon._meta.db_table)
             with transaction.atomic():
-                if replace:
-                    Icon.objects.filter(library="bootstrap-icons").delete()
-                    Icon.objects.filter(library="fontawesome6").delete()
-                Icon.objects.bulk_create(
-                    [
-                        Icon(
-                            provider=r["provider"],
-                            class_name=r["css_class"],
-                            library=r["library"],
-                            version=r["version"],
-                            name=r["name"],
-                            style=r["style"],
-                            unicode=r["unicode"],
-                            label=r.get("label", ""),
-                            tags=r.get("tags", ""),
-                        )
-                        for r in bi_rows
-                    ],
-                    ignore_conflicts=True,
-                    batch_size=1000,
-                )
-                Icon.objects.bulk_create(
-                    [
-                        Icon(
-                            provider=r["provider"],
-                            class_name=r["css_class"],
-                            library=r["library"],
-                            version=r["version"],
-                            name=r["name"],
-                            style=r["style"],
-                            unicode=r["unicode"],
-                            label=r.get("label", ""),
-                            tags=r.get("tags", ""),
-                        )
-                        for r in fa_rows
-                    ],
-                    ignore_conflicts=True,
-                    batch_size=1000,
-                )
+                for library, title, _, rows in sources:
+                    # Upsert por class_name: los existentes se actualizan en sitio
+                    by_class = {r["css_class"]: r for r in rows}
+                    Icon.objects.bulk_create(
+                        [to_icon(r) for r in by_class.values()],
+                        update_conflicts=True,
+                        unique_fields=["class_name"],
+                        update_fields=UPSERT_FIELDS,
+                        batch_size=1000,
+                    )
+                    stale = 0
+                    if replace:
+                        stale_ids = [
+                            pk for pk, cls in Icon.objects.filter(library=library).values_list("pk", "class_name")
+                            if cls not in by_class
+                        ]
+                        # DELETE directo, sin el post_delete de Icon (que sube la revisión por fila);
+                        # nada referencia a Icon, así que no hay cascadas que perder
+                        with connection.cursor() as cur:
+                            for i in range(0, len(stale_ids), 1000):
+                                chunk = stale_ids[i:i + 1000]
+                                cur.execute(
+                                    f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})",
+                                    chunk,
+                                )
+                                stale += cur.rowcount
+                    self.stdout.write(f"{title}: {len(by_class)} sincronizados, {stale} obsoletos eliminados")
+                CatalogRevision.bump("icons")
+            invalidate()
             self.stdout.write(self.style.SUCCESS("Íconos guardados en DB."))
 
         self.stdout.write(self.style.SUCCESS("✓ Terminado"))
-
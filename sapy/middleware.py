@@ -0,0 +1,110 @@
+"""
+Instrumentación SQL por request (opcional, SAPY_SQL_INSTRUMENTATION=true).
+
+Cuenta y cronometra las consultas de cada request mediante
+`connection.execute_wrapper`, las agrupa por SQL normalizado (literales y
+listas IN reemplazados por ?) para detectar patrones N+1, y agrega un header
+`Server-Timing` con el tiempo de BD y de la app. Los requests lentos o con
+grupos repetidos se registran en el logger 'sapy.sql' con sus peores grupos.
+
+Desactivada, el middleware lanza MiddlewareNotUsed y Django lo retira de la
+cadena: no hay costo por request.
+"""
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('sapy.sql')
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+_SPACES_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL sin literales: consultas iguales salvo por sus parámetros quedan en el mismo grupo."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACES_RE.sub(' ', sql).strip()
+
+
+class QueryStats:
+    """Consultas de un request agrupadas por SQL normalizado."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.groups = {}  # sql normalizado -> [veces, segundos]
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            group = self.groups.setdefault(normalize_sql(sql), [0, 0.0])
+            group[0] += 1
+            group[1] += elapsed
+
+    def repeated(self, threshold: int) -> list:
+        """Grupos ejecutados al menos `threshold` veces (posible N+1), los más costosos primero."""
+        return sorted(
+            ((sql, n, secs) for sql, (n, secs) in self.groups.items() if n >= threshold),
+            key=lambda g: g[2], reverse=True,
+        )
+
+    def worst(self, limit: int) -> list:
+        return sorted(
+            ((sql, n, secs) for sql, (n, secs) in self.groups.items()),
+            key=lambda g: g[2], reverse=True,
+        )[:limit]
+
+
+class SqlInstrumentationMiddleware:
+    """Cuenta y cronometra las consultas SQL de cada request (ver docstring del módulo)."""
+
+    def __init__(self, get_response):
+        if not settings.SAPY_SQL_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        db_ms = stats.duration * 1000
+        total_ms = total * 1000
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries"',
+            f'app;dur={max(total_ms - db_ms, 0):.1f}',
+            f'total;dur={total_ms:.1f}',
+        ))
+
+        repeated = stats.repeated(settings.SAPY_SQL_NPLUS1_THRESHOLD)
+        if repeated:
+            response['X-Sapy-Repeated-Queries'] = str(len(repeated))
+        if total_ms >= settings.SAPY_SQL_SLOW_REQUEST_MS or repeated:
+            lines = [
+                f"  {n}× {secs * 1000:.1f} ms  {sql[:300]}"
+                for sql, n, secs in (repeated or stats.worst(3))[:3]
+            ]
+            logger.warning(
+                "%s %s → %s: %.1f ms, %d consultas (%.1f ms en BD)%s\n%s",
+                request.method, request.path, response.status_code, total_ms, stats.count, db_ms,
+                ' · posible N+1' if repeated else '', '\n'.join(lines),
+            )
+        return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sapy', '0032_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='batch',
+            field=models.CharField(blank=True, db_index=True, help_text='Lote de despliegue masivo', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='concurrency_key',
+            field=models.CharField(blank=True, db_index=True, help_text='Recurso compartido (p. ej. host de BD) con límite de trabajos simultáneos', max_length=255),
+        ),
+    ]
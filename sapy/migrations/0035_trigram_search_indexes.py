@@ -0,0 +1,52 @@
+from django.db import migrations, transaction
+
+
+# (tabla, columna) consultadas con ILIKE por los endpoints de búsqueda (sapy.search)
+TRGM_INDEXES = [
+    ('app_generator_db_tables', 'name'),
+    ('app_generator_menus', 'name'),
+    ('app_generator_menus', 'title'),
+    ('app_generator_pages', 'slug'),
+    ('app_generator_pages', 'title'),
+    ('app_generator_icons', 'class_name'),
+    ('app_generator_icons', 'name'),
+    ('app_generator_icons', 'label'),
+    ('app_generator_icons', 'tags'),
+]
+
+
+def _index_name(table, column):
+    return f"{table.replace('app_generator_', 'ag_')}_{column}_trgm"
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except Exception:
+        # Sin permisos para crear la extensión: la búsqueda sigue con icontains sin índice
+        return
+    for table, column in TRGM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{_index_name(table, column)}" '
+            f'ON "{table}" USING gin ("{column}" gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in TRGM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{_index_name(table, column)}"')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('sapy', '0034_job_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
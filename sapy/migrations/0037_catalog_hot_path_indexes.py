@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sapy', '0036_catalogrevision'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dbtablecolumn',
+            index=models.Index(fields=['table', 'position'], name='app_gen_tcol_table_pos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deploymentlog',
+            index=models.Index(condition=models.Q(('completed_at__isnull', True)), fields=['application', 'log_type', '-started_at'], name='app_gen_deplog_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='icon',
+            index=models.Index(fields=['activo', 'provider', 'class_name'], name='app_gen_icon_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menupage',
+            index=models.Index(fields=['menu', 'section', 'order_index'], name='app_gen_menupage_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(fields=['source_type', 'db_table'], name='app_gen_page_source_idx'),
+        ),
+    ]
@@ -4,7 +4,10 @@ from django.contrib.auth.models import User
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+import threading
 import uuid
+from contextlib import contextmanager
+from django.utils import timezone
 from django.urls import reverse
 
 class Application(models.Model):
@@ -149,6 +152,15 @@ class Application(models.Model):
         return dict(self.DATABASE_CHOICES).get(self.db_engine, 'Desconocido')
 
 
+@receiver(post_save, sender=Application)
+def notify_application_status(sender, instance: Application, **kwargs):
+    """Despierta a los long-polls de estado de esta aplicación al confirmar la transacción."""
+    from django.db import transaction
+    from .status_channel import notify_status, publish_status
+    publish_status(instance.pk)
+    transaction.on_commit(lambda: notify_status(instance.pk))
+
+
 class ApplicationDependency(models.Model):
     """Dependencias Python/pip para cada aplicación"""
     
@@ -235,6 +247,14 @@ class DeploymentLog(models.Model):
     class Meta:
         db_table = 'app_generator_deployment_logs'
         ordering = ['-started_at']
+        indexes = [
+            # Instalación en curso de una app (completed_at IS NULL), la más reciente primero
+            models.Index(
+                fields=['application', 'log_type', '-started_at'],
+                condition=models.Q(completed_at__isnull=True),
+                name='app_gen_deplog_open_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.application.name} - {self.log_type} - {self.started_at}"
@@ -246,6 +266,78 @@ class DeploymentLog(models.Model):
         return None
 
 
+class Job(models.Model):
+    """Trabajo en segundo plano persistido en BD.
+
+    Lo ejecuta el worker `manage.py run_jobs`, que reclama trabajos con
+    SELECT ... FOR UPDATE SKIP LOCKED y mantiene `heartbeat_at` mientras corren.
+    """
+
+    class Kind(models.TextChoices):
+        INSTALL = 'install', 'Instalación'
+        GENERATE_PAGES = 'generate_pages', 'Generación de páginas'
+        GENERATE_MODEL = 'generate_model', 'Generación de modelo'
+
+    class State(models.TextChoices):
+        QUEUED = 'queued', 'En cola'
+        RUNNING = 'running', 'En ejecución'
+        SUCCEEDED = 'succeeded', 'Completado'
+        FAILED = 'failed', 'Fallido'
+
+    kind = models.CharField(max_length=30, choices=Kind.choices)
+    state = models.CharField(max_length=20, choices=State.choices, default=State.QUEUED)
+    payload = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    progress = models.JSONField(default=dict, blank=True, help_text='Avance reportado mientras corre')
+    error = models.TextField(blank=True)
+    application = models.ForeignKey(
+        Application,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    priority = models.SmallIntegerField(default=0, help_text='Menor valor se ejecuta primero')
+    concurrency_key = models.CharField(
+        max_length=255,
+        blank=True,
+        db_index=True,
+        help_text='Recurso compartido (p. ej. host de BD) con límite de trabajos simultáneos'
+    )
+    batch = models.CharField(max_length=40, blank=True, db_index=True, help_text='Lote de despliegue masivo')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=1)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=150, blank=True, help_text='Worker que ejecuta el trabajo')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'app_generator_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['state', 'priority', 'run_after'], name='app_gen_jobs_claim_idx'),
+        ]
+        verbose_name = 'Trabajo'
+        verbose_name_plural = 'Trabajos'
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.state})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.state in (self.State.SUCCEEDED, self.State.FAILED)
+
+
 # ==== Esquema de Base de Datos (metadata para generación de tablas) ====
 
 class DbTable(models.Model):
@@ -614,6 +706,9 @@ class DbTableColumn(models.Model):
         db_table = 'app_generator_table_columns'
         unique_together = [('table', 'column')]
         ordering = ['table__name', 'position', 'column__name']
+        indexes = [
+            models.Index(fields=['table', 'position'], name='app_gen_tcol_table_pos_idx'),
+        ]
         verbose_name = 'Columna de Tabla'
         verbose_name_plural = 'Columnas de Tablas'
 
@@ -879,8 +974,17 @@ def _title_from_name(name: str) -> str:
     return base.capitalize()
 
 
-def _derive_ui_defaults(db_col: DbColumn) -> tuple[dict, dict]:
-    """Devuelve (ui_column_defaults, ui_field_defaults) desde una DbColumn."""
+def _resolve_fk_table(table_name: str, fk_tables: dict = None):
+    """DbTable referenciada por nombre; con `fk_tables` (nombre -> DbTable precargado) no consulta la BD."""
+    if fk_tables is not None:
+        return fk_tables.get(table_name)
+    return DbTable.objects.filter(name=table_name).first()
+
+
+def _derive_ui_defaults(db_col: DbColumn, fk_tables: dict = None, order: int = 1) -> tuple[dict, dict]:
+    """Devuelve (ui_column_defaults, ui_field_defaults) desde una DbColumn.
+    `fk_tables` y `order` los provee la derivación en lote (sapy.ui_defaults).
+    """
     name = db_col.name
     label = _title_from_name(name)
     alignment = UiColumn.Alignment.LEFT
@@ -928,9 +1032,7 @@ def _derive_ui_defaults(db_col: DbColumn) -> tuple[dict, dict]:
     if name.startswith('id_'):
         # Para DbColumn no existe references_table; resolvemos por nombre
         try:
-            from .models import DbTable  # import local para evitar ciclos
-            ref_name = name[3:]
-            fk_table = DbTable.objects.filter(name=ref_name).first()
+            fk_table = _resolve_fk_table(name[3:], fk_tables)
             if fk_table:
                 input_type = UiField.InputType.SELECT
                 options_source = UiField.OptionsSource.FK
@@ -964,17 +1066,24 @@ def _derive_ui_defaults(db_col: DbColumn) -> tuple[dict, dict]:
             options_source=options_source,
             fk_table=fk_table,
             fk_label_field='nombre',
-            order=db_col.position or 1,
+            order=order,
         )
     return ui_col, ui_field
 
 
-def _derive_form_question_defaults(db_col: DbColumn, page_title: str = None) -> dict:
+# Ancho del campo ('1-1', '1-2', ...) -> clase CSS de FormQuestion
+_WIDTH_CSS_CLASS = {'1-1': 'col-md-12', '1-2': 'col-md-6', '1-4': 'col-md-3'}
+
+
+def _derive_form_question_defaults(db_col: DbColumn, page_title: str = None,
+                                   fk_tables: dict = None, order: int = 1) -> dict:
     """Devuelve form_question_defaults desde una DbColumn.
     
     Args:
         db_col: La columna de base de datos
         page_title: Título de la página (opcional, para personalizar labels)
+        fk_tables: Mapa nombre -> DbTable precargado (derivación en lote, sin consultas)
+        order: Orden del campo en el formulario
     """
     name = db_col.name
     
@@ -1033,7 +1142,7 @@ def _derive_form_question_defaults(db_col: DbColumn, page_title: str = None) ->
     if name.startswith('id_') and name != 'id':
         table_name = name[3:]  # remover 'id_'
         try:
-            fk_table = DbTable.objects.filter(name=table_name).first()
+            fk_table = _resolve_fk_table(table_name, fk_tables)
             if fk_table:
                 input_type = FormQuestion.InputType.SELECT
                 options_source = FormQuestion.OptionsSource.FK
@@ -1073,10 +1182,10 @@ def _derive_form_question_defaults(db_col: DbColumn, page_title: str = None) ->
         'fk_table': fk_table,
         'fk_value_field': 'id',
         'fk_label_field': 'nombre',
-        'width_fraction': width_fraction,
+        'css_class': _WIDTH_CSS_CLASS[width_fraction],
         'placeholder': placeholder,
         'default_value': db_col.default_value or '',
-        'order': db_col.position or 1,
+        'order': order,
         'section': '',
         'is_active': True,
     }
@@ -1089,25 +1198,29 @@ def create_ui_defaults_for_dbcolumn(sender, instance: DbColumn, created: bool, *
     if not created:
         return
     try:
-        # No generar UI para columnas técnicas de auditoría y control
-        if instance.name in ['created_at', 'updated_at', 'id_auth_user']:
-            return
-        # Crear UiColumn si no existe
-        if not hasattr(instance, 'ui_column'):
-            col_defaults, field_defaults = _derive_ui_defaults(instance)
-            UiColumn.objects.create(db_column=instance, **col_defaults)
-            if field_defaults is not None:
-                UiField.objects.create(db_column=instance, **field_defaults)
-        
-        # Crear FormQuestion si no existe
-        if not hasattr(instance, 'form_question'):
-            question_defaults = _derive_form_question_defaults(instance)
-            FormQuestion.objects.create(db_column=instance, **question_defaults)
+        # Dentro de ui_defaults.deferred() se acumula y se crea en lote al confirmar la transacción
+        from .ui_defaults import create_or_defer
+        create_or_defer(instance)
     except Exception:
         # No romper la creación de columnas por errores de UI
         pass
 
 
+@receiver(post_save, sender=DbTableColumn)
+@receiver(post_delete, sender=DbTableColumn)
+def invalidate_activo_for_table_column(sender, instance: DbTableColumn, **kwargs):
+    from .table_io import invalidate_activo_cache
+    invalidate_activo_cache(instance.table_id)
+
+
+@receiver(post_save, sender=DbColumn)
+def invalidate_activo_for_dbcolumn(sender, instance: DbColumn, created: bool, **kwargs):
+    # Un cambio de nombre/tipo puede afectar a cualquier tabla que use la columna
+    if not created:
+        from .table_io import invalidate_activo_cache
+        invalidate_activo_cache()
+
+
 @receiver(post_delete, sender=DbColumn)
 def cleanup_ui_for_dbcolumn(sender, instance: DbColumn, **kwargs):
     # La relación es CASCADE por OneToOne, pero dejamos el receiver por claridad
@@ -1188,6 +1301,9 @@ class MenuPage(models.Model):
         db_table = 'app_generator_menu_pages'
         unique_together = [('menu', 'page')]
         ordering = ['menu__name', 'section', 'order_index']
+        indexes = [
+            models.Index(fields=['menu', 'section', 'order_index'], name='app_gen_menupage_order_idx'),
+        ]
         verbose_name = 'Página de Menú'
         verbose_name_plural = 'Páginas de Menú'
 
@@ -1282,6 +1398,9 @@ class Icon(models.Model):
     class Meta:
         db_table = 'app_generator_icons'
         ordering = ['provider', 'class_name']
+        indexes = [
+            models.Index(fields=['activo', 'provider', 'class_name'], name='app_gen_icon_active_idx'),
+        ]
         verbose_name = 'Ícono'
         verbose_name_plural = 'Íconos'
 
@@ -1289,6 +1408,98 @@ class Icon(models.Model):
         return self.class_name
 
 
+class CatalogRevision(models.Model):
+    """Contador de versión de un catálogo (p. ej. 'icons').
+
+    Se incrementa cada vez que el catálogo cambia; los índices en memoria y
+    los ETag de los endpoints se derivan de este número.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    revision = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'app_generator_catalog_revisions'
+        verbose_name = 'Revisión de catálogo'
+        verbose_name_plural = 'Revisiones de catálogo'
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.name}@{self.revision}"
+
+    @classmethod
+    def current(cls, name: str) -> int:
+        return cls.objects.filter(name=name).values_list('revision', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, name: str) -> None:
+        updated = cls.objects.filter(name=name).update(
+            revision=models.F('revision') + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            obj, created = cls.objects.get_or_create(name=name, defaults={'revision': 1})
+            if not created:
+                cls.objects.filter(pk=obj.pk).update(revision=models.F('revision') + 1)
+
+    @classmethod
+    def bump_on_commit(cls, name: str) -> None:
+        """Sube la revisión al confirmar la transacción (una sola vez por bloque `deferred_revisions`)."""
+        from django.db import transaction
+        pending = getattr(_deferred_revisions, 'names', None)
+        if pending is not None:
+            pending.add(name)
+            return
+        transaction.on_commit(lambda: cls.bump(name))
+
+
+_deferred_revisions = threading.local()
+
+
+@contextmanager
+def deferred_revisions():
+    """Acumula los `bump_on_commit` del bloque y sube cada revisión una vez al confirmar.
+
+    Para escrituras en lote (altas de columnas, borrados en cascada): en lugar
+    de un UPDATE por fila sobre la misma fila de CatalogRevision, uno por
+    catálogo. Los bloques anidados se suman al externo.
+    """
+    from django.db import transaction
+    if getattr(_deferred_revisions, 'names', None) is not None:
+        yield
+        return
+    _deferred_revisions.names = set()
+    try:
+        yield
+    finally:
+        names, _deferred_revisions.names = _deferred_revisions.names, None
+        for name in names:
+            transaction.on_commit(lambda name=name: CatalogRevision.bump(name))
+
+
+@receiver(post_save, sender=Icon)
+@receiver(post_delete, sender=Icon)
+def bump_icon_catalog(sender, instance: Icon, **kwargs):
+    from .icon_index import invalidate
+    CatalogRevision.bump('icons')
+    invalidate()
+
+
+@receiver(post_save, sender=DbTable)
+@receiver(post_delete, sender=DbTable)
+@receiver(post_save, sender=DbTableColumn)
+@receiver(post_delete, sender=DbTableColumn)
+@receiver(post_delete, sender=DbColumn)
+def bump_table_catalog(sender, instance, **kwargs):
+    # Invalida el grafo de dependencias (sapy.dependency_graph)
+    CatalogRevision.bump_on_commit('tables')
+
+
+@receiver(post_save, sender=DbColumn)
+def bump_table_catalog_for_dbcolumn(sender, instance: DbColumn, created: bool, **kwargs):
+    # Renombrar una columna id_* cambia las dependencias de las tablas que la usan
+    if not created:
+        CatalogRevision.bump_on_commit('tables')
+
+
 class Page(models.Model):
     class SourceType(models.TextChoices):
         DBTABLE = 'dbtable', 'Desde tabla BD'
@@ -1309,6 +1520,9 @@ class Page(models.Model):
     class Meta:
         db_table = 'app_generator_pages'
         ordering = ['slug']
+        indexes = [
+            models.Index(fields=['source_type', 'db_table'], name='app_gen_page_source_idx'),
+        ]
         verbose_name = 'Página'
         verbose_name_plural = 'Páginas'
 
@@ -0,0 +1,106 @@
+"""
+Edición del models.py de las apps destino.
+
+El archivo se analiza una sola vez con `ast` para obtener el rango de líneas
+de cada clase de primer nivel (decoradores y clases anidadas incluidos). Los
+reemplazos e inserciones se acumulan en memoria y el texto final se genera
+de una vez, así que generar N modelos lee y escribe el archivo una sola vez
+y respeta el resto del contenido (comentarios, funciones, otros imports).
+"""
+import ast
+import os
+from typing import Dict, List, Tuple
+
+# Imports que necesitan las clases generadas por generate_model_code
+REQUIRED_IMPORTS = (
+    ('django.db', 'models'),
+    ('django.utils', 'timezone'),
+    ('django.conf', 'settings'),
+)
+
+
+class ModelsFileError(Exception):
+    """models.py no se puede analizar (error de sintaxis)."""
+
+
+def model_class_name(table_name: str) -> str:
+    """Nombre de la clase del modelo para una tabla (mismo criterio que generate_model_code)."""
+    return table_name.title()
+
+
+class ModelsFile:
+    """Índice clase → líneas de un models.py, con cambios acumulados en memoria."""
+
+    def __init__(self, content: str = ''):
+        self.lines: List[str] = (content or '').splitlines(keepends=True)
+        try:
+            tree = ast.parse(content or '')
+        except SyntaxError as exc:
+            raise ModelsFileError(f'models.py tiene errores de sintaxis (línea {exc.lineno}): {exc.msg}')
+        # Rango (inicio, fin) 0-based y semiabierto de cada clase de primer nivel
+        self.classes: Dict[str, Tuple[int, int]] = {}
+        self.imported = set()
+        self._import_at = 0
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+                self.classes[node.name] = (start, node.end_lineno)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                self.imported.update((node.module, alias.name) for alias in node.names if not alias.asname)
+                if not self.classes:
+                    self._import_at = node.end_lineno
+            elif node is tree.body[0] and isinstance(node, ast.Expr) \
+                    and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+                # Docstring del módulo: los imports nuevos van después
+                self._import_at = node.end_lineno
+        self._replacements: Dict[str, str] = {}
+        self._appended: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str) -> 'ModelsFile':
+        content = ''
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        return cls(content)
+
+    def has_class(self, name: str) -> bool:
+        return name in self.classes or name in self._appended
+
+    def set_class(self, name: str, code: str) -> None:
+        """Reemplaza la clase `name` por `code` o la agrega al final si no existe."""
+        code = code.rstrip('\n')
+        if name in self.classes:
+            self._replacements[name] = code
+        else:
+            self._appended[name] = code
+
+    def set_model(self, table_name: str, model_code: str) -> None:
+        self.set_class(model_class_name(table_name), model_code)
+
+    def render(self) -> str:
+        lines = list(self.lines)
+        # Reemplazos de abajo hacia arriba para no desplazar los rangos pendientes
+        for name in sorted(self._replacements, key=lambda n: self.classes[n][0], reverse=True):
+            start, end = self.classes[name]
+            lines[start:end] = [self._replacements[name] + '\n']
+
+        missing = [f"from {module} import {name}\n" for module, name in REQUIRED_IMPORTS
+                   if (module, name) not in self.imported]
+        if missing:
+            # _import_at queda antes de la primera clase: los reemplazos no lo desplazan
+            lines[self._import_at:self._import_at] = missing
+            if self._import_at == 0 and len(lines) > len(missing) and lines[len(missing)].strip():
+                lines.insert(len(missing), '\n')
+
+        content = ''.join(lines)
+        for code in self._appended.values():
+            if content.strip():
+                content = content.rstrip('\n') + '\n\n\n' + code + '\n'
+            else:
+                content = code + '\n'
+        return content
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
@@ -0,0 +1,112 @@
+"""
+Orden disperso (con huecos) para listas reordenables: columnas de tabla, páginas de menú.
+
+Las posiciones se asignan de GAP en GAP, de modo que mover un elemento casi
+siempre cabe entre sus vecinos y solo se escribe esa fila. Cuando ya no hay
+hueco se renumera todo el conjunto en una única sentencia
+UPDATE ... FROM (VALUES ...).
+"""
+from bisect import bisect_left
+from typing import Dict, List, Sequence
+
+from django.db import connection, models, transaction
+
+GAP = 1024
+MAX_POSITION = 2 ** 31 - 1  # PositiveIntegerField
+
+
+def next_position(queryset: models.QuerySet, field: str) -> int:
+    """Posición para añadir un elemento al final del conjunto."""
+    current = queryset.aggregate(m=models.Max(field))['m'] or 0
+    return current + GAP
+
+
+def _stable_indexes(values: Sequence[int]) -> set:
+    """Índices de la subsecuencia estrictamente creciente más larga (se quedan donde están)."""
+    tails: List[int] = []
+    tails_idx: List[int] = []
+    parent = [-1] * len(values)
+    for i, v in enumerate(values):
+        k = bisect_left(tails, v)
+        if k == len(tails):
+            tails.append(v)
+            tails_idx.append(i)
+        else:
+            tails[k] = v
+            tails_idx[k] = i
+        parent[i] = tails_idx[k - 1] if k else -1
+    keep = set()
+    i = tails_idx[-1] if tails_idx else -1
+    while i != -1:
+        keep.add(i)
+        i = parent[i]
+    return keep
+
+
+def plan_positions(current: Sequence[int]) -> Dict[int, int] | None:
+    """Nuevas posiciones (índice -> posición) para dejar `current` en orden creciente.
+
+    `current` son las posiciones actuales en el orden deseado. Solo se mueven
+    los elementos fuera de la subsecuencia creciente más larga. Devuelve None
+    si algún tramo no cabe entre sus vecinos (hay que renumerar).
+    """
+    keep = _stable_indexes(current)
+    changes: Dict[int, int] = {}
+    n = len(current)
+    i = 0
+    while i < n:
+        if i in keep:
+            i += 1
+            continue
+        j = i
+        while j < n and j not in keep:
+            j += 1
+        # Tramo [i, j) a colocar entre los anclas lo (i-1) y hi (j)
+        lo = current[i - 1] if i > 0 else 0
+        count = j - i
+        hi = current[j] if j < n else lo + GAP * (count + 1)
+        if hi - lo - 1 < count or hi > MAX_POSITION:
+            return None
+        step = (hi - lo) / (count + 1)
+        for k in range(count):
+            changes[i + k] = lo + max(1, int(step * (k + 1)))
+        i = j
+    return changes
+
+
+def _write_positions(model, field: str, pairs: Sequence[tuple]) -> int:
+    """Aplica [(pk, posición), ...] en una sola sentencia."""
+    if not pairs:
+        return 0
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.get_field(field).column)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    values = ', '.join(['(%s, %s)'] * len(pairs))
+    params = [x for pair in pairs for x in pair]
+    with connection.cursor() as cur:
+        cur.execute(
+            # column1/column2 son los nombres implícitos de VALUES (PostgreSQL y SQLite)
+            f'UPDATE {table} SET {column} = v.column2 '
+            f'FROM (VALUES {values}) AS v WHERE {table}.{pk} = v.column1',
+            params,
+        )
+        return cur.rowcount
+
+
+def reorder(queryset: models.QuerySet, ordered_ids: Sequence[int], field: str = 'position') -> int:
+    """Deja los elementos `ordered_ids` del queryset en ese orden. Devuelve filas escritas."""
+    ordered_ids = list(ordered_ids)
+    with transaction.atomic():
+        current_map = dict(
+            queryset.select_for_update().filter(pk__in=ordered_ids).values_list('pk', field)
+        )
+        if len(current_map) != len(set(ordered_ids)) or len(ordered_ids) != len(set(ordered_ids)):
+            raise ValueError('IDs no válidos')
+        current = [current_map[pk] or 0 for pk in ordered_ids]
+        plan = plan_positions(current)
+        if plan is None:
+            # Sin huecos: renumerar todo el conjunto
+            pairs = [(pk, GAP * (i + 1)) for i, pk in enumerate(ordered_ids)]
+        else:
+            pairs = [(ordered_ids[i], pos) for i, pos in sorted(plan.items())]
+        return _write_positions(queryset.model, field, pairs)
@@ -0,0 +1,205 @@
+"""
+Generación en lote de páginas por defecto a partir de tablas del catálogo.
+
+Para cada DbTable se asegura una Page (source_type='dbtable') con su
+PageTable, un Modal de alta/edición con su PageModal y ModalForm, y las
+FormQuestion de sus columnas. Todo ocurre en una transacción: las filas
+existentes se precargan con una consulta por modelo y las faltantes se crean
+con `bulk_create`, así que generar 200 páginas cuesta unas decenas de
+consultas en lugar de varias por tabla y por columna.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import (
+    DbTable, DbTableColumn, FormQuestion, Modal, ModalForm, Page, PageModal, PageTable,
+    _derive_form_question_defaults,
+)
+from .ui_defaults import BATCH_SIZE, TECHNICAL_COLUMNS, fk_table_map
+
+
+def default_title(table: DbTable) -> str:
+    """Título de la página para una tabla: alias (si es significativo) o nombre técnico."""
+    base_title = table.alias or table.name
+    if table.alias and len(table.alias.strip()) <= 1:
+        base_title = table.name
+    return base_title.replace('_', ' ').capitalize()
+
+
+def _free_slug(slug: str, taken_slugs: set, taken_routes: set) -> str:
+    """`slug` o `slug-N` con el primer N libre (slug y ruta son únicos en Page)."""
+    candidate, n = slug, 0
+    while candidate in taken_slugs or f"/{candidate}/" in taken_routes:
+        n += 1
+        candidate = f"{slug}-{n}"
+    return candidate
+
+
+def _create_form_questions(tables: List[DbTable], titles: Dict[int, str]) -> Dict[int, int]:
+    """Crea las FormQuestion faltantes de las columnas de `tables`. Retorna creadas por tabla."""
+    rows = list(
+        DbTableColumn.objects.filter(table__in=tables)
+        .select_related('column')
+        .annotate(has_form_question=Exists(FormQuestion.objects.filter(db_column=OuterRef('column_id'))))
+        .order_by('table_id', 'position', 'column__name')
+    )
+    fk_tables = fk_table_map(tc.column for tc in rows if not tc.has_form_question)
+    by_table = defaultdict(list)
+    for tc in rows:
+        by_table[tc.table_id].append(tc)
+
+    counts: Dict[int, int] = defaultdict(int)
+    questions: List[FormQuestion] = []
+    seen = set()
+    for table in tables:
+        # position tiene huecos (ver sapy.ordering); el orden del formulario es su rango 1..N
+        for rank, tc in enumerate(by_table[table.id], start=1):
+            col = tc.column
+            if col.name in TECHNICAL_COLUMNS or (col.is_primary_key and col.is_auto_increment):
+                continue
+            # FormQuestion es única por DbColumn: una columna compartida se crea una sola vez
+            if tc.has_form_question or col.id in seen:
+                continue
+            seen.add(col.id)
+            defaults = _derive_form_question_defaults(col, titles[table.id], fk_tables=fk_tables, order=rank)
+            questions.append(FormQuestion(db_column=col, **defaults))
+            counts[table.id] += 1
+    FormQuestion.objects.bulk_create(questions, batch_size=BATCH_SIZE)
+    return counts
+
+
+def scaffold_pages(tables: Iterable[DbTable], overrides: Optional[Dict[int, dict]] = None) -> List[dict]:
+    """Asegura página, tabla, modal, formulario y preguntas para cada tabla, en una transacción.
+
+    `overrides` permite fijar {'title', 'slug'} por id de tabla. Retorna un dict
+    por tabla con page_id, slug, route_path y qué se creó.
+    """
+    unique = {}
+    for table in tables:
+        unique.setdefault(table.id, table)
+    tables = list(unique.values())
+    if not tables:
+        return []
+    overrides = overrides or {}
+    titles = {t.id: (overrides.get(t.id) or {}).get('title') or default_title(t) for t in tables}
+
+    with transaction.atomic():
+        # 1) Páginas: reusar la existente para la tabla o crearla
+        pages: Dict[int, Page] = {}
+        for page in Page.objects.filter(source_type=Page.SourceType.DBTABLE, db_table__in=tables).order_by('id'):
+            pages.setdefault(page.db_table_id, page)
+        new_pages = []
+        missing = [t for t in tables if t.id not in pages]
+        if missing:
+            taken_slugs, taken_routes = set(), set()
+            for slug, route_path in Page.objects.values_list('slug', 'route_path'):
+                taken_slugs.add(slug)
+                taken_routes.add(route_path)
+            for table in missing:
+                base_slug = ((overrides.get(table.id) or {}).get('slug') or table.name).strip().lower()
+                slug = _free_slug(base_slug, taken_slugs, taken_routes)
+                taken_slugs.add(slug)
+                taken_routes.add(f"/{slug}/")
+                new_pages.append(Page(
+                    slug=slug,
+                    title=titles[table.id],
+                    description=table.description or '',
+                    source_type=Page.SourceType.DBTABLE,
+                    db_table=table,
+                    icon='',
+                    layout='',
+                    route_path=f"/{slug}/",
+                    activo=True,
+                ))
+            Page.objects.bulk_create(new_pages)
+            for page in new_pages:
+                pages[page.db_table_id] = page
+        page_ids = [pages[t.id].id for t in tables]
+
+        # 2) Tabla principal con defaults
+        existing_page_tables = set(
+            PageTable.objects.filter(page_id__in=page_ids).values_list('page_id', 'db_table_id')
+        )
+        new_page_tables = [
+            PageTable(
+                page=pages[t.id],
+                db_table=t,
+                title=titles[t.id],
+                searchable=True,
+                export_csv=True,
+                export_xlsx=True,
+                export_pdf=True,
+                page_size=25,
+                default_sort={'by': 'id', 'dir': 'desc'},
+                show_inactive=False,
+                activo=True,
+            )
+            for t in tables if (pages[t.id].id, t.id) not in existing_page_tables
+        ]
+        PageTable.objects.bulk_create(new_page_tables)
+
+        # 3) Modal CRUD por defecto + formulario
+        first_modal: Dict[int, int] = {}
+        page_modals = PageModal.objects.filter(page_id__in=page_ids).order_by('page_id', 'order_index', 'id')
+        for page_id, modal_id in page_modals.values_list('page_id', 'modal_id'):
+            first_modal.setdefault(page_id, modal_id)
+        with_form = set(
+            ModalForm.objects.filter(modal_id__in=first_modal.values()).values_list('modal_id', flat=True)
+        )
+        need_modal = [t for t in tables if pages[t.id].id not in first_modal]
+        modals = [
+            Modal(
+                purpose='create_edit',
+                title=f"Gestionar {titles[t.id]}",
+                size='lg',
+                icon='',
+                close_on_backdrop=True,
+                close_on_escape=True,
+                prevent_close_on_enter=False,
+                prevent_close_on_space=False,
+                submit_button_label='Guardar',
+                submit_button_icon='',
+                cancel_button_label='Cancelar',
+                activo=True,
+            )
+            for t in need_modal
+        ]
+        Modal.objects.bulk_create(modals)
+        PageModal.objects.bulk_create([
+            PageModal(page=pages[t.id], modal=modal, order_index=0, activo=True)
+            for t, modal in zip(need_modal, modals)
+        ])
+        forms = [
+            ModalForm(modal=modal, db_table=t, layout_columns_per_row=2, activo=True)
+            for t, modal in zip(need_modal, modals)
+        ]
+        forms += [
+            ModalForm(modal_id=first_modal[pages[t.id].id], db_table=t, layout_columns_per_row=2, activo=True)
+            for t in tables
+            if pages[t.id].id in first_modal and first_modal[pages[t.id].id] not in with_form
+        ]
+        ModalForm.objects.bulk_create(forms)
+
+        # 4) Preguntas de formulario (excepto PK autoincrement y columnas técnicas)
+        question_counts = _create_form_questions(tables, titles)
+
+    created_pages = {p.db_table_id for p in new_pages}
+    created_page_tables = {pt.db_table_id for pt in new_page_tables}
+    created_modals = {t.id for t in need_modal}
+    return [
+        {
+            'table_id': t.id,
+            'table': t.name,
+            'page_id': pages[t.id].id,
+            'slug': pages[t.id].slug,
+            'route_path': pages[t.id].route_path,
+            'created': t.id in created_pages,
+            'page_table_created': t.id in created_page_tables,
+            'modal_created': t.id in created_modals,
+            'form_questions': question_counts.get(t.id, 0),
+        }
+        for t in tables
+    ]
@@ -0,0 +1,412 @@
+"""
+Diferencias entre el catálogo (DbTable/DbTableColumn/DbColumn) y la BD real de una
+aplicación destino, y plan mínimo de cambios para alinearlas.
+
+`fetch_schema` lee information_schema.columns y pg_indexes de todas las tablas
+de la app en una sola consulta. `build_plan` compara contra el catálogo y
+genera ALTER TABLE / CREATE INDEX CONCURRENTLY. Cada paso se marca como seguro
+o no seguro (reescritura de la tabla, posibles fallos por datos existentes).
+`apply_plan` ejecuta los pasos transaccionales en una transacción, con el
+estado de migraciones de Django registrado (sapy.ddl.execute_with_state), y
+después los índices CONCURRENTLY fuera de transacción; el estado de los
+índices creados se registra en una segunda migración.
+"""
+import copy
+import re
+from typing import Dict, List, Optional, Sequence
+
+from .ddl import (
+    DdlError, column_spec, compile_table, create_model_operation, execute_with_state,
+    field_expression, load_table_columns, qn, sql_default, sql_type, _identifier,
+)
+from .models import DbTable
+
+SCHEMA = 'public'
+
+# data_type de information_schema esperado para cada tipo del catálogo
+_PG_TYPES = {
+    'integer': ('integer',),
+    'serial': ('integer',),
+    'bigint': ('bigint',),
+    'bigserial': ('bigint',),
+    'smallint': ('smallint',),
+    'varchar': ('character varying',),
+    'text': ('text',),
+    'boolean': ('boolean',),
+    'date': ('date',),
+    'timestamp': ('timestamp with time zone', 'timestamp without time zone'),
+    'numeric': ('numeric',),
+}
+
+_INDEXDEF_RE = re.compile(r'^CREATE (UNIQUE )?INDEX .*? USING \w+ \((.*)\)', re.IGNORECASE)
+_INDEX_NAME_RE = re.compile(r'IF NOT EXISTS ("(?:[^"]|"")+")')
+_CAST_RE = re.compile(r'::[\w\s"]+(\[\])?$')
+
+_SCHEMA_SQL = """
+    SELECT 'column', c.table_name, c.column_name, c.data_type, c.character_maximum_length,
+           c.numeric_precision, c.numeric_scale, c.is_nullable, c.column_default, c.is_identity, NULL
+    FROM information_schema.columns c
+    WHERE c.table_schema = %(schema)s AND c.table_name = ANY(%(tables)s)
+    UNION ALL
+    SELECT 'index', i.tablename, i.indexname, NULL, NULL, NULL, NULL, NULL, NULL, NULL, i.indexdef
+    FROM pg_indexes i
+    WHERE i.schemaname = %(schema)s AND i.tablename = ANY(%(tables)s)
+"""
+
+
+def fetch_schema(application, table_names: Sequence[str]) -> Dict[str, dict]:
+    """{tabla: {'columns': {nombre: {...}}, 'indexes': [{'name', 'unique', 'columns'}]}} de la BD destino."""
+    from . import target_db
+    schema: Dict[str, dict] = {}
+    with target_db.connection(application) as conn:
+        with conn.cursor() as cur:
+            cur.execute(_SCHEMA_SQL, {'schema': SCHEMA, 'tables': list(table_names)})
+            rows = cur.fetchall()
+    for kind, table, name, data_type, length, precision, scale, nullable, default, identity, indexdef in rows:
+        entry = schema.setdefault(table, {'columns': {}, 'indexes': []})
+        if kind == 'column':
+            entry['columns'][name] = {
+                'data_type': data_type,
+                'length': length,
+                'precision': precision,
+                'scale': scale,
+                'nullable': nullable == 'YES',
+                'default': default,
+                'identity': identity == 'YES',
+            }
+        else:
+            m = _INDEXDEF_RE.match(indexdef or '')
+            columns = [c.strip().strip('"') for c in m.group(2).split(',')] if m else []
+            entry['indexes'].append({'name': name, 'unique': bool(m and m.group(1)), 'columns': columns})
+    return schema
+
+
+def _normalize_default(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    value = value.strip()
+    while True:
+        stripped = _CAST_RE.sub('', value).strip()
+        if stripped.startswith('(') and stripped.endswith(')'):
+            stripped = stripped[1:-1].strip()
+        if stripped == value:
+            break
+        value = stripped
+    if value.upper() == 'NULL':
+        return None
+    return value.lower()
+
+
+def _expected_type(spec: dict) -> tuple:
+    """(data_type, length, precision, scale) esperados en information_schema."""
+    data_type = spec['data_type']
+    if data_type == 'varchar':
+        return ('character varying', spec['length'] or 255, None, None)
+    if data_type == 'numeric' and spec['precision']:
+        scale = spec['scale'] or 0
+        return ('numeric', None, spec['precision'] + scale, scale)
+    return (_PG_TYPES.get(data_type, ('character varying',))[0], None, None, None)
+
+
+def _type_step(table: str, spec: dict, actual: dict) -> Optional[dict]:
+    expected, length, precision, scale = _expected_type(spec)
+    accepted = _PG_TYPES.get(spec['data_type'], (expected,))
+    col = spec['name']
+    if actual['data_type'] not in accepted:
+        target = sql_type({**spec, 'primary_key': False})
+        return {
+            'sql': f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(col)} TYPE {target} USING {qn(col)}::{target}",
+            'safe': False,
+            'detail': f"tipo {actual['data_type']} → {target} (reescribe la tabla)",
+        }
+    if expected == 'character varying' and actual['length'] != length:
+        grows = actual['length'] is not None and length > actual['length']
+        return {
+            'sql': f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(col)} TYPE varchar({length})",
+            'safe': grows,
+            'detail': f"longitud {actual['length']} → {length}" + ('' if grows else ' (puede truncar/fallar)'),
+        }
+    if expected == 'numeric' and precision and (actual['precision'], actual['scale']) != (precision, scale):
+        grows = actual['scale'] == scale and (actual['precision'] or 0) < precision
+        return {
+            'sql': f"ALTER TABLE {qn(table)} ALTER COLUMN {qn(col)} TYPE numeric({precision}, {scale})",
+            'safe': grows,
+            'detail': f"numeric({actual['precision']}, {actual['scale']}) → numeric({precision}, {scale})",
+        }
+    return None
+
+
+def _step(table: str, column: Optional[str], action: str, sql: Optional[str], safe: bool = True,
+          concurrent: bool = False, detail: str = '') -> dict:
+    return {
+        'table': table, 'column': column, 'action': action, 'sql': sql,
+        'safe': safe, 'concurrent': concurrent, 'detail': detail,
+    }
+
+
+def diff_table(table: DbTable, table_columns: Sequence, actual: Optional[dict]) -> List[dict]:
+    """Pasos para llevar una tabla de la BD al estado del catálogo."""
+    name = table.name
+    if actual is None:
+        specs = [column_spec(tc) for tc in table_columns]
+        compiled = compile_table(table, specs)
+        sql = ';\n'.join(compiled['create'] + compiled['indexes'])
+        steps = [_step(name, None, 'create_table', sql, detail='la tabla no existe')]
+        # compile_table emite una FK por cada columna con `references`, en el mismo orden
+        referencing = [spec for spec in specs if spec['references']]
+        for spec, fk_sql in zip(referencing, compiled['foreign_keys']):
+            steps.append(_step(name, spec['name'], 'add_foreign_key', fk_sql, detail=f"→ {spec['references']}"))
+        return steps
+
+    steps: List[dict] = []
+    tq = qn(name)
+    indexes = actual['indexes']
+    for tc in table_columns:
+        spec = column_spec(tc)
+        col = spec['name']
+        cq = qn(col)
+        current = actual['columns'].get(col)
+        auto_pk = spec['primary_key'] and (spec['auto_increment'] or spec['data_type'] in ('serial', 'bigserial'))
+
+        if current is None:
+            parts = [f"ALTER TABLE {tq} ADD COLUMN {cq} {sql_type(spec)}"]
+            default = sql_default(spec)
+            if default is not None:
+                parts.append(f"DEFAULT {default}")
+            if not spec['nullable']:
+                parts.append('NOT NULL')
+            safe = spec['nullable'] or default is not None
+            steps.append(_step(name, col, 'add_column', ' '.join(parts), safe=safe,
+                               detail='' if safe else 'NOT NULL sin valor por defecto: falla si la tabla tiene filas'))
+            if spec['references']:
+                fk_name = (spec['fk_name'] or _identifier('fk', name, col))[:63]
+                steps.append(_step(
+                    name, col, 'add_foreign_key',
+                    f"ALTER TABLE {tq} ADD CONSTRAINT {qn(fk_name)} FOREIGN KEY ({cq}) "
+                    f"REFERENCES {qn(spec['references'])} ({qn('id')}) ON DELETE {spec['on_delete']} "
+                    "DEFERRABLE INITIALLY DEFERRED",
+                    detail=f"→ {spec['references']}",
+                ))
+        else:
+            if not auto_pk:
+                change = _type_step(name, spec, current)
+                if change:
+                    steps.append(_step(name, col, 'alter_type', change['sql'], safe=change['safe'],
+                                       detail=change['detail']))
+            if spec['nullable'] and not current['nullable'] and not spec['primary_key']:
+                steps.append(_step(name, col, 'drop_not_null', f"ALTER TABLE {tq} ALTER COLUMN {cq} DROP NOT NULL"))
+            elif not spec['nullable'] and current['nullable']:
+                steps.append(_step(name, col, 'set_not_null', f"ALTER TABLE {tq} ALTER COLUMN {cq} SET NOT NULL",
+                                   safe=False, detail='recorre la tabla; falla si hay NULLs'))
+            if not auto_pk and not current['identity']:
+                expected_default = sql_default(spec)
+                if _normalize_default(expected_default) != _normalize_default(current['default']):
+                    if expected_default is None:
+                        sql = f"ALTER TABLE {tq} ALTER COLUMN {cq} DROP DEFAULT"
+                    else:
+                        sql = f"ALTER TABLE {tq} ALTER COLUMN {cq} SET DEFAULT {expected_default}"
+                    steps.append(_step(name, col, 'default', sql, detail=f"{current['default']} → {expected_default}"))
+
+        if spec['unique'] and not any(i['unique'] and i['columns'] == [col] for i in indexes):
+            steps.append(_step(
+                name, col, 'add_unique',
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {qn(_identifier(name, col, 'key'))} ON {tq} ({cq})",
+                concurrent=True, detail='falla si hay duplicados',
+            ))
+        elif (spec['index'] or spec['references']) and not spec['unique'] and not spec['primary_key'] \
+                and not any(i['columns'][:1] == [col] for i in indexes):
+            steps.append(_step(
+                name, col, 'add_index',
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {qn(_identifier(name, col, 'idx'))} ON {tq} ({cq})",
+                concurrent=True,
+            ))
+
+    known = {tc.column.name for tc in table_columns}
+    for col in sorted(set(actual['columns']) - known):
+        steps.append(_step(name, col, 'extra_column', None, detail='existe en la BD pero no en el catálogo (no se elimina)'))
+    return steps
+
+
+def build_plan(application, tables: Optional[Sequence[DbTable]] = None) -> dict:
+    """Plan de cambios (dry-run) para las tablas asignadas a la app (o las indicadas).
+
+    Como en `compile_tables`, las FK van al final: así pueden referenciar tablas
+    del mismo plan que se crean después en el orden por nombre.
+    """
+    if tables is None:
+        tables = [a.table for a in application.assigned_tables.select_related('table').order_by('table__name')]
+    tables = list(tables)
+    table_columns = load_table_columns(tables)
+    actual = fetch_schema(application, [t.name for t in tables])
+    steps: List[dict] = []
+    errors: List[str] = []
+    for table in tables:
+        try:
+            steps += diff_table(table, table_columns[table.id], actual.get(table.name))
+        except DdlError as exc:
+            errors.append(f"{table.name}: {exc}")
+    foreign_keys = [s for s in steps if s['action'] == 'add_foreign_key']
+    steps = [s for s in steps if s['action'] != 'add_foreign_key'] + foreign_keys
+    return {'tables': tables, 'table_columns': table_columns, 'actual': actual, 'steps': steps, 'errors': errors}
+
+
+def _actual_type(current: dict) -> Optional[dict]:
+    """Atributos de DbColumn equivalentes al tipo real de la columna (None si no tiene equivalente)."""
+    data_type = current['data_type']
+    if data_type == 'character varying':
+        return {'data_type': 'varchar', 'length': current['length']}
+    if data_type == 'numeric':
+        scale = current['scale'] or 0
+        precision = current['precision'] - scale if current['precision'] else None
+        return {'data_type': 'numeric', 'numeric_precision': precision, 'numeric_scale': scale}
+    if data_type.startswith('timestamp'):
+        return {'data_type': 'timestamp'}
+    if data_type in ('integer', 'bigint', 'smallint', 'text', 'boolean', 'date'):
+        return {'data_type': data_type}
+    return None
+
+
+def _applied_columns(plan: dict, applied: Sequence[dict]) -> Dict[int, list]:
+    """Columnas del catálogo tal como quedaron en la BD tras aplicar solo `applied`.
+
+    Para cada paso del plan que no se aplicó (no seguro omitido, índice
+    CONCURRENTLY pendiente o fallido) se conserva el valor real de la BD: tipo,
+    nulabilidad, unique, db_index; una columna cuyo ADD COLUMN no se aplicó no
+    forma parte del modelo. Así models.py y django_migrations describen la BD.
+    """
+    applied_ids = {id(s) for s in applied}
+    pending: Dict[tuple, set] = {}
+    for step in plan['steps']:
+        if step['sql'] and id(step) not in applied_ids and step['column']:
+            pending.setdefault((step['table'], step['column']), set()).add(step['action'])
+
+    result: Dict[int, list] = {}
+    for table in plan['tables']:
+        columns = []
+        for tc in plan['table_columns'][table.id]:
+            actions = pending.get((table.name, tc.column.name))
+            if not actions:
+                columns.append(tc)
+                continue
+            if 'add_column' in actions:
+                continue
+            tc = copy.copy(tc)
+            column = copy.copy(tc.column)
+            if 'alter_type' in actions:
+                current = plan['actual'][table.name]['columns'][column.name]
+                for attr, value in (_actual_type(current) or {}).items():
+                    setattr(column, attr, value)
+            tc.column = column
+            if 'set_not_null' in actions:
+                tc.is_nullable = True
+            if 'add_unique' in actions:
+                tc.is_unique = False
+            if 'add_index' in actions:
+                tc.is_index = False
+            columns.append(tc)
+        result[table.id] = columns
+    return result
+
+
+def _state_operations(steps: Sequence[dict], tables_by_name: Dict[str, DbTable], table_columns: Dict[int, list]) -> List[str]:
+    """Operaciones de migración equivalentes a los pasos aplicados."""
+    operations: List[str] = []
+    created = {s['table'] for s in steps if s['action'] == 'create_table'}
+    seen = set()
+    for step in steps:
+        table = tables_by_name[step['table']]
+        if step['action'] == 'create_table':
+            operations.append(create_model_operation(table, table_columns[table.id]))
+            continue
+        key = (step['table'], step['column'])
+        # Las FK de una tabla nueva ya están en su CreateModel
+        if key in seen or step['column'] is None or step['table'] in created:
+            continue
+        seen.add(key)
+        tc = next((tc for tc in table_columns[table.id] if tc.column.name == step['column']), None)
+        if tc is None:
+            continue
+        name, expr = field_expression(tc)
+        op = 'AddField' if step['action'] in ('add_column', 'add_foreign_key') else 'AlterField'
+        operations.append(
+            f"        migrations.{op}(\n"
+            f"            model_name={table.name.title().lower()!r},\n"
+            f"            name={name!r},\n"
+            f"            field={expr},\n"
+            "        ),"
+        )
+    return operations
+
+
+def apply_plan(application, plan: dict, include_unsafe: bool = False) -> dict:
+    """Aplica los pasos del plan. Los no seguros solo con `include_unsafe`.
+
+    El estado registrado (models.py y migraciones) se calcula solo con los pasos
+    que efectivamente se ejecutaron: primero los transaccionales, y en una
+    segunda migración los índices CONCURRENTLY que se crearon.
+    """
+    from . import target_db
+
+    selected = [s for s in plan['steps'] if s['sql'] and (s['safe'] or include_unsafe)]
+    # Sin su ADD COLUMN no hay columna a la que agregar FK o índice
+    missing = {(s['table'], s['column']) for s in plan['steps']
+               if s['action'] == 'add_column' and not any(s is r for r in selected)}
+    runnable = [s for s in selected if s['action'] == 'add_column' or (s['table'], s['column']) not in missing]
+    skipped = [s for s in plan['steps'] if s['sql'] and not any(s is r for r in runnable)]
+    transactional = [s for s in runnable if not s['concurrent']]
+    concurrent = [s for s in runnable if s['concurrent']]
+    result = {'success': True, 'applied': 0, 'skipped_unsafe': len(skipped), 'errors': [], 'migration': None}
+    if not runnable:
+        return result
+
+    tables_by_name = {t.name: t for t in plan['tables']}
+    if transactional:
+        # Los índices CONCURRENTLY aún no existen: su estado se registra solo si se crean
+        table_columns = _applied_columns(plan, transactional)
+        touched = [tables_by_name[n] for n in dict.fromkeys(s['table'] for s in transactional)]
+        operations = _state_operations(transactional, tables_by_name, table_columns)
+        statements = []
+        for step in transactional:
+            statements += [sql for sql in step['sql'].split(';\n') if sql.strip()]
+        outcome = execute_with_state(application, statements, operations, touched, table_columns,
+                                     label='sapy_alter')
+        if not outcome['success']:
+            return {**result, 'success': False, 'errors': [outcome['error']]}
+        result['migration'] = outcome['migration']
+        result['applied'] = len(transactional)
+
+    # CREATE INDEX CONCURRENTLY no puede ir dentro de una transacción
+    created = []
+    if concurrent:
+        with target_db.connection(application) as conn:
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    for step in concurrent:
+                        try:
+                            cur.execute(step['sql'])
+                            result['applied'] += 1
+                            created.append(step)
+                        except Exception as exc:
+                            result['errors'].append(f"{step['table']}.{step['column']}: {exc}")
+                            # Un CREATE INDEX CONCURRENTLY fallido deja un índice INVALID
+                            m = _INDEX_NAME_RE.search(step['sql'])
+                            if m:
+                                try:
+                                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {m.group(1)}")
+                                except Exception:
+                                    pass
+            finally:
+                conn.autocommit = False
+
+    if created:
+        table_columns = _applied_columns(plan, transactional + created)
+        touched = [tables_by_name[n] for n in dict.fromkeys(s['table'] for s in created)]
+        operations = _state_operations(created, tables_by_name, table_columns)
+        outcome = execute_with_state(application, [], operations, touched, table_columns, label='sapy_index')
+        if outcome['success']:
+            result['migration'] = ', '.join(filter(None, [result['migration'], outcome['migration']]))
+        else:
+            result['errors'].append(f"Índices creados pero sin registrar su estado: {outcome['error']}")
+    result['success'] = not result['errors']
+    return result
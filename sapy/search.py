@@ -0,0 +1,77 @@
+"""
+Búsqueda incremental para los endpoints de autocompletado (tablas, menús, páginas, íconos).
+
+En PostgreSQL las columnas buscadas tienen índices GIN con gin_trgm_ops
+(migración 0035), que sirven tanto al filtro `columna ILIKE '%q%'`
+(`ILikeContains`) como al ordenamiento por similitud de trigramas. icontains
+no sirve ahí: Django lo compila como UPPER(columna::text) LIKE UPPER(...), una
+expresión que el índice sobre la columna no cubre. En otros motores, o si la
+extensión pg_trgm no está instalada, se filtra con icontains y se priorizan
+las coincidencias por prefijo.
+"""
+from typing import Sequence
+
+from django.db import connection, models
+from django.db.models.functions import Greatest
+
+_trgm_available = None
+
+
+class ILikeContains(models.Lookup):
+    """`columna ILIKE '%valor%'` sobre la columna sin transformar (solo PostgreSQL).
+
+    No se registra en los campos: se usa como expresión solo en `ranked_search`,
+    `ILikeContains(F('campo'), q)`.
+    """
+    lookup_name = 'ilike_contains'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        rhs_params = [f'%{connection.ops.prep_for_like_query(p)}%' for p in rhs_params]
+        return f'{lhs} ILIKE {rhs}', [*lhs_params, *rhs_params]
+
+
+def trigram_available() -> bool:
+    """Indica si la BD actual tiene pg_trgm (se consulta una vez por proceso)."""
+    global _trgm_available
+    if connection.vendor != 'postgresql':
+        return False
+    if _trgm_available is None:
+        with connection.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trgm_available = cur.fetchone() is not None
+    return _trgm_available
+
+
+def ranked_search(queryset: models.QuerySet, q: str, fields: Sequence[str], order_by: Sequence[str]) -> models.QuerySet:
+    """Filtra `queryset` por `q` en `fields` y ordena los resultados por relevancia.
+
+    Sin `q` solo aplica `order_by`.
+    """
+    if not q:
+        return queryset.order_by(*order_by)
+    trigram = trigram_available()
+    condition = models.Q()
+    for field in fields:
+        if trigram:
+            condition |= models.Q(ILikeContains(models.F(field), q))
+        else:
+            condition |= models.Q(**{f'{field}__icontains': q})
+    queryset = queryset.filter(condition)
+
+    if trigram:
+        from django.contrib.postgres.search import TrigramSimilarity
+        similarities = [TrigramSimilarity(field, q) for field in fields]
+        rank = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+        return queryset.annotate(search_rank=rank).order_by('-search_rank', *order_by)
+
+    prefix = models.Q()
+    for field in fields:
+        prefix |= models.Q(**{f'{field}__istartswith': q})
+    rank = models.Case(
+        models.When(prefix, then=models.Value(1)),
+        default=models.Value(0),
+        output_field=models.IntegerField(),
+    )
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', *order_by)
@@ -62,6 +62,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Solo activa con SAPY_SQL_INSTRUMENTATION=true (si no, Django la retira de la cadena)
+    'sapy.middleware.SqlInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -162,3 +164,44 @@ LOGOUT_REDIRECT_URL = '/'
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
 CSRF_TRUSTED_ORIGINS = [ f'https://{h}' for h in ALLOWED_HOSTS if '.' in h ]
+
+# Long-polling de estado de aplicaciones (segundos). La vista es async: servir con
+# ASGI (uvicorn) para que los long-polls abiertos no ocupen workers
+SAPY_STATUS_WAIT_TIMEOUT = int(os.environ.get('SAPY_STATUS_WAIT_TIMEOUT', '15'))
+SAPY_STATUS_DB_POLL_INTERVAL = float(os.environ.get('SAPY_STATUS_DB_POLL_INTERVAL', '5'))
+
+# Cola de trabajos (manage.py run_jobs)
+SAPY_JOBS_CONCURRENCY = int(os.environ.get('SAPY_JOBS_CONCURRENCY', '2'))
+SAPY_JOBS_POLL_INTERVAL = float(os.environ.get('SAPY_JOBS_POLL_INTERVAL', '2'))
+SAPY_JOBS_HEARTBEAT_INTERVAL = int(os.environ.get('SAPY_JOBS_HEARTBEAT_INTERVAL', '15'))
+SAPY_JOBS_STALE_AFTER = int(os.environ.get('SAPY_JOBS_STALE_AFTER', '120'))
+# Límites del planificador: trabajos simultáneos por tipo (todos los workers)
+# y por concurrency_key (host de BD en instalaciones). Además, cada aplicación
+# ejecuta un solo trabajo a la vez (sapy.jobs._saturated).
+SAPY_JOBS_KIND_LIMITS = {
+    'install': int(os.environ.get('SAPY_INSTALL_CONCURRENCY', '4')),
+}
+SAPY_JOBS_PER_KEY_LIMIT = int(os.environ.get('SAPY_JOBS_PER_HOST_LIMIT', '2'))
+
+# Navegador de datos de tablas físicas (filas por página)
+SAPY_DATA_PAGE_SIZE = int(os.environ.get('SAPY_DATA_PAGE_SIZE', '100'))
+SAPY_DATA_MAX_PAGE_SIZE = int(os.environ.get('SAPY_DATA_MAX_PAGE_SIZE', '500'))
+
+# Catálogo de columnas BD (columnas por página)
+SAPY_COLUMN_PAGE_SIZE = int(os.environ.get('SAPY_COLUMN_PAGE_SIZE', '50'))
+
+# Índice en memoria del catálogo de íconos: cada cuántos segundos se revisa su revisión
+SAPY_ICON_INDEX_CHECK_INTERVAL = float(os.environ.get('SAPY_ICON_INDEX_CHECK_INTERVAL', '5'))
+
+# Generación de modelos en apps destino: 'ddl' (sapy.ddl, DDL directo en una transacción)
+# o 'migrate' (makemigrations/migrate en el venv de la app)
+SAPY_MODEL_ENGINE = os.environ.get('SAPY_MODEL_ENGINE', 'ddl')
+# Pool de conexiones a las BD de las apps destino (sapy.target_db)
+SAPY_TARGET_DB_POOL_MAX = int(os.environ.get('SAPY_TARGET_DB_POOL_MAX', '4'))
+SAPY_TARGET_DB_CONNECT_TIMEOUT = int(os.environ.get('SAPY_TARGET_DB_CONNECT_TIMEOUT', '5'))
+
+# Instrumentación SQL por request (sapy.middleware): header Server-Timing, log de requests
+# lentos (ms) y de consultas repetidas (posible N+1, veces con el mismo SQL normalizado)
+SAPY_SQL_INSTRUMENTATION = os.environ.get('SAPY_SQL_INSTRUMENTATION', 'False').lower() == 'true'
+SAPY_SQL_SLOW_REQUEST_MS = float(os.environ.get('SAPY_SQL_SLOW_REQUEST_MS', '500'))
+SAPY_SQL_NPLUS1_THRESHOLD = int(os.environ.get('SAPY_SQL_NPLUS1_THRESHOLD', '10'))
@@ -0,0 +1,140 @@
+"""
+Canal de estado de aplicaciones para long-polling.
+
+`application_status_wait` es una vista async: cada long-poll abierto espera
+aquí en un asyncio.Event, sin ocupar un hilo ni un worker, hasta que alguien
+notifique un cambio para la aplicación o venza el intervalo de respaldo, tras
+el cual la vista vuelve a consultar la BD.
+
+Los cambios suelen hacerse en otro proceso (el worker de `run_jobs`), así que
+en PostgreSQL cada guardado de Application emite `pg_notify('sapy_app_status',
+id)` dentro de su transacción (se entrega al confirmarla) y cada proceso web
+mantiene un único hilo con LISTEN que despierta a sus long-polls. En otros
+motores solo hay notificación en proceso y el respaldo por consulta.
+"""
+import asyncio
+import logging
+import select
+import threading
+import time
+
+from django.db import connection, connections
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'sapy_app_status'
+_RECONNECT_DELAY = 5.0
+
+_lock = threading.Lock()
+_versions: dict[int, int] = {}
+_waiters: dict[int, list] = {}  # id de aplicación -> [(loop, asyncio.Event)]
+_listener_lock = threading.Lock()
+_listener = None
+_listening = threading.Event()
+
+
+def current_version(application_id: int) -> int:
+    """Versión local de notificaciones de la aplicación (0 si nunca se notificó)."""
+    with _lock:
+        return _versions.get(application_id, 0)
+
+
+def _wake(waiters) -> None:
+    for loop, event in waiters:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass  # el loop del long-poll ya terminó
+
+
+def notify_status(application_id: int) -> None:
+    """Despierta a todos los que esperan cambios de la aplicación en este proceso."""
+    with _lock:
+        _versions[application_id] = _versions.get(application_id, 0) + 1
+        waiters = list(_waiters.get(application_id, ()))
+    _wake(waiters)
+
+
+def publish_status(application_id: int) -> None:
+    """Anuncia el cambio a los demás procesos; PostgreSQL lo entrega al confirmar la transacción."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_notify(%s, %s)", [CHANNEL, str(application_id)])
+
+
+async def wait_for_notification(application_id: int, known_version: int, timeout: float) -> int:
+    """Espera hasta `timeout` segundos a que la versión cambie respecto de `known_version`.
+
+    Retorna la versión vigente al despertar (igual a `known_version` si venció el tiempo).
+    """
+    entry = (asyncio.get_running_loop(), asyncio.Event())
+    with _lock:
+        version = _versions.get(application_id, 0)
+        if version != known_version:
+            return version
+        _waiters.setdefault(application_id, []).append(entry)
+    try:
+        await asyncio.wait_for(entry[1].wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        with _lock:
+            waiters = _waiters.get(application_id, [])
+            if entry in waiters:
+                waiters.remove(entry)
+            if not waiters:
+                _waiters.pop(application_id, None)
+    return current_version(application_id)
+
+
+def _set_listening(active: bool) -> None:
+    # Al perder o recuperar la escucha todos los long-polls vuelven a consultar la BD
+    if active:
+        _listening.set()
+    else:
+        _listening.clear()
+    with _lock:
+        waiters = [entry for entries in _waiters.values() for entry in entries]
+    _wake(waiters)
+
+
+def ensure_listener() -> bool:
+    """Arranca (una vez por proceso) el hilo LISTEN. Indica si está escuchando."""
+    global _listener
+    if connection.vendor != 'postgresql':
+        return False
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=_listen_forever, name='sapy-status-listener', daemon=True)
+            _listener.start()
+    return _listening.is_set()
+
+
+def _listen_forever() -> None:
+    while True:
+        wrapper = connections.create_connection('default')
+        try:
+            wrapper.ensure_connection()
+            conn = wrapper.connection
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN {CHANNEL}')
+            _set_listening(True)
+            while True:
+                if select.select([conn], [], [], 60)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        payload = conn.notifies.pop(0).payload
+                        if payload.isdigit():
+                            notify_status(int(payload))
+        except Exception as exc:
+            logger.warning("Se perdió la escucha de %s, reintentando: %s", CHANNEL, exc)
+        finally:
+            # Mientras no escuchamos, las notificaciones perdidas las cubre el respaldo por consulta
+            _set_listening(False)
+            try:
+                wrapper.close()
+            except Exception:
+                pass
+        time.sleep(_RECONNECT_DELAY)
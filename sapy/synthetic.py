@@ -0,0 +1,139 @@
+"""
+Catálogo sintético para medir consultas (planes de ejecución y benchmarks).
+
+`seed_catalog` crea con `bulk_create` (sin signals) tablas, columnas, páginas,
+menús, íconos y una aplicación con su historial de despliegues, todo con un
+prefijo propio. Está pensado para usarse dentro de una transacción que luego
+se revierte: los comandos `check_query_plans` y `bench` lo hacen así.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import (
+    Application, ApplicationMenu, DbColumn, DbTable, DbTableColumn, DeploymentLog, Icon,
+    Menu, MenuPage, Page, PageTable,
+)
+
+# Tipos que se reparten entre las columnas del catálogo sintético
+_COLUMN_TYPES = (
+    ('varchar', {'length': 150}),
+    ('integer', {}),
+    ('numeric', {'numeric_precision': 12, 'numeric_scale': 2}),
+    ('text', {}),
+    ('boolean', {}),
+    ('date', {}),
+    ('timestamp', {}),
+)
+
+BATCH_SIZE = 1000
+
+
+def seed_catalog(prefix: str = 'syn', tables: int = 200, columns: int = 10, pages: int = None,
+                 menus: int = 20, icons: int = 2000, logs: int = 1000) -> dict:
+    """Crea un catálogo sintético y devuelve ids de muestra para las consultas a medir.
+
+    Cada tabla recibe `columns` columnas de un conjunto compartido más una FK
+    id_<tabla anterior>; `pages` (por defecto, una por tabla) se reparten en
+    `menus` menús, cada página en hasta tres de ellos.
+    """
+    pages = tables if pages is None else min(pages, tables)
+    now = timezone.now()
+
+    pool_size = max(columns * 4, 20)
+    pool = [
+        DbColumn(name=f'{prefix}_c{j:04d}', data_type=_COLUMN_TYPES[j % len(_COLUMN_TYPES)][0],
+                 **_COLUMN_TYPES[j % len(_COLUMN_TYPES)][1])
+        for j in range(pool_size)
+    ]
+    db_tables = [
+        DbTable(name=f'{prefix}_t{i:05d}', alias=f'{prefix} {i}', description=f'Tabla sintética {i}')
+        for i in range(tables)
+    ]
+    fk_columns = [DbColumn(name=f'id_{t.name}', data_type='integer') for t in db_tables[:-1]]
+    DbColumn.objects.bulk_create(pool + fk_columns, batch_size=BATCH_SIZE)
+    DbTable.objects.bulk_create(db_tables, batch_size=BATCH_SIZE)
+
+    table_columns = []
+    for i, table in enumerate(db_tables):
+        for j in range(min(columns, pool_size)):
+            table_columns.append(DbTableColumn(
+                table=table, column=pool[(i * 7 + j) % pool_size], position=(j + 1) * 10,
+            ))
+        if i:
+            table_columns.append(DbTableColumn(
+                table=table, column=fk_columns[i - 1], position=(columns + 1) * 10, references_table=db_tables[i - 1],
+            ))
+    DbTableColumn.objects.bulk_create(table_columns, batch_size=BATCH_SIZE)
+
+    page_objs = [
+        Page(slug=f'{prefix}-p{i:05d}', title=f'Página {i}', source_type=Page.SourceType.DBTABLE,
+             db_table=db_tables[i], route_path=f'/{prefix}-p{i:05d}/')
+        for i in range(pages)
+    ]
+    Page.objects.bulk_create(page_objs, batch_size=BATCH_SIZE)
+    PageTable.objects.bulk_create(
+        [PageTable(page=p, db_table=p.db_table, title=p.title, default_sort={'by': 'id', 'dir': 'desc'})
+         for p in page_objs],
+        batch_size=BATCH_SIZE,
+    )
+
+    menu_objs = [Menu(name=f'{prefix}-m{k:03d}', title=f'Menú {k}') for k in range(menus)]
+    Menu.objects.bulk_create(menu_objs, batch_size=BATCH_SIZE)
+    menu_pages = []
+    if menu_objs:
+        for i, page in enumerate(page_objs):
+            for offset in range(min(3, len(menu_objs))):
+                menu_pages.append(MenuPage(
+                    menu=menu_objs[(i + offset) % len(menu_objs)], page=page,
+                    section=f'Sección {i % 4}', order_index=i,
+                ))
+    MenuPage.objects.bulk_create(menu_pages, batch_size=BATCH_SIZE)
+
+    application = Application(
+        name=f'{prefix}_app', display_name=f'{prefix} app', domain=f'{prefix}.example.test',
+        db_name=f'{prefix}_db', db_user=prefix, db_password=prefix,
+    )
+    Application.objects.bulk_create([application])
+    ApplicationMenu.objects.bulk_create([ApplicationMenu(application=application, menu=m) for m in menu_objs])
+
+    log_objs = [
+        DeploymentLog(
+            application=application, log_type='install', command='install', success=True,
+            completed_at=now - timedelta(minutes=n),
+        )
+        for n in range(logs)
+    ]
+    log_objs.append(DeploymentLog(application=application, log_type='install', command='install'))
+    DeploymentLog.objects.bulk_create(log_objs, batch_size=BATCH_SIZE)
+
+    Icon.objects.bulk_create(
+        [
+            Icon(
+                provider=Icon.Provider.BOOTSTRAP if k % 2 else Icon.Provider.FONTAWESOME,
+                class_name=f'{prefix}-i{k:06d}', label=f'icono {k}', name=f'{prefix}{k}',
+                tags=f'sintetico grupo{k % 50}', activo=bool(k % 10),
+            )
+            for k in range(icons)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    middle = db_tables[len(db_tables) // 2] if db_tables else None
+    return {
+        'prefix': prefix,
+        'table': middle,
+        'page': page_objs[len(page_objs) // 2] if page_objs else None,
+        'menu': menu_objs[0] if menu_objs else None,
+        'application': application,
+        'counts': {
+            'tables': len(db_tables),
+            'columns': len(pool) + len(fk_columns),
+            'table_columns': len(table_columns),
+            'pages': len(page_objs),
+            'menus': len(menu_objs),
+            'menu_pages': len(menu_pages),
+            'icons': icons,
+            'logs': len(log_objs),
+        },
+    }
@@ -0,0 +1,383 @@
+"""
+Entrada/salida masiva de tablas físicas administradas con DbTable.
+
+La exportación usa COPY (SELECT ...) TO STDOUT en PostgreSQL: un hilo productor
+escribe los bloques CSV en una cola acotada y la respuesta HTTP los consume, de
+modo que la memoria es constante sin importar el tamaño de la tabla.
+
+La importación valida cada fila contra DbColumn.data_type, vuelca las válidas
+con COPY FROM STDIN a una tabla temporal y las fusiona con
+INSERT ... ON CONFLICT en una sola transacción.
+"""
+import csv
+import io
+import queue
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Iterator, List, Optional, Sequence
+
+from django.db import connection, connections, transaction
+
+# Bloques en vuelo entre el hilo de COPY y la respuesta (memoria acotada)
+EXPORT_QUEUE_SIZE = 64
+EXPORT_COPY_CHUNK = 64 * 1024
+
+_DONE = object()
+
+
+class _ExportCancelled(Exception):
+    """El cliente cerró la conexión: abortar el COPY."""
+
+
+def stream_csv_export(select_sql: str, params: Sequence = ()) -> Iterator[bytes]:
+    """Genera el CSV (con encabezado) del SELECT dado, en bloques."""
+    if connection.vendor != 'postgresql':
+        yield from _stream_csv_rows(select_sql, params)
+        return
+
+    chunks: queue.Queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+    cancelled = threading.Event()
+
+    def put(item) -> None:
+        while True:
+            if cancelled.is_set():
+                raise _ExportCancelled()
+            try:
+                chunks.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    class _Sink:
+        def write(self, data):
+            put(data if isinstance(data, bytes) else data.encode('utf-8'))
+            return len(data)
+
+    def produce() -> None:
+        # Conexión propia del hilo (las conexiones de Django son por hilo)
+        conn = connections['default']
+        try:
+            conn.ensure_connection()
+            with conn.connection.cursor() as cur:
+                sql = cur.mogrify(select_sql, list(params)).decode('utf-8')
+                cur.copy_expert(
+                    f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)",
+                    _Sink(),
+                    size=EXPORT_COPY_CHUNK,
+                )
+            put(_DONE)
+        except _ExportCancelled:
+            pass
+        except Exception as exc:
+            try:
+                put(exc)
+            except _ExportCancelled:
+                pass
+        finally:
+            conn.close()
+
+    worker = threading.Thread(target=produce, name='sapy-csv-export', daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Al cerrar la respuesta (fin normal o desconexión) se libera el productor
+        cancelled.set()
+
+
+def _stream_csv_rows(select_sql: str, params: Sequence, batch: int = 2000) -> Iterator[bytes]:
+    """Alternativa sin COPY para motores distintos de PostgreSQL."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    with connection.cursor() as cur:
+        cur.execute(select_sql, list(params))
+        writer.writerow([d[0] for d in cur.description])
+        while True:
+            rows: List[tuple] = cur.fetchmany(batch)
+            if not rows:
+                break
+            writer.writerows(rows)
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode('utf-8')
+
+
+# ==== Importación ====
+
+IMPORT_MAX_REJECTED_DETAIL = 50
+_INT_RANGES = {
+    'smallint': (-2 ** 15, 2 ** 15 - 1),
+    'integer': (-2 ** 31, 2 ** 31 - 1),
+    'serial': (1, 2 ** 31 - 1),
+    'bigint': (-2 ** 63, 2 ** 63 - 1),
+    'bigserial': (1, 2 ** 63 - 1),
+}
+_TRUE = {'1', 'true', 't', 'si', 'sí', 'yes', 'y'}
+_FALSE = {'0', 'false', 'f', 'no', 'n'}
+
+
+class TableImportError(Exception):
+    """Error que invalida el archivo completo (encabezados, motor, etc.)."""
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '') + '"'
+
+
+def validate_value(meta: dict, raw: str) -> Optional[str]:
+    """Valida y normaliza un valor CSV según el tipo de la columna.
+
+    Devuelve el texto a cargar (None = NULL) o lanza ValueError con el motivo.
+    """
+    value = raw.strip()
+    if value == '':
+        if not meta['nullable']:
+            raise ValueError('valor requerido')
+        return None
+    dt = meta['data_type']
+    if dt in _INT_RANGES:
+        try:
+            n = int(value)
+        except ValueError:
+            raise ValueError(f'"{value}" no es entero')
+        lo, hi = _INT_RANGES[dt]
+        if not lo <= n <= hi:
+            raise ValueError(f'{n} fuera de rango para {dt}')
+        return str(n)
+    if dt == 'numeric':
+        try:
+            d = Decimal(value)
+        except InvalidOperation:
+            raise ValueError(f'"{value}" no es numérico')
+        if not d.is_finite():
+            raise ValueError(f'"{value}" no es numérico')
+        precision, scale = meta.get('numeric_precision'), meta.get('numeric_scale') or 0
+        if precision and abs(d) >= Decimal(10) ** (precision - scale):
+            raise ValueError(f'{value} excede NUMERIC({precision},{scale})')
+        return str(d)
+    if dt == 'boolean':
+        v = value.lower()
+        if v in _TRUE:
+            return 'true'
+        if v in _FALSE:
+            return 'false'
+        raise ValueError(f'"{value}" no es booleano')
+    if dt == 'date':
+        try:
+            return date.fromisoformat(value).isoformat()
+        except ValueError:
+            raise ValueError(f'"{value}" no es fecha (AAAA-MM-DD)')
+    if dt == 'timestamp':
+        try:
+            return datetime.fromisoformat(value).isoformat()
+        except ValueError:
+            raise ValueError(f'"{value}" no es fecha/hora ISO')
+    if dt == 'varchar' and meta.get('length') and len(value) > meta['length']:
+        raise ValueError(f'excede {meta["length"]} caracteres')
+    return value
+
+
+def import_csv(schema: str, table_name: str, columns: List[dict], fileobj) -> dict:
+    """Carga un CSV (con encabezado) en la tabla física.
+
+    `columns`: metadatos por columna (name, data_type, nullable, unique, length,
+    numeric_precision, numeric_scale). Devuelve conteos de insertadas,
+    actualizadas, sin cambios y rechazadas, más el detalle de rechazos.
+    """
+    if connection.vendor != 'postgresql':
+        raise TableImportError('La carga masiva requiere PostgreSQL (COPY).')
+
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise TableImportError('El archivo está vacío.')
+    by_name = {c['name']: c for c in columns}
+    mapped: List[dict] = []
+    ignored: List[str] = []
+    for h in header:
+        name = h.strip().lower()
+        if name in by_name and by_name[name] not in mapped:
+            mapped.append(by_name[name])
+        else:
+            ignored.append(h)
+    if not mapped:
+        raise TableImportError('Ningún encabezado coincide con las columnas de la tabla.')
+    positions = [[h.strip().lower() for h in header].index(c['name']) for c in mapped]
+
+    # Llave de conflicto: id si viene en el archivo; si no, la primera columna única mapeada
+    key = next((c['name'] for c in mapped if c['name'] == 'id'), None) \
+        or next((c['name'] for c in mapped if c['unique']), None)
+    key_index = [c['name'] for c in mapped].index(key) if key else None
+
+    rejected: List[dict] = []
+    rejected_count = 0
+    staged = 0
+    seen_keys = set()
+    # Las filas válidas se normalizan a un CSV temporal (en disco si crece)
+    stage_buf = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode='w+', newline='', encoding='utf-8')
+    writer = csv.writer(stage_buf)
+    for line_no, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            if len(row) < len(header):
+                raise ValueError(f'se esperaban {len(header)} columnas, llegaron {len(row)}')
+            values = []
+            for meta, pos in zip(mapped, positions):
+                try:
+                    values.append(validate_value(meta, row[pos]))
+                except ValueError as e:
+                    raise ValueError(f'{meta["name"]}: {e}')
+            if key_index is not None:
+                k = values[key_index]
+                if k is None:
+                    raise ValueError(f'{key}: valor requerido')
+                if k in seen_keys:
+                    raise ValueError(f'{key}={k} repetido en el archivo')
+                seen_keys.add(k)
+        except ValueError as e:
+            rejected_count += 1
+            if len(rejected) < IMPORT_MAX_REJECTED_DETAIL:
+                rejected.append({'line': line_no, 'error': str(e)})
+            continue
+        # En COPY csv el campo vacío sin comillas es NULL (los vacíos ya se normalizaron a None)
+        writer.writerow(['' if v is None else v for v in values])
+        staged += 1
+    stage_buf.seek(0)
+
+    result = {
+        'inserted': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'rejected': rejected_count,
+        'rejected_detail': rejected,
+        'ignored_headers': ignored,
+        'key': key,
+    }
+    if not staged:
+        stage_buf.close()
+        return result
+
+    cols_sql = ', '.join(_quote(c['name']) for c in mapped)
+    target = f'{_quote(schema)}.{_quote(table_name)}'
+    updatable = [c['name'] for c in mapped if c['name'] != key]
+    if key is None:
+        conflict_sql = ''
+    elif updatable:
+        conflict_sql = (
+            f' ON CONFLICT ({_quote(key)}) DO UPDATE SET '
+            + ', '.join(f'{_quote(n)} = EXCLUDED.{_quote(n)}' for n in updatable)
+        )
+    else:
+        conflict_sql = f' ON CONFLICT ({_quote(key)}) DO NOTHING'
+
+    with stage_buf, transaction.atomic():
+        with connection.cursor() as cur:
+            cur.execute(
+                f'CREATE TEMP TABLE "_sapy_import_stage" ON COMMIT DROP AS '
+                f'SELECT {cols_sql} FROM {target} WITH NO DATA'
+            )
+            cur.copy_expert(
+                f'COPY "_sapy_import_stage" ({cols_sql}) FROM STDIN WITH (FORMAT csv)',
+                stage_buf,
+            )
+            cur.execute(
+                f'INSERT INTO {target} ({cols_sql}) SELECT {cols_sql} FROM "_sapy_import_stage"'
+                f'{conflict_sql} RETURNING (xmax = 0)'
+            )
+            flags = [r[0] for r in cur.fetchall()]
+            if key == 'id':
+                # Ajustar la secuencia si se cargaron ids explícitos
+                cur.execute(
+                    f"SELECT setval(seq::regclass, GREATEST((SELECT COALESCE(MAX(\"id\"), 1) FROM {target}), 1)) "
+                    f"FROM pg_get_serial_sequence(%s, 'id') AS seq WHERE seq IS NOT NULL",
+                    [f'{_quote(schema)}.{_quote(table_name)}'],
+                )
+    result['inserted'] = sum(1 for f in flags if f)
+    result['updated'] = len(flags) - result['inserted']
+    result['unchanged'] = staged - len(flags)
+    return result
+
+
+
+# ==== Columna 'activo' ====
+
+# Cache por proceso: table_id -> (instante, data_type de 'activo' o None).
+# Las señales de DbTableColumn/DbColumn la invalidan en este proceso; el TTL
+# acota lo que pueda quedar desfasado en otros workers.
+ACTIVO_CACHE_TTL = 60
+_activo_cache: dict = {}
+_activo_lock = threading.Lock()
+
+BULK_ACTIVO_MAX_IDS = 10000
+_INT_TYPES = ('integer', 'smallint', 'bigint')
+
+
+def activo_column_type(table) -> Optional[str]:
+    """data_type de la columna 'activo' de la tabla, o None si no la tiene."""
+    now = time.monotonic()
+    with _activo_lock:
+        hit = _activo_cache.get(table.pk)
+        if hit and now - hit[0] < ACTIVO_CACHE_TTL:
+            return hit[1]
+    data_type = (
+        table.table_columns.filter(column__name='activo')
+        .values_list('column__data_type', flat=True)
+        .first()
+    )
+    with _activo_lock:
+        _activo_cache[table.pk] = (now, data_type)
+    return data_type
+
+
+def invalidate_activo_cache(table_id: Optional[int] = None) -> None:
+    with _activo_lock:
+        if table_id is None:
+            _activo_cache.clear()
+        else:
+            _activo_cache.pop(table_id, None)
+
+
+def activo_value(data_type: str, state: bool):
+    """Valor a escribir en 'activo' según su tipo físico (boolean o entero 0/1)."""
+    if data_type in _INT_TYPES:
+        return 1 if state else 0
+    return bool(state)
+
+
+def toggle_activo_sql(data_type: str) -> str:
+    """Expresión que invierte 'activo' según su tipo físico."""
+    if data_type in _INT_TYPES:
+        return 'CASE WHEN "activo" = 0 THEN 1 ELSE 0 END'
+    return 'NOT "activo"'
+
+
+def bulk_set_activo(schema: str, table_name: str, data_type: str, ids: Sequence[int], state: bool) -> List[int]:
+    """Fija 'activo' para todas las filas indicadas en una sola sentencia; devuelve los ids afectados."""
+    target = f'{_quote(schema)}.{_quote(table_name)}'
+    with connection.cursor() as cur:
+        if connection.vendor == 'postgresql':
+            cur.execute(
+                f'UPDATE {target} SET "activo" = %s WHERE "id" = ANY(%s) RETURNING "id"',
+                [activo_value(data_type, state), list(ids)],
+            )
+        else:
+            placeholders = ', '.join(['%s'] * len(ids))
+            cur.execute(
+                f'UPDATE {target} SET "activo" = %s WHERE "id" IN ({placeholders}) RETURNING "id"',
+                [activo_value(data_type, state), *ids],
+            )
+        return [r[0] for r in cur.fetchall()]
@@ -0,0 +1,113 @@
+"""
+Conexiones agrupadas (pool) a las bases de datos de las aplicaciones destino.
+
+Los parámetros salen de `_get_app_db_connect_params` (DATABASE_URL del .env de
+la app y, en su defecto, los campos de Application). Se mantiene un
+ThreadedConnectionPool por destino, así que verificar catálogos, aplicar DDL o
+contar registros no paga un handshake (TLS incluido) en cada llamada.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[tuple, object] = {}
+_pools_lock = threading.Lock()
+
+
+class TargetDbError(Exception):
+    """No fue posible conectar con la BD de la aplicación destino."""
+
+
+def _pool_key(params: dict) -> tuple:
+    return (
+        params.get('host'), params.get('port'), params.get('database'),
+        params.get('user'), params.get('sslmode'),
+    )
+
+
+def _get_pool(application):
+    """Pool para la primera configuración de conexión de la app que funcione."""
+    from psycopg2.pool import ThreadedConnectionPool
+    from .views import _get_app_db_connect_params
+
+    errors = []
+    for params in _get_app_db_connect_params(application):
+        key = _pool_key(params)
+        pool = _pools.get(key)
+        if pool is not None and not pool.closed:
+            return pool
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is not None and not pool.closed:
+                return pool
+            try:
+                pool = ThreadedConnectionPool(
+                    0,
+                    settings.SAPY_TARGET_DB_POOL_MAX,
+                    connect_timeout=settings.SAPY_TARGET_DB_CONNECT_TIMEOUT,
+                    application_name='sapy',
+                    **params,
+                )
+                # Validar credenciales/host ahora para poder probar la siguiente configuración
+                conn = pool.getconn()
+                pool.putconn(conn)
+            except Exception as exc:
+                errors.append(f"{params.get('host')}:{params.get('port')} → {exc}")
+                continue
+            _pools[key] = pool
+            return pool
+    raise TargetDbError('; '.join(errors) or 'Sin parámetros de conexión')
+
+
+@contextmanager
+def connection(application) -> Iterator:
+    """Conexión del pool de la app. Al salir se hace rollback de lo no confirmado y se devuelve al pool."""
+    pool = _get_pool(application)
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except Exception:
+        broken = bool(conn.closed)
+        raise
+    finally:
+        try:
+            if not conn.closed:
+                conn.rollback()
+        except Exception:
+            broken = True
+        pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+def existing_tables(application, table_names, schema: str = 'public') -> Optional[set]:
+    """Nombres de `table_names` que existen en la BD de la app (una consulta). None si no hay conexión."""
+    names = list(table_names)
+    if not names:
+        return set()
+    try:
+        with connection(application) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT table_name FROM information_schema.tables "
+                    "WHERE table_schema = %s AND table_name = ANY(%s)",
+                    (schema, names),
+                )
+                return {row[0] for row in cur.fetchall()}
+    except Exception as exc:
+        logger.warning("No se pudo consultar el catálogo de %s: %s", application.name, exc)
+        return None
+
+
+def close_all() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            try:
+                pool.closeall()
+            except Exception:
+                pass
+        _pools.clear()
@@ -0,0 +1,132 @@
+"""
+Derivación en lote de los componentes de UI (UiColumn, UiField, FormQuestion)
+de las columnas del catálogo.
+
+Las tablas referenciadas por columnas id_<tabla> se precargan con una sola
+consulta y las filas se calculan en memoria con `_derive_ui_defaults` /
+`_derive_form_question_defaults`, para luego insertarse con `bulk_create`.
+Así, completar la UI de miles de columnas cuesta unas pocas consultas en
+lugar de varias por columna.
+
+El signal post_save de DbColumn usa `create_or_defer`: dentro de un bloque
+`deferred()` las columnas nuevas se acumulan y se procesan en un solo lote
+cuando la transacción se confirma.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterable, List
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .models import (
+    DbColumn, DbTable, FormQuestion, UiColumn, UiField,
+    _derive_form_question_defaults, _derive_ui_defaults,
+)
+
+# Columnas técnicas de auditoría y control: no llevan UI
+TECHNICAL_COLUMNS = ('created_at', 'updated_at', 'id_auth_user')
+
+BATCH_SIZE = 1000
+
+_state = threading.local()
+
+
+def _missing_components(queryset) -> list:
+    """Columnas de `queryset` a las que les falta algún componente, con banderas has_*."""
+    return list(
+        queryset.exclude(name__in=TECHNICAL_COLUMNS)
+        .annotate(
+            has_ui_column=Exists(UiColumn.objects.filter(db_column=OuterRef('pk'))),
+            has_ui_field=Exists(UiField.objects.filter(db_column=OuterRef('pk'))),
+            has_form_question=Exists(FormQuestion.objects.filter(db_column=OuterRef('pk'))),
+        )
+        # Las PK no llevan UiField
+        .exclude(Q(has_ui_field=True) | Q(is_primary_key=True), has_ui_column=True, has_form_question=True)
+        .order_by('pk')
+    )
+
+
+def fk_table_map(columns: Iterable[DbColumn]) -> dict:
+    """nombre -> DbTable de las tablas referenciadas por columnas id_<tabla> (una consulta)."""
+    ref_names = {c.name[3:] for c in columns if c.name.startswith('id_') and len(c.name) > 3}
+    if not ref_names:
+        return {}
+    return {t.name: t for t in DbTable.objects.filter(name__in=ref_names)}
+
+
+def build_rows(columns: Iterable[DbColumn]) -> tuple:
+    """Calcula en memoria (ui_columns, ui_fields, form_questions) faltantes para `columns`.
+
+    Las columnas deben traer las anotaciones de `_missing_components`; las
+    tablas FK se resuelven con una sola consulta.
+    """
+    columns = list(columns)
+    fk_tables = fk_table_map(columns)
+
+    ui_columns: List[UiColumn] = []
+    ui_fields: List[UiField] = []
+    form_questions: List[FormQuestion] = []
+    for column in columns:
+        if not (column.has_ui_column and column.has_ui_field):
+            col_defaults, field_defaults = _derive_ui_defaults(column, fk_tables=fk_tables)
+            if not column.has_ui_column:
+                ui_columns.append(UiColumn(db_column=column, **col_defaults))
+            # Las PK no llevan campo de formulario (field_defaults es None)
+            if not column.has_ui_field and field_defaults is not None:
+                ui_fields.append(UiField(db_column=column, **field_defaults))
+        if not column.has_form_question:
+            question_defaults = _derive_form_question_defaults(column, fk_tables=fk_tables)
+            form_questions.append(FormQuestion(db_column=column, **question_defaults))
+    return ui_columns, ui_fields, form_questions
+
+
+def create_ui_defaults(queryset=None) -> dict:
+    """Crea en lote los componentes de UI faltantes de `queryset` (por defecto, todo el catálogo).
+
+    Retorna {'columns', 'ui_columns', 'ui_fields', 'form_questions'} con lo procesado/creado.
+    """
+    if queryset is None:
+        queryset = DbColumn.objects.all()
+    columns = _missing_components(queryset)
+    ui_columns, ui_fields, form_questions = build_rows(columns)
+    with transaction.atomic():
+        UiColumn.objects.bulk_create(ui_columns, batch_size=BATCH_SIZE)
+        UiField.objects.bulk_create(ui_fields, batch_size=BATCH_SIZE)
+        FormQuestion.objects.bulk_create(form_questions, batch_size=BATCH_SIZE)
+    return {
+        'columns': len(columns),
+        'ui_columns': len(ui_columns),
+        'ui_fields': len(ui_fields),
+        'form_questions': len(form_questions),
+    }
+
+
+@contextmanager
+def deferred():
+    """Acumula las columnas creadas dentro del bloque y genera su UI en un lote al confirmar.
+
+    Si no hay transacción abierta el lote se procesa al salir del bloque. Los
+    bloques anidados se suman al lote del bloque externo.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+    _state.pending = []
+    try:
+        yield
+    finally:
+        pending, _state.pending = _state.pending, None
+    if pending:
+        transaction.on_commit(lambda: create_ui_defaults(DbColumn.objects.filter(pk__in=pending)))
+
+
+def create_or_defer(column: DbColumn) -> None:
+    """Punto de entrada del signal post_save: difiere si hay un bloque `deferred()` activo."""
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending.append(column.pk)
+        return
+    if column.name in TECHNICAL_COLUMNS:
+        return
+    create_ui_defaults(DbColumn.objects.filter(pk=column.pk))
@@ -4,7 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse
 from django.http import JsonResponse, HttpResponse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, condition
 from django.conf import settings
 import sys, os, subprocess
 import os
@@ -12,13 +12,13 @@ import shutil
 from django.db import transaction
 from django.utils import timezone
 from .models import Application, ApplicationDependency, DeploymentLog, DbTable, DbColumn, DbTableColumn, Page, PageTable, Modal, PageModal, ModalForm, Menu, MenuPage, ApplicationMenu, Role, RoleMenu, Icon, _derive_form_question_defaults
+from .search import ranked_search
 from .forms import ApplicationForm, QuickDeployForm, DbTableForm, DbColumnForm, DbTableColumnForm
 from django.db import models
 import subprocess
 import os
 import json
 from datetime import datetime
-import threading
 import re
 
 # ==== FUNCIONES DE CONVERSIÓN DE TIPOS ====
@@ -262,39 +262,14 @@ def update_ui_components_for_column(column):
         # No fallar la edición por problemas de UI
 
 def migrate_existing_columns_to_ui():
-    """Migra todas las columnas existentes que no tengan componentes de UI."""
-    from .models import DbColumn, UiColumn, UiField, FormQuestion
-    
-    migrated_count = 0
-    error_count = 0
-    
-    # Obtener todas las columnas que no tengan componentes de UI
-    columns_without_ui = DbColumn.objects.filter(
-        ~models.Q(ui_column__isnull=False) |
-        ~models.Q(ui_field__isnull=False) |
-        ~models.Q(form_question__isnull=False)
-    ).distinct()
-    
-    print(f"DEBUG: Encontradas {columns_without_ui.count()} columnas sin componentes de UI")
-    
-    for column in columns_without_ui:
-        try:
-            # Crear componentes de UI
-            ui_created = create_ui_components_for_column(column)
-            if ui_created:
-                migrated_count += 1
-                print(f"DEBUG: Migrada columna {column.name}")
-            else:
-                error_count += 1
-                print(f"ERROR: No se pudo migrar columna {column.name}")
-        except Exception as e:
-            error_count += 1
-            print(f"ERROR: Excepción migrando columna {column.name}: {e}")
+    """Crea en lote los componentes de UI faltantes de todas las columnas (ver sapy.ui_defaults)."""
+    from .ui_defaults import create_ui_defaults
     
+    result = create_ui_defaults()
     return {
-        'total_columns': columns_without_ui.count(),
-        'migrated_count': migrated_count,
-        'error_count': error_count
+        'total_columns': result['columns'],
+        'migrated_count': result['columns'],
+        'error_count': 0,
     }
 
 @login_required
@@ -449,7 +424,6 @@ def application_delete(request, pk):
 
 def _run_install_job(application_id: int, deployment_log_id: int) -> None:
     """Ejecuta el script de instalación en background y actualiza estado/logs."""
-    from django.db import connection
     try:
         application = Application.objects.get(pk=application_id)
         deployment_log = DeploymentLog.objects.get(pk=deployment_log_id)
@@ -503,40 +477,21 @@ def _run_install_job(application_id: int, deployment_log_id: int) -> None:
             deployment_log.save()
         except Exception:
             pass
-    finally:
-        # Cerrar conexiones en hilo background
-        try:
-            connection.close()
-        except Exception:
-            pass
 
 
+@login_required
 @require_POST
 def application_deploy(request, pk):
-    """Inicia instalación en background usando el script no interactivo."""
+    """Encola la instalación usando el script no interactivo (la ejecuta `run_jobs`)."""
+    from .deploy import has_active_install, start_deploy
     application = get_object_or_404(Application, pk=pk)
 
-    # Permitir reinstalación si ya está desplegada
-    if application.status == 'deployed':
-        # Cambiar estado a 'reinstalling' para indicar reinstalación
-        application.status = 'reinstalling'
-        application.save()
-    else:
-        # Instalación normal
-        application.status = 'installing'
-        application.save()
-
-    # Crear log y marcar estado
-    deployment_log = DeploymentLog.objects.create(
-        application=application,
-        log_type='install',
-        command='/srv/scripts/install_application_noninteractive.sh',
-        executed_by=request.user
-    )
+    if has_active_install(application):
+        messages.warning(request, 'Ya hay una instalación en curso para esta aplicación.')
+        return redirect('sapy:application_detail', pk=application.pk)
 
-    # Lanzar en background
-    t = threading.Thread(target=_run_install_job, args=(application.pk, deployment_log.pk), daemon=True)
-    t.start()
+    # Encolar; el worker persistente lo tomará según los límites de concurrencia
+    start_deploy(application, request.user)
 
     if application.status == 'reinstalling':
         messages.info(request, 'Reinstalación iniciada. La aplicación se actualizará con el nuevo menú dinámico.')
@@ -546,6 +501,43 @@ def application_deploy(request, pk):
     return redirect('sapy:application_detail', pk=application.pk)
 
 
+@login_required
+def application_bulk_deploy(request):
+    """Despliegue masivo: encola la (re)instalación de varias aplicaciones en un lote."""
+    from .deploy import schedule_bulk_deploy
+    if request.method == 'POST':
+        ids = [int(i) for i in request.POST.getlist('applications') if str(i).isdigit()]
+        applications = list(Application.objects.filter(pk__in=ids).exclude(status='deleted'))
+        if not applications:
+            messages.warning(request, 'Selecciona al menos una aplicación.')
+            return redirect('sapy:application_bulk_deploy')
+        batch, skipped = schedule_bulk_deploy(applications, request.user)
+        queued = len(applications) - len(skipped)
+        messages.info(request, f'{queued} instalación(es) encoladas en el lote {batch}.')
+        if skipped:
+            messages.warning(request, 'Omitidas por tener una instalación en curso: ' + ', '.join(a.name for a in skipped))
+        return redirect(f"{reverse('sapy:application_bulk_deploy')}?batch={batch}")
+
+    context = {
+        'title': 'Despliegue masivo',
+        'applications': Application.objects.exclude(status='deleted').order_by('name'),
+        'batch': (request.GET.get('batch') or '').strip(),
+        'install_limit': settings.SAPY_JOBS_KIND_LIMITS.get('install'),
+        'per_host_limit': settings.SAPY_JOBS_PER_KEY_LIMIT,
+    }
+    return render(request, 'application_bulk_deploy.html', context)
+
+
+@login_required
+def application_bulk_deploy_progress(request, batch):
+    """Progreso agregado (JSON) de un lote de despliegue masivo."""
+    from .deploy import batch_progress
+    data = batch_progress(batch)
+    if not data['total']:
+        return JsonResponse({'success': False, 'message': 'Lote no encontrado'}, status=404)
+    return JsonResponse({'success': True, **data})
+
+
 @login_required
 def deployment_log_detail(request, pk, log_pk):
     """Ver detalles de un log de deployment"""
@@ -586,6 +578,59 @@ def application_status(request, pk):
     })
 
 
+@login_required
+async def application_status_wait(request, pk):
+    """Long-poll de estado: responde en cuanto `status` o `updated_at` difieren de lo que
+    conoce el cliente (?status=&since=), o al vencer el timeout con changed=false.
+
+    Es una vista async: servida por ASGI (ver README), un long-poll abierto no
+    ocupa un worker ni un hilo mientras espera en status_channel, al que
+    despiertan los NOTIFY de cualquier proceso (p.ej. el worker de jobs). Si el
+    proceso no está escuchando (otro motor, conexión caída) consulta la BD cada
+    SAPY_STATUS_DB_POLL_INTERVAL segundos como respaldo.
+    """
+    from . import status_channel
+    import time
+
+    known_status = request.GET.get('status') or ''
+    known_since = request.GET.get('since') or ''
+    max_timeout = getattr(settings, 'SAPY_STATUS_WAIT_TIMEOUT', 15)
+    try:
+        timeout = max(1.0, min(float(request.GET.get('timeout') or max_timeout), max_timeout))
+    except ValueError:
+        timeout = max_timeout
+    poll_interval = getattr(settings, 'SAPY_STATUS_DB_POLL_INTERVAL', 5.0)
+
+    async def snapshot():
+        return await Application.objects.filter(pk=pk).values('status', 'updated_at', 'installed_at').afirst()
+
+    def has_changed(snap):
+        return snap['status'] != known_status or snap['updated_at'].isoformat() != known_since
+
+    version = status_channel.current_version(pk)
+    snap = await snapshot()
+    if snap is None:
+        return JsonResponse({'success': False, 'message': 'Aplicación no encontrada'}, status=404)
+    deadline = time.monotonic() + timeout
+    changed = has_changed(snap)
+    while not changed:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        wait = remaining if status_channel.ensure_listener() else min(remaining, poll_interval)
+        version = await status_channel.wait_for_notification(pk, version, wait)
+        snap = await snapshot() or snap
+        changed = has_changed(snap)
+
+    return JsonResponse({
+        'changed': changed,
+        'status': snap['status'],
+        'status_display': dict(Application.STATUS_CHOICES).get(snap['status'], snap['status']),
+        'last_updated': snap['updated_at'].isoformat(),
+        'installed': snap['installed_at'].isoformat() if snap['installed_at'] else None,
+    })
+
+
 @login_required
 def test_script_connection(request):
     """Probar que el script de instalación existe y es ejecutable"""
@@ -637,7 +682,11 @@ def db_table_create(request):
             table = form.save()
             
             # Asignar columnas automáticamente según el tipo de tabla
-            table.assign_default_columns()
+            # (la UI de las columnas nuevas se genera en un solo lote)
+            from .models import deferred_revisions
+            from .ui_defaults import deferred
+            with deferred(), deferred_revisions():
+                table.assign_default_columns()
             
             messages.success(request, f'Tabla "{table.name}" creada exitosamente con columnas básicas asignadas automáticamente.')
             return redirect('sapy:db_table_detail', pk=table.pk)
@@ -742,15 +791,14 @@ def db_column_create(request, pk):
                     messages.error(request, f'La columna "{copy_from_name}" ya está asignada a esta tabla.')
                     return redirect('sapy:db_table_detail', pk=table.pk)
                 
-                # Crear relación tabla-columna usando DbTableColumn
-                from django.db import models
-                max_pos = table.table_columns.aggregate(max_pos=models.Max('position'))['max_pos'] or 0
+                # Crear relación tabla-columna usando DbTableColumn (al final, con hueco)
+                from .ordering import next_position
                 
                 # Crear la relación tabla-columna
                 table_column = DbTableColumn.objects.create(
                     table=table,
                     column=source_column,
-                    position=max_pos + 1,
+                    position=next_position(table.table_columns, 'position'),
                     # Copiar propiedades específicas de la implementación
                     is_nullable=source_column.is_nullable,
                     is_unique=source_column.is_unique,
@@ -783,14 +831,13 @@ def db_column_create(request, pk):
                 else:
                     print(f"WARNING: No se pudieron crear componentes UI para {new_col.name}")
                 
-                # Crear la relación tabla-columna
-                from django.db import models
-                max_pos = table.table_columns.aggregate(max_pos=models.Max('position'))['max_pos'] or 0
+                # Crear la relación tabla-columna (al final, con hueco)
+                from .ordering import next_position
                 
                 table_column = DbTableColumn.objects.create(
                     table=table,
                     column=new_col,
-                    position=max_pos + 1,
+                    position=next_position(table.table_columns, 'position'),
                     # Copiar propiedades específicas de la implementación
                     is_nullable=new_col.is_nullable,
                     is_unique=new_col.is_unique,
@@ -842,28 +889,150 @@ def _quote_ident(identifier: str) -> str:
     return '"' + identifier.replace('"', '') + '"'
 
 
+_TEXT_TYPES = ('varchar', 'text')
+
+
+def _data_browser_columns(table: DbTable) -> list[dict]:
+    """Metadatos de columnas para el navegador de datos (una sola consulta)."""
+    cols = []
+    table_columns = (
+        table.table_columns
+        .select_related('column', 'column__ui_column')
+        .order_by('position', 'column__name')
+    )
+    for tc in table_columns:
+        c = tc.column
+        label = c.name.replace('_', ' ').capitalize()
+        is_toggle = False
+        ui = getattr(c, 'ui_column', None) if hasattr(c, 'ui_column') else None
+        if ui is not None:
+            label = ui.label or label
+            is_toggle = ui.is_toggle
+        is_pk = bool(tc.get_effective_value('is_primary_key')) or c.name == 'id'
+        indexed = is_pk or bool(tc.get_effective_value('is_unique')) or bool(tc.get_effective_value('is_index'))
+        nullable = bool(tc.get_effective_value('is_nullable')) and not is_pk
+        cols.append({
+            'name': c.name,
+            'label': label,
+            'is_toggle': is_toggle,
+            'visible': ui.visible_in_lists if ui is not None else True,
+            'data_type': c.data_type,
+            'length': c.length,
+            'numeric_precision': c.numeric_precision,
+            'numeric_scale': c.numeric_scale,
+            'nullable': nullable,
+            'unique': indexed and (is_pk or bool(tc.get_effective_value('is_unique'))),
+            # Solo columnas indexadas: el filtro/orden debe poder usar índice.
+            # El orden además exige NOT NULL para que la comparación por tupla sea total.
+            'filterable': indexed,
+            'sortable': indexed and not nullable,
+        })
+    return cols
+
+
+def _encode_cursor(values: list) -> str:
+    import base64
+    from django.core.serializers.json import DjangoJSONEncoder
+    raw = json.dumps(values, cls=DjangoJSONEncoder).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> list | None:
+    import base64
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+        return values if isinstance(values, list) and len(values) == 2 else None
+    except Exception:
+        return None
+
+
+def _coerce_filter_value(data_type: str, value: str):
+    """Convierte el texto del filtro al tipo de la columna; ValueError si no aplica."""
+    if data_type in ('integer', 'bigint', 'smallint', 'serial', 'bigserial'):
+        return int(value)
+    if data_type == 'numeric':
+        from decimal import Decimal, InvalidOperation
+        try:
+            return Decimal(value)
+        except InvalidOperation:
+            raise ValueError(value)
+    if data_type == 'boolean':
+        v = value.strip().lower()
+        if v in ('1', 'true', 't', 'si', 'sí', 'activo'):
+            return True
+        if v in ('0', 'false', 'f', 'no', 'inactivo'):
+            return False
+        raise ValueError(value)
+    return value
+
+
+def _data_browser_filter(by_name: dict, filter_col: str, filter_value: str) -> tuple[list, list, str | None]:
+    """Filtro simple sobre una columna indexada (prefijo para texto, igualdad para el resto).
+
+    Devuelve (condiciones WHERE, parámetros, mensaje de error o None).
+    """
+    where: list[str] = []
+    params: list = []
+    if not (filter_col and filter_value):
+        return where, params, None
+    meta = by_name.get(filter_col)
+    if not meta or not meta['filterable']:
+        return where, params, f'La columna "{filter_col}" no admite filtro (no está indexada).'
+    if meta['data_type'] in _TEXT_TYPES:
+        # LIKE 'x%' solo usa un índice btree con collation C o text_pattern_ops; el rango
+        # x <= col < x || U+FFFF sí lo usa con cualquier collation, y el LIKE deja exacto el prefijo
+        col = _quote_ident(filter_col)
+        escaped = filter_value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        where.append(f"{col} >= %s AND {col} < %s AND {col} LIKE %s ESCAPE '\\'")
+        params += [filter_value, filter_value + '\uffff', escaped + '%']
+        return where, params, None
+    try:
+        params.append(_coerce_filter_value(meta['data_type'], filter_value))
+    except (ValueError, TypeError):
+        return where, params, f'Valor inválido para "{filter_col}".'
+    where.append(f"{_quote_ident(filter_col)} = %s")
+    return where, params, None
+
+
 @login_required
 def db_table_data_list(request, pk):
-    """Lista datos de una tabla física (hasta 100 filas) con soporte de toggle en 'activo'."""
+    """Navega los datos de una tabla física con paginación keyset, orden y filtro por columnas indexadas.
+
+    GET: sort, dir=asc|desc, page_size, after (cursor), f (columna), q (valor), format=json
+    """
     table = get_object_or_404(DbTable, pk=pk)
     schema = table.schema_name or 'public'
-    # Columnas visibles según UI (si existen); fallback a columnas BD
-    db_columns = list(table.columns.all().order_by('position', 'name'))
-    # Intentar usar metadatos UI si existen
-    visible_cols = []
-    has_activo = False
-    for c in db_columns:
-        label = c.name.replace('_', ' ').capitalize()
-        is_toggle = False
-        try:
-            if hasattr(c, 'ui_column'):
-                label = c.ui_column.label or label
-                is_toggle = getattr(c.ui_column, 'is_toggle', False)
-        except Exception:
-            pass
-        if c.name == 'activo':
-            has_activo = True
-        visible_cols.append({'name': c.name, 'label': label, 'is_toggle': is_toggle})
+    visible_cols = _data_browser_columns(table)
+    by_name = {c['name']: c for c in visible_cols}
+    has_activo = 'activo' in by_name
+    want_json = request.GET.get('format') == 'json'
+
+    # Orden: columna indexada NOT NULL + id como desempate
+    sort = request.GET.get('sort') or 'id'
+    if sort != 'id' and not (sort in by_name and by_name[sort]['sortable']):
+        sort = 'id'
+    direction = 'asc' if request.GET.get('dir') == 'asc' else 'desc'
+    try:
+        page_size = int(request.GET.get('page_size') or settings.SAPY_DATA_PAGE_SIZE)
+    except ValueError:
+        page_size = settings.SAPY_DATA_PAGE_SIZE
+    page_size = max(1, min(page_size, settings.SAPY_DATA_MAX_PAGE_SIZE))
+
+    filter_col = request.GET.get('f') or ''
+    filter_value = (request.GET.get('q') or '').strip()
+    where, params, error = _data_browser_filter(by_name, filter_col, filter_value)
+
+    # Cursor: (valor de orden, id) de la última fila de la página anterior
+    cursor = _decode_cursor(request.GET.get('after') or '')
+    op = '>' if direction == 'asc' else '<'
+    if cursor is not None:
+        if sort == 'id':
+            where.append(f'"id" {op} %s')
+            params.append(cursor[1])
+        else:
+            where.append(f'({_quote_ident(sort)}, "id") {op} (%s, %s)')
+            params.extend(cursor)
 
     # Build SELECT: siempre incluir id para acciones
     select_list = ['"id"']
@@ -871,37 +1040,144 @@ def db_table_data_list(request, pk):
         _quote_ident(c['name']) for c in visible_cols if c['name'] != 'id'
     ]
     select_cols = ', '.join(select_list)
-    sql = f'SELECT {select_cols} FROM {_quote_ident(schema)}.{_quote_ident(table.name)} ORDER BY "id" DESC LIMIT 100'
+    order_sql = f'"id" {direction.upper()}'
+    if sort != 'id':
+        order_sql = f'{_quote_ident(sort)} {direction.upper()}, ' + order_sql
+    where_sql = (' WHERE ' + ' AND '.join(where)) if where else ''
+    sql = (
+        f'SELECT {select_cols} FROM {_quote_ident(schema)}.{_quote_ident(table.name)}'
+        f'{where_sql} ORDER BY {order_sql} LIMIT %s'
+    )
     rows = []
-    try:
-        from django.db import connection
-        with connection.cursor() as cur:
-            cur.execute(sql)
-            colnames = [desc[0] for desc in cur.description]
-            for r in cur.fetchall():
-                rows.append(dict(zip(colnames, r)))
-    except Exception as exc:
-        messages.error(request, f'No se pudieron leer los datos: {exc}')
-        rows = []
+    if error is None:
+        try:
+            from django.db import connection
+            with connection.cursor() as cur:
+                cur.execute(sql, params + [page_size + 1])
+                colnames = [desc[0] for desc in cur.description]
+                for r in cur.fetchall():
+                    rows.append(dict(zip(colnames, r)))
+        except Exception as exc:
+            error = f'No se pudieron leer los datos: {exc}'
+            rows = []
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = _encode_cursor([rows[-1].get(sort), rows[-1]['id']]) if has_more else None
+
+    if want_json:
+        from django.template.loader import render_to_string
+        if error:
+            return JsonResponse({'success': False, 'message': error}, status=400)
+        html = render_to_string('partials/db_table_data_rows.html', {
+            'columns': visible_cols, 'rows': rows, 'has_activo': has_activo,
+        }, request=request)
+        return JsonResponse({
+            'success': True,
+            'rows': rows,
+            'html': html,
+            'has_more': has_more,
+            'next_cursor': next_cursor,
+        })
 
+    if error:
+        messages.error(request, error)
     return render(request, 'db_table_data_list.html', {
         'table': table,
         'columns': visible_cols,
         'rows': rows,
         'has_activo': has_activo,
+        'sort': sort,
+        'direction': direction,
+        'page_size': page_size,
+        'page_size_options': sorted({n for n in (25, 50, 100, 250, 500) if n <= settings.SAPY_DATA_MAX_PAGE_SIZE} | {page_size}),
+        'filter_col': filter_col,
+        'filter_value': filter_value,
+        'filter_columns': [c for c in visible_cols if c['filterable']],
+        'has_more': has_more,
+        'next_cursor': next_cursor,
         'title': f"Datos: {table.name}",
     })
 
 
+@login_required
+def db_table_data_export(request, pk):
+    """Exporta a CSV (streaming vía COPY) las columnas visibles de la tabla física.
+
+    Respeta el filtro del navegador de datos (f, q).
+    """
+    from django.http import StreamingHttpResponse
+    from .table_io import stream_csv_export
+    table = get_object_or_404(DbTable, pk=pk)
+    schema = table.schema_name or 'public'
+    cols = _data_browser_columns(table)
+    by_name = {c['name']: c for c in cols}
+    where, params, error = _data_browser_filter(
+        by_name, request.GET.get('f') or '', (request.GET.get('q') or '').strip()
+    )
+    if error:
+        messages.error(request, error)
+        return redirect('sapy:db_table_data_list', pk=table.pk)
+    visible = [c['name'] for c in cols if c['visible']] or ['id']
+    where_sql = (' WHERE ' + ' AND '.join(where)) if where else ''
+    sql = (
+        f"SELECT {', '.join(_quote_ident(n) for n in visible)} "
+        f"FROM {_quote_ident(schema)}.{_quote_ident(table.name)}{where_sql} ORDER BY \"id\""
+    )
+    response = StreamingHttpResponse(stream_csv_export(sql, params), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{table.name}.csv"'
+    return response
+
+
+@login_required
+@require_POST
+def db_table_data_import(request, pk):
+    """Carga masiva de un CSV (encabezados = nombres de columna) con COPY + INSERT ... ON CONFLICT."""
+    from .table_io import TableImportError, import_csv
+    table = get_object_or_404(DbTable, pk=pk)
+    upload = request.FILES.get('csv_file')
+    if not upload:
+        messages.error(request, 'Selecciona un archivo CSV.')
+        return redirect('sapy:db_table_data_list', pk=table.pk)
+    try:
+        result = import_csv(table.schema_name or 'public', table.name, _data_browser_columns(table), upload.file)
+    except TableImportError as exc:
+        messages.error(request, str(exc))
+        return redirect('sapy:db_table_data_list', pk=table.pk)
+    except Exception as exc:
+        messages.error(request, f'No se pudo cargar el archivo: {exc}')
+        return redirect('sapy:db_table_data_list', pk=table.pk)
+
+    summary = (
+        f"Carga completada: {result['inserted']} insertadas, {result['updated']} actualizadas, "
+        f"{result['rejected']} rechazadas"
+    )
+    if result['unchanged']:
+        summary += f", {result['unchanged']} sin cambios"
+    messages.success(request, summary + '.')
+    if result['ignored_headers']:
+        messages.warning(request, 'Encabezados ignorados: ' + ', '.join(result['ignored_headers']))
+    if result['rejected_detail']:
+        detail = '; '.join(f"línea {r['line']}: {r['error']}" for r in result['rejected_detail'][:10])
+        more = result['rejected'] - min(10, len(result['rejected_detail']))
+        messages.warning(request, f"Rechazos → {detail}" + (f' (y {more} más)' if more > 0 else ''))
+    return redirect('sapy:db_table_data_list', pk=table.pk)
+
+
 @login_required
 @require_POST
 def db_table_toggle_activo(request, pk, row_id: int):
+    from .table_io import activo_column_type, toggle_activo_sql
     table = get_object_or_404(DbTable, pk=pk)
-    # Verificar que exista columna 'activo'
-    if not table.columns.filter(name='activo').exists():
+    # Verificar que exista columna 'activo' (cacheado por tabla)
+    data_type = activo_column_type(table)
+    if not data_type:
         return JsonResponse({'success': False, 'message': 'La tabla no tiene columna activo'}, status=400)
     schema = table.schema_name or 'public'
-    sql = f'UPDATE {_quote_ident(schema)}.{_quote_ident(table.name)} SET "activo" = NOT "activo" WHERE "id" = %s RETURNING "activo"'
+    sql = (
+        f'UPDATE {_quote_ident(schema)}.{_quote_ident(table.name)} '
+        f'SET "activo" = {toggle_activo_sql(data_type)} WHERE "id" = %s RETURNING "activo"'
+    )
     try:
         from django.db import connection
         with connection.cursor() as cur:
@@ -914,6 +1190,38 @@ def db_table_toggle_activo(request, pk, row_id: int):
         return JsonResponse({'success': False, 'message': str(exc)}, status=500)
 
 
+@login_required
+@require_POST
+def db_table_bulk_activo(request, pk):
+    """Activa/desactiva muchas filas en una sola sentencia.
+    Body: {"ids": [int, ...], "activo": bool}
+    """
+    from .table_io import BULK_ACTIVO_MAX_IDS, activo_column_type, bulk_set_activo
+    table = get_object_or_404(DbTable, pk=pk)
+    try:
+        payload = json.loads(request.body.decode('utf-8'))
+    except Exception:
+        return JsonResponse({'success': False, 'message': 'JSON inválido'}, status=400)
+    ids = payload.get('ids')
+    state = payload.get('activo')
+    if not isinstance(ids, list) or not ids or not isinstance(state, bool):
+        return JsonResponse({'success': False, 'message': 'Formato inválido'}, status=400)
+    try:
+        ids = sorted({int(i) for i in ids})
+    except (TypeError, ValueError):
+        return JsonResponse({'success': False, 'message': 'IDs no válidos'}, status=400)
+    if len(ids) > BULK_ACTIVO_MAX_IDS:
+        return JsonResponse({'success': False, 'message': f'Máximo {BULK_ACTIVO_MAX_IDS} registros por operación'}, status=400)
+    data_type = activo_column_type(table)
+    if not data_type:
+        return JsonResponse({'success': False, 'message': 'La tabla no tiene columna activo'}, status=400)
+    try:
+        updated = bulk_set_activo(table.schema_name or 'public', table.name, data_type, ids, state)
+    except Exception as exc:
+        return JsonResponse({'success': False, 'message': str(exc)}, status=500)
+    return JsonResponse({'success': True, 'activo': state, 'updated': len(updated), 'ids': updated})
+
+
 @login_required
 @require_POST
 def db_table_reorder(request, pk):
@@ -926,21 +1234,14 @@ def db_table_reorder(request, pk):
         if not isinstance(order, list) or not order:
             return JsonResponse({'success': False, 'message': 'Formato inválido'}, status=400)
 
-        # Validar pertenencia
-        valid_ids = set(table.columns.filter(id__in=order).values_list('id', flat=True))
-        if len(valid_ids) != len(order):
+        # Solo se escriben las filas que cambian de lugar (posiciones con huecos)
+        from .ordering import reorder
+        try:
+            written = reorder(table.table_columns.all(), [int(i) for i in order], 'position')
+        except (TypeError, ValueError):
             return JsonResponse({'success': False, 'message': 'IDs no válidos'}, status=400)
 
-        # Actualizar posiciones 0..N según el orden recibido
-        with transaction.atomic():
-            update_objs: list[DbTableColumn] = []
-            for index, col_id in enumerate(order, start=1):
-                col = DbTableColumn.objects.get(id=col_id)
-                col.position = index
-                update_objs.append(col)
-            DbTableColumn.objects.bulk_update(update_objs, ['position'])
-
-        return JsonResponse({'success': True})
+        return JsonResponse({'success': True, 'updated': written})
     except Exception as exc:
         return JsonResponse({'success': False, 'message': str(exc)}, status=500)
 
@@ -953,7 +1254,10 @@ def db_table_delete(request, pk):
         return redirect('sapy:db_table_list')
     name = table.name
     try:
-        table.delete()
+        # El borrado en cascada de sus DbTableColumn sube la revisión una sola vez
+        from .models import deferred_revisions
+        with deferred_revisions():
+            table.delete()
         messages.success(request, f'Tabla BD "{name}" eliminada.')
     except Exception as exc:
         messages.error(request, f'No se pudo eliminar la tabla "{name}": {exc}')
@@ -962,144 +1266,127 @@ def db_table_delete(request, pk):
 
 # ==== Gestión de Todas las Columnas BD ====
 
+def _column_catalog_usage(page_columns):
+    """Tablas que usan cada columna de la página: {column_id: [nombres]} en una consulta."""
+    ids = [c.pk for c in page_columns]
+    usage = {pk: [] for pk in ids}
+    rows = (
+        DbTableColumn.objects.filter(column_id__in=ids)
+        .values_list('column_id', 'table__name')
+        .distinct()
+        .order_by('column_id', 'table__name')
+    )
+    for column_id, table_name in rows:
+        usage[column_id].append(table_name)
+    return usage
+
+
 @login_required
 def db_column_list(request):
     """Lista todas las columnas del sistema (en uso y disponibles)."""
-    try:
-        # Manejar eliminación de columnas si es POST
-        if request.method == 'POST':
-            action = request.POST.get('action')
-            column_id = request.POST.get('column_id')
-            
-            if action == 'delete' and column_id:
-                try:
-                    column = get_object_or_404(DbColumn, pk=column_id)
-                    column_name = column.name
-                    
-                    print(f"DEBUG: Intentando eliminar columna {column_name} (ID: {column_id})")
-                    
-                    # Verificar si está en uso
-                    implementations_count = column.table_implementations.count()
-                    print(f"DEBUG: Implementaciones encontradas: {implementations_count}")
-                    
-                    if implementations_count > 0:
-                        messages.error(request, f'No se puede eliminar la columna "{column_name}" porque está asignada a tablas.')
-                    else:
-                        # Verificar relaciones adicionales antes de eliminar
-                        can_delete = True
-                        delete_reason = ""
-                        
-                        try:
-                            # Verificar si hay UiColumn relacionada
-                            if hasattr(column, 'ui_column') and column.ui_column:
-                                can_delete = False
-                                delete_reason = "configuraciones de UI"
-                        except Exception as e:
-                            print(f"DEBUG: Error verificando UiColumn: {e}")
-                        
-                        try:
-                            # Verificar si hay UiField relacionada
-                            if hasattr(column, 'ui_field') and column.ui_field:
-                                can_delete = False
-                                delete_reason = "configuraciones de campo UI"
-                        except Exception as e:
-                            print(f"DEBUG: Error verificando UiField: {e}")
-                        
-                        try:
-                            # Verificar si hay FormQuestion relacionada
-                            if hasattr(column, 'form_question') and column.form_question:
-                                can_delete = False
-                                delete_reason = "preguntas de formulario"
-                        except Exception as e:
-                            print(f"DEBUG: Error verificando FormQuestion: {e}")
-                        
-                        if can_delete:
-                            # Eliminar la columna usando transacción
-                            with transaction.atomic():
-                                print(f"DEBUG: Iniciando transacción para eliminar columna {column_name}")
-                                
-                                # Verificar una vez más que no esté en uso
-                                final_check = DbTableColumn.objects.filter(column=column).count()
-                                if final_check > 0:
-                                    raise Exception(f"La columna {column_name} está siendo usada por {final_check} tablas")
-                                
-                                # Eliminar la columna
-                                print(f"DEBUG: Eliminando columna {column_name}")
-                                column.delete()
-                                print(f"DEBUG: Columna {column_name} eliminada exitosamente")
-                            
-                            messages.success(request, f'Columna "{column_name}" eliminada del sistema.')
-                        else:
-                            messages.error(request, f'No se puede eliminar la columna "{column_name}" porque tiene {delete_reason}.')
-                            
-                except Exception as exc:
-                    print(f"DEBUG: Error eliminando columna: {exc}")
-                    import traceback
-                    traceback.print_exc()
-                    messages.error(request, f'Error al eliminar la columna: {exc}')
-                
-                # Redirigir a la misma página para refrescar
-                return redirect('sapy:db_column_list')
-        
-        # Código original para GET
-        search_query = request.GET.get('search', '')
-        data_type_filter = request.GET.get('data_type', '')
-        
-        # Obtener todas las columnas globales
-        columns = DbColumn.objects.all().order_by('name')
-        
-        # Aplicar filtros
-        if search_query:
-            columns = columns.filter(name__icontains=search_query)
-        
-        if data_type_filter:
-            columns = columns.filter(data_type=data_type_filter)
-        
-        # Obtener filtros disponibles
-        data_types = DbColumn.objects.values_list('data_type', flat=True).distinct().order_by('data_type')
-        
-        # Para cada columna, obtener información de uso
-        columns_data = []
-        for column in columns:
+    # Manejar eliminación de columnas si es POST
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        column_id = request.POST.get('column_id')
+
+        if action == 'delete' and column_id:
             try:
-                # Obtener todas las tablas donde aparece esta columna
-                tables_using = list(DbTableColumn.objects.filter(column=column).values_list('table__name', flat=True).distinct())
-                total_usage = len(tables_using)
-                
-                # Crear objeto con información completa
-                column_info = {
-                    'name': column.name,
-                    'data_type': column.data_type,
-                    'total_usage': total_usage,
-                    'tables_using': tables_using,
-                    'first_instance': column,
-                    'can_delete': total_usage == 0,  # Solo se puede eliminar si no está en uso
-                    'is_in_use': total_usage > 0,
-                    'is_template': False,
-                }
-                columns_data.append(column_info)
-            except Exception as e:
-                print(f"DEBUG: Error procesando columna {column.name}: {e}")
-                # Continuar con la siguiente columna
-                continue
-        
-        context = {
-            'columns': columns_data,
-            'search_query': search_query,
-            'data_type_filter': data_type_filter,
-            'data_types': data_types,
-            'total_count': len(columns_data),
-            'filtered_count': len(columns_data),
-        }
-        
-        return render(request, 'db_column_list.html', context)
-    except Exception as e:
-        import traceback
-        print(f"Error en db_column_list: {e}")
-        traceback.print_exc()
-        # Retornar una respuesta de error simple
-        from django.http import HttpResponse
-        return HttpResponse(f"Error: {e}", status=500)
+                from .models import UiColumn, UiField, FormQuestion
+                column = get_object_or_404(DbColumn, pk=column_id)
+                column_name = column.name
+
+                # Verificar si está en uso o tiene configuraciones relacionadas
+                if column.table_implementations.exists():
+                    messages.error(request, f'No se puede eliminar la columna "{column_name}" porque está asignada a tablas.')
+                else:
+                    delete_reason = ''
+                    if FormQuestion.objects.filter(db_column=column).exists():
+                        delete_reason = 'preguntas de formulario'
+                    elif UiField.objects.filter(db_column=column).exists():
+                        delete_reason = 'configuraciones de campo UI'
+                    elif UiColumn.objects.filter(db_column=column).exists():
+                        delete_reason = 'configuraciones de UI'
+
+                    if not delete_reason:
+                        with transaction.atomic():
+                            # Verificar una vez más que no esté en uso
+                            final_check = DbTableColumn.objects.filter(column=column).count()
+                            if final_check > 0:
+                                raise Exception(f"La columna {column_name} está siendo usada por {final_check} tablas")
+                            column.delete()
+                        messages.success(request, f'Columna "{column_name}" eliminada del sistema.')
+                    else:
+                        messages.error(request, f'No se puede eliminar la columna "{column_name}" porque tiene {delete_reason}.')
+            except Exception as exc:
+                messages.error(request, f'Error al eliminar la columna: {exc}')
+
+            # Redirigir a la misma página para refrescar
+            return redirect('sapy:db_column_list')
+
+    from django.core.paginator import Paginator
+    from django.db.models import Count
+    from django.db import connection
+
+    search_query = request.GET.get('search', '').strip()
+    data_type_filter = request.GET.get('data_type', '')
+
+    # Filtros y conteo de uso resueltos en SQL (una sola consulta agrupada por columna)
+    columns = DbColumn.objects.all()
+    if search_query:
+        columns = columns.filter(name__icontains=search_query)
+    if data_type_filter:
+        columns = columns.filter(data_type=data_type_filter)
+    columns = columns.annotate(
+        total_usage=Count('table_implementations__table', distinct=True),
+    )
+    use_array_agg = connection.vendor == 'postgresql'
+    if use_array_agg:
+        from django.contrib.postgres.aggregates import ArrayAgg
+        columns = columns.annotate(
+            tables_using=ArrayAgg(
+                'table_implementations__table__name',
+                distinct=True,
+                ordering='table_implementations__table__name',
+                default=[],
+            ),
+        )
+    columns = columns.order_by('name', 'id')
+
+    paginator = Paginator(columns, settings.SAPY_COLUMN_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_columns = list(page_obj.object_list)
+    usage = None if use_array_agg else _column_catalog_usage(page_columns)
+
+    columns_data = []
+    for column in page_columns:
+        tables_using = [t for t in column.tables_using if t] if use_array_agg else usage[column.pk]
+        columns_data.append({
+            'name': column.name,
+            'data_type': column.data_type,
+            'total_usage': column.total_usage,
+            'tables_using': tables_using,
+            'first_instance': column,
+            'can_delete': column.total_usage == 0,  # Solo se puede eliminar si no está en uso
+            'is_in_use': column.total_usage > 0,
+            'is_template': False,
+        })
+
+    data_types = DbColumn.objects.values_list('data_type', flat=True).distinct().order_by('data_type')
+    querystring = request.GET.copy()
+    querystring.pop('page', None)
+
+    context = {
+        'columns': columns_data,
+        'page_obj': page_obj,
+        'paginator': paginator,
+        'querystring': querystring.urlencode(),
+        'search_query': search_query,
+        'data_type_filter': data_type_filter,
+        'data_types': data_types,
+        'total_count': DbColumn.objects.count() if (search_query or data_type_filter) else paginator.count,
+        'filtered_count': paginator.count,
+    }
+    return render(request, 'db_column_list.html', context)
 
 
 @login_required
@@ -1264,6 +1551,43 @@ def db_table_column_delete(request, pk):
 
 # ==== GESTIÓN DE TABLAS ASIGNADAS A APLICACIONES ====
 
+@login_required
+def application_schema_diff(request, pk):
+    """Compara el catálogo con la BD de la app: GET muestra el plan (dry-run), POST lo aplica."""
+    from .schema_diff import apply_plan, build_plan
+    from .target_db import TargetDbError
+    application = get_object_or_404(Application, pk=pk)
+    try:
+        plan = build_plan(application)
+    except TargetDbError as exc:
+        messages.error(request, f'No se pudo conectar a la BD de la aplicación: {exc}')
+        return redirect('sapy:application_tables', pk=application.pk)
+
+    if request.method == 'POST':
+        include_unsafe = request.POST.get('include_unsafe') == '1'
+        result = apply_plan(application, plan, include_unsafe=include_unsafe)
+        summary = f"{result['applied']} cambio(s) aplicados"
+        if result['skipped_unsafe']:
+            summary += f", {result['skipped_unsafe']} no seguros omitidos"
+        if result['migration']:
+            summary += f" (migración {result['migration']})"
+        if result['success']:
+            messages.success(request, summary + '.')
+        else:
+            messages.error(request, summary + '. Errores: ' + ' | '.join(result['errors']))
+        return redirect('sapy:application_schema_diff', pk=application.pk)
+
+    steps = plan['steps']
+    return render(request, 'application_schema_diff.html', {
+        'application': application,
+        'steps': steps,
+        'errors': plan['errors'],
+        'pending_count': sum(1 for s in steps if s['sql']),
+        'unsafe_count': sum(1 for s in steps if s['sql'] and not s['safe']),
+        'title': f'Diferencias de esquema - {application.display_name}',
+    })
+
+
 @login_required
 def application_tables(request, pk):
     """Gestionar tablas asignadas a una aplicación específica."""
@@ -1312,6 +1636,12 @@ def application_tables(request, pk):
                 table = get_object_or_404(DbTable, pk=table_id)
                 # Analizar dependencias de la tabla (id_*)
                 dep_status = analyze_dependency_status(application, table)
+                if dep_status['connection_error']:
+                    messages.error(
+                        request,
+                        f"No se pudo conectar a la BD de la aplicación para verificar las dependencias de '{table.name}'.",
+                    )
+                    return redirect('sapy:application_tables', pk=application.pk)
                 msgs = []
                 if dep_status['missing_catalog']:
                     msgs.append(f"No existen en catálogo: {', '.join(dep_status['missing_catalog'])}")
@@ -1322,14 +1652,45 @@ def application_tables(request, pk):
                 if msgs:
                     messages.warning(request, f"Antes de generar '{table.name}', resuelve dependencias → " + ' | '.join(msgs))
                 else:
-                    # Todas las dependencias están listas; generar solo esta tabla
-                    result = generate_django_model_for_table(application, table)
-                    if result.get('success'):
-                        messages.success(request, f"Tabla '{table.name}' generada correctamente.")
-                    else:
-                        messages.error(request, f"Error generando '{table.name}': {result.get('error')}")
+                    # Todas las dependencias están listas; encolar solo esta tabla
+                    from .jobs import enqueue
+                    from .models import Job
+                    job = enqueue(
+                        Job.Kind.GENERATE_MODEL,
+                        payload={'table_id': table.pk},
+                        application=application,
+                        created_by=request.user,
+                    )
+                    messages.success(request, f"Generación de '{table.name}' encolada (trabajo #{job.pk}).")
             except Exception as e:
                 messages.error(request, f'Error al generar modelo: {e}')
+
+        elif action == 'generate_models_batch':
+            try:
+                # Todas las tablas asignadas que aún no existen en la BD de la app, en un solo trabajo
+                assigned = list(application.assigned_tables.select_related('table'))
+                existing = check_tables_exist_in_app(application, [a.table.name for a in assigned])
+                if existing is None:
+                    messages.error(request, 'No se pudo conectar a la BD de la aplicación.')
+                else:
+                    pending = [a.table for a in assigned if a.table.name not in existing]
+                    if not pending:
+                        messages.info(request, 'Todas las tablas asignadas ya están implementadas.')
+                    else:
+                        from .jobs import enqueue
+                        from .models import Job
+                        job = enqueue(
+                            Job.Kind.GENERATE_MODEL,
+                            payload={'table_ids': [t.pk for t in pending]},
+                            application=application,
+                            created_by=request.user,
+                        )
+                        messages.success(
+                            request,
+                            f"Generación en lote de {len(pending)} tabla(s) encolada (trabajo #{job.pk}).",
+                        )
+            except Exception as e:
+                messages.error(request, f'Error al generar modelos: {e}')
         
         return redirect('sapy:application_tables', pk=application.pk)
     
@@ -1397,14 +1758,13 @@ def application_tables_search(request, pk):
 	q = (request.GET.get('q') or '').strip()
 	assigned_ids = application.assigned_tables.values_list('table_id', flat=True)
 	qs = DbTable.objects.filter(activo=True).exclude(id__in=assigned_ids)
-	if q:
-		qs = qs.filter(name__icontains=q)
-	qs = qs.order_by('name')[:20]
+	qs = ranked_search(qs, q, ['name'], ['name'])
+	qs = qs.annotate(columns_count=models.Count('table_columns'))[:20]
 	data = [
 		{
 			'id': t.id,
 			'name': t.name,
-			'columns_count': t.table_columns.count(),
+			'columns_count': t.columns_count,
 			'description': (t.description or '')[:80]
 		}
 		for t in qs
@@ -1456,7 +1816,9 @@ def application_menus(request, pk):
     for am in assigned:
         pages = am.menu.menu_pages.select_related('page').order_by('section', 'order_index')
         page_infos = []
+        ranks: dict[str, int] = {}
         for mp in pages:
+            ranks[mp.section] = ranks.get(mp.section, 0) + 1
             p = mp.page
             # Existe ruta en app destino? Verificar leyendo urls.py de la app destino
             route_exists = _check_route_registered_in_app(application, p)
@@ -1476,7 +1838,7 @@ def application_menus(request, pk):
                 'icon': p.icon,
                 'route_path': p.route_path,
                 'section': mp.section or '1',
-                'order_index': mp.order_index,
+                'order_index': ranks[mp.section],
                 'route_exists': route_exists,
                 'records': records,
                 'source_type': getattr(p, 'source_type', None),
@@ -1542,43 +1904,64 @@ def application_generate_pages(request, pk):
         if not all_assigned and not tables_csv:
             return JsonResponse({'success': False, 'message': 'Debe seleccionar al menos una tabla o activar all_assigned'}, status=400)
 
-        # Construir comando
-        cmd = [
-            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'generate_pages',
-            '--app', application.name,
-        ]
-        if all_assigned:
-            cmd.append('--all-assigned')
-        else:
-            cmd.extend(['--tables', tables_csv])
-        if btn_title:
-            cmd.extend(['--btn-title', btn_title])
-        if menu_slug:
-            cmd.extend(['--menu', menu_slug])
-        if overwrite:
-            cmd.append('--overwrite')
-        # Agregar reload automático
-        cmd.append('--reload')
-
-        # Ejecutar en foreground y capturar salida
-        result = subprocess.run(cmd, cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120)
-        out = (result.stdout or '') + ('\n' + result.stderr if result.stderr else '')
-        if result.returncode != 0:
-            return JsonResponse({'success': False, 'message': 'Error al generar páginas', 'log': out[-4000:]}, status=500)
-        return JsonResponse({'success': True, 'message': 'Generación completada', 'log': out[-4000:]})
+        from .jobs import enqueue
+        from .models import Job
+        job = enqueue(
+            Job.Kind.GENERATE_PAGES,
+            payload={
+                'app': application.name,
+                'all_assigned': all_assigned,
+                'tables': tables_csv,
+                'btn_title': btn_title,
+                'menu': menu_slug,
+                'overwrite': overwrite,
+                'reload': True,
+            },
+            application=application,
+            created_by=request.user,
+        )
+        return JsonResponse({
+            'success': True,
+            'message': 'Generación encolada',
+            'job_id': job.pk,
+            'status_url': reverse('sapy:job_status', kwargs={'job_id': job.pk}),
+        })
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
+@login_required
+def job_status(request, job_id):
+    """Estado JSON de un trabajo de la cola (para polling desde la UI)."""
+    from .models import Job
+    job = get_object_or_404(Job, pk=job_id)
+    return JsonResponse({
+        'success': True,
+        'job': {
+            'id': job.pk,
+            'kind': job.kind,
+            'state': job.state,
+            'state_display': job.get_state_display(),
+            'finished': job.is_finished,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'progress': job.progress,
+            'result': job.result,
+            'error': job.error,
+            'created_at': job.created_at.isoformat(),
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        },
+    })
+
+
 @login_required
 def application_menus_search(request, pk):
     application = get_object_or_404(Application, pk=pk)
     q = (request.GET.get('q') or '').strip()
     assigned_ids = application.assigned_menus.values_list('menu_id', flat=True)
     qs = Menu.objects.filter(activo=True).exclude(id__in=assigned_ids)
-    if q:
-        qs = qs.filter(models.Q(name__icontains=q) | models.Q(title__icontains=q))
-    qs = qs.order_by('name')[:20]
+    qs = ranked_search(qs, q, ['name', 'title'], ['name'])[:20]
     data = [
         {
             'id': m.id,
@@ -1609,98 +1992,49 @@ def page_generate_from_dbtable(request):
 
     table = get_object_or_404(DbTable, pk=dbtable_id)
 
-    # Defaults
-    slug = (payload.get('slug') or table.name).strip().lower()
-    base_title = table.alias or table.name
-    try:
-        if table.alias and len((table.alias or '').strip()) <= 1:
-            base_title = table.name
-    except Exception:
-        base_title = table.name
-    title = payload.get('title') or base_title.replace('_', ' ').capitalize()
-    route_path = f"/{slug}/"
-
-    with transaction.atomic():
-        # Reusar si ya existe página para esta DbTable
-        page = Page.objects.filter(source_type='dbtable', db_table=table).first()
-        if page is None:
-            # Evitar colisiones por slug/ruta
-            existing_slug = Page.objects.filter(slug=slug).exists()
-            if existing_slug:
-                slug = f"{slug}-1"
-                route_path = f"/{slug}/"
-            page = Page.objects.create(
-                slug=slug,
-                title=title,
-                description=table.description or '',
-                source_type='dbtable',
-                db_table=table,
-                icon='',
-                layout='',
-                route_path=route_path,
-                activo=True,
-            )
+    from .page_scaffold import scaffold_pages
+    result = scaffold_pages([table], overrides={table.id: {'title': payload.get('title'), 'slug': payload.get('slug')}})[0]
+    return JsonResponse({'success': True, 'page_id': result['page_id'], 'slug': result['slug'], 'route_path': result['route_path']})
 
-        # Tabla principal con defaults (crear si falta)
-        page_table = page.page_tables.filter(db_table=table).first()
-        if page_table is None:
-            page_table = PageTable.objects.create(
-                page=page,
-                db_table=table,
-                title=title,
-                searchable=True,
-                export_csv=True,
-                export_xlsx=True,
-                export_pdf=True,
-                page_size=25,
-                default_sort={'by': 'id', 'dir': 'desc'},
-                show_inactive=False,
-                activo=True,
-            )
 
-        # Modal CRUD por defecto + formulario (crear si falta)
-        pm = page.page_modals.select_related('modal').order_by('order_index').first()
-        if pm is None:
-            modal = Modal.objects.create(
-                purpose='create_edit',
-                title=f"Gestionar {title}",
-                size='lg',
-                icon='',
-                close_on_backdrop=True,
-                close_on_escape=True,
-                prevent_close_on_enter=False,
-                prevent_close_on_space=False,
-                submit_button_label='Guardar',
-                submit_button_icon='',
-                cancel_button_label='Cancelar',
-                activo=True,
-            )
-            PageModal.objects.create(page=page, modal=modal, order_index=0, activo=True)
-            mf = ModalForm.objects.create(modal=modal, db_table=table, layout_columns_per_row=2, activo=True)
-        else:
-            modal = pm.modal
-            mf = getattr(modal, 'form', None)
-            if mf is None:
-                mf = ModalForm.objects.create(modal=modal, db_table=table, layout_columns_per_row=2, activo=True)
-
-        # Asegurar preguntas de formulario para columnas de la tabla (excepto PK autoincrement y técnicas)
-        from .models import FormQuestion
-        db_columns = table.table_columns.select_related('column').order_by('position')
-        for tc in db_columns:
-            col = tc.column
-            if col.name in ['created_at', 'updated_at', 'id_auth_user']:
-                continue
-            if col.is_primary_key and col.is_auto_increment:
-                continue
-            fq = getattr(col, 'form_question', None)
-            if not fq:
-                try:
-                    defaults = _derive_form_question_defaults(col, title)
-                    FormQuestion.objects.create(db_column=col, **defaults)
-                except Exception:
-                    pass
+@login_required
+@require_POST
+def pages_generate_from_dbtables(request):
+    """Genera páginas por defecto para varias DbTable en una sola transacción (ver sapy.page_scaffold).
+    Body: {"dbtable_ids": [int, ...]} o {"all": true} para todas las tablas activas.
+    """
+    try:
+        payload = json.loads(request.body.decode('utf-8'))
+    except Exception:
+        return JsonResponse({'success': False, 'message': 'JSON inválido'}, status=400)
 
-    return JsonResponse({'success': True, 'page_id': page.id, 'slug': page.slug, 'route_path': page.route_path})
+    if payload.get('all'):
+        tables = list(DbTable.objects.filter(activo=1).order_by('name'))
+    else:
+        ids = payload.get('dbtable_ids')
+        if not isinstance(ids, list) or not ids:
+            return JsonResponse({'success': False, 'message': 'dbtable_ids requerido'}, status=400)
+        try:
+            ids = [int(x) for x in ids]
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'message': 'dbtable_ids inválido'}, status=400)
+        tables = list(DbTable.objects.filter(pk__in=ids).order_by('name'))
+        found = {t.id for t in tables}
+        missing = [x for x in ids if x not in found]
+        if missing:
+            return JsonResponse({'success': False, 'message': f'Tablas no encontradas: {missing}'}, status=404)
+
+    from .page_scaffold import scaffold_pages
+    try:
+        results = scaffold_pages(tables)
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': f'Error generando páginas: {e}'}, status=500)
+    created = sum(1 for r in results if r['created'])
+    return JsonResponse({
+        'success': True,
+        'message': f'{created} página(s) creadas, {len(results) - created} ya existían',
+        'results': results,
+    })
 
 
 @login_required
@@ -2030,9 +2364,7 @@ def role_menus_search(request, role_id: int):
     q = (request.GET.get('q') or '').strip()
     assigned_ids = role.menus.values_list('menu_id', flat=True)
     qs = Menu.objects.exclude(id__in=assigned_ids).filter(activo=True)
-    if q:
-        qs = qs.filter(models.Q(name__icontains=q) | models.Q(title__icontains=q))
-    qs = qs.order_by('name')[:20]
+    qs = ranked_search(qs, q, ['name', 'title'], ['name'])[:20]
     data = [{ 'id': m.id, 'name': m.name, 'title': m.title, 'icon': m.icon } for m in qs]
     return JsonResponse({'results': data})
 
@@ -2040,9 +2372,13 @@ def role_menus_search(request, role_id: int):
 @login_required
 def menu_detail(request, menu_id: int):
     menu = get_object_or_404(Menu, pk=menu_id)
-    assigned = menu.menu_pages.select_related('page').order_by('section', 'order_index', 'page__slug')
+    assigned = list(menu.menu_pages.select_related('page').order_by('section', 'order_index', 'page__slug'))
+    # order_index tiene huecos (sapy.ordering): a la vista va la posición 1..N dentro de la sección
+    ranks: dict[str, int] = {}
+    for mp in assigned:
+        ranks[mp.section] = mp.rank = ranks.get(mp.section, 0) + 1
     # Páginas disponibles (excluyendo las ya asignadas)
-    assigned_ids = assigned.values_list('page_id', flat=True)
+    assigned_ids = [mp.page_id for mp in assigned]
     available = Page.objects.exclude(id__in=assigned_ids).order_by('slug')
     search_query = request.GET.get('search', '')
     if search_query:
@@ -2079,9 +2415,10 @@ def menu_assign_page(request, menu_id: int):
     section = (request.POST.get('section') or '1').strip()
     try:
         pg = get_object_or_404(Page, pk=int(page_id))
-        # Calcular order_index siguiente dentro de la sección
-        max_order = menu.menu_pages.filter(section=section).aggregate(m=models.Max('order_index'))['m'] or 0
-        MenuPage.objects.create(menu=menu, page=pg, section=section, order_index=max_order + 1)
+        # Calcular order_index siguiente dentro de la sección (con hueco para reordenar)
+        from .ordering import next_position
+        order_index = next_position(menu.menu_pages.filter(section=section), 'order_index')
+        MenuPage.objects.create(menu=menu, page=pg, section=section, order_index=order_index)
         messages.success(request, f'Página "{pg.title}" asignada al menú.')
     except Exception as e:
         messages.error(request, f'Error al asignar página: {e}')
@@ -2106,7 +2443,12 @@ def menu_unassign_page(request, menu_id: int):
 @login_required
 @require_POST
 def menu_page_update(request, menu_id: int):
-    """Actualiza sección u orden de una página asignada individualmente."""
+    """Actualiza sección u orden de una página asignada individualmente.
+
+    `order_index` es la posición 1..N dentro de la sección, no el valor guardado
+    (que tiene huecos, ver sapy.ordering).
+    """
+    from .ordering import reorder
     menu = get_object_or_404(Menu, pk=menu_id)
     page_id = request.POST.get('page_id')
     new_section = (request.POST.get('section') or '').strip()
@@ -2114,18 +2456,18 @@ def menu_page_update(request, menu_id: int):
     mp = menu.menu_pages.filter(page_id=page_id).first()
     if not mp:
         return JsonResponse({'success': False, 'message': 'Asignación no encontrada'}, status=404)
-    updated = False
-    if new_section is not None:
-        mp.section = new_section or '1'
-        updated = True
     try:
-        if new_order is not None:
-            mp.order_index = int(new_order)
-            updated = True
-    except Exception:
-        pass
-    if updated:
-        mp.save(update_fields=['section', 'order_index', 'updated_at'])
+        rank = int(new_order) if new_order is not None else None
+    except ValueError:
+        rank = None
+    with transaction.atomic():
+        mp.section = new_section or '1'
+        mp.save(update_fields=['section', 'updated_at'])
+        if rank is not None:
+            section_pages = menu.menu_pages.filter(section=mp.section)
+            ordered = list(section_pages.exclude(pk=mp.pk).order_by('order_index', 'id').values_list('pk', flat=True))
+            ordered.insert(min(max(rank, 1), len(ordered) + 1) - 1, mp.pk)
+            reorder(section_pages, ordered, 'order_index')
     return JsonResponse({'success': True})
 
 
@@ -2140,25 +2482,36 @@ def menu_pages_reorder(request, menu_id: int):
         items = payload.get('items') or []  # [{page_id, order_index, section?}]
         if not isinstance(items, list):
             return JsonResponse({'success': False, 'message': 'Formato inválido'}, status=400)
-        updated = []
-        for it in items:
-            pid = it.get('page_id')
-            order_i = it.get('order_index')
-            section = it.get('section')
-            mp = menu.menu_pages.filter(page_id=pid).first()
+        from .ordering import reorder
+        by_page = {mp.page_id: mp for mp in menu.menu_pages.all()}
+        # Orden deseado por sección; el order_index recibido solo define la secuencia
+        sections: dict[str, list] = {}
+        moved_section = []
+        for seq, it in enumerate(items):
+            try:
+                mp = by_page.get(int(it.get('page_id')))
+            except (TypeError, ValueError):
+                mp = None
             if not mp:
                 continue
-            if section is not None:
-                mp.section = (str(section) or '1')
+            section = it.get('section')
+            if section is not None and (str(section) or '1') != mp.section:
+                mp.section = str(section) or '1'
+                moved_section.append(mp)
             try:
-                if order_i is not None:
-                    mp.order_index = int(order_i)
-            except Exception:
-                pass
-            updated.append(mp)
-        if updated:
-            MenuPage.objects.bulk_update(updated, ['section', 'order_index'])
-        return JsonResponse({'success': True})
+                key = int(it.get('order_index'))
+            except (TypeError, ValueError):
+                key = seq
+            sections.setdefault(mp.section, []).append((key, seq, mp.pk))
+        written = 0
+        with transaction.atomic():
+            if moved_section:
+                MenuPage.objects.bulk_update(moved_section, ['section'])
+                written += len(moved_section)
+            for section, entries in sections.items():
+                ordered = [pk for _, _, pk in sorted(entries)]
+                written += reorder(menu.menu_pages.filter(section=section), ordered, 'order_index')
+        return JsonResponse({'success': True, 'updated': written})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
@@ -2169,9 +2522,7 @@ def menu_pages_search(request, menu_id: int):
     q = (request.GET.get('q') or '').strip()
     assigned_ids = menu.menu_pages.values_list('page_id', flat=True)
     qs = Page.objects.exclude(id__in=assigned_ids)
-    if q:
-        qs = qs.filter(models.Q(slug__icontains=q) | models.Q(title__icontains=q))
-    qs = qs.order_by('slug')[:30]
+    qs = ranked_search(qs, q, ['slug', 'title'], ['slug'])[:30]
     data = [
         {'id': p.id, 'slug': p.slug, 'title': p.title, 'route_path': p.route_path, 'icon': p.icon}
         for p in qs
@@ -2179,40 +2530,51 @@ def menu_pages_search(request, menu_id: int):
     return JsonResponse({'results': data})
 
 
+def _icons_etag(request, *args, **kwargs):
+    from .icon_index import current_revision
+    return f"icons-{current_revision()}"
+
+
+def _icons_cache_headers(response):
+    # Revalidar siempre: el ETag (revisión del catálogo) hace barata la comprobación
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @login_required
+@condition(etag_func=_icons_etag)
 def icons_search(request):
-    """Busca íconos en BD por proveedor/clase/etiquetas. Retorna JSON para el picker."""
+    """Busca íconos por proveedor/clase/etiquetas en el índice en memoria. Retorna JSON para el picker."""
+    from .icon_index import get_index
     q = (request.GET.get('q') or '').strip().lower()
     provider = (request.GET.get('provider') or '').strip()
-    qs = Icon.objects.filter(activo=True)
-    if provider in ['bi', 'fa']:
-        qs = qs.filter(provider=provider)
-    if q:
-        qs = qs.filter(
-            models.Q(class_name__icontains=q) |
-            models.Q(name__icontains=q) |
-            models.Q(label__icontains=q) |
-            models.Q(tags__icontains=q)
-        )
+    if provider not in ['bi', 'fa']:
+        provider = ''
     limit = 400
     try:
         limit = max(50, min(800, int(request.GET.get('limit') or limit)))
     except Exception:
         limit = 400
-    qs = qs.order_by('provider', 'class_name')[:limit]
-    data = [
-        {
-            'class_name': ic.class_name,
-            'label': ic.label,
-            'tags': ic.tags,
-            'name': ic.name,
-            'provider': ic.provider,
-            'style': ic.style,
-            'library': ic.library,
-        }
-        for ic in qs
-    ]
-    return JsonResponse({'results': data})
+    results = get_index().search(q, provider=provider, limit=limit)
+    return _icons_cache_headers(JsonResponse({'results': results}))
+
+
+def _icons_catalog_etag(request, *args, **kwargs):
+    encoding = '-gz' if 'gzip' in request.headers.get('Accept-Encoding', '') else ''
+    return _icons_etag(request) + encoding
+
+
+@login_required
+@condition(etag_func=_icons_catalog_etag)
+def icons_catalog(request):
+    """Catálogo completo de íconos activos (JSON, gzip si el cliente lo acepta) para filtrar en el cliente."""
+    from .icon_index import get_index
+    compressed = 'gzip' in request.headers.get('Accept-Encoding', '')
+    response = HttpResponse(get_index().payload(compressed), content_type='application/json')
+    if compressed:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    return _icons_cache_headers(response)
 
 
 @login_required
@@ -2232,6 +2594,39 @@ def icons_list(request):
     })
 
 
+_ICON_CLASS_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9 _-]*$')
+
+
+def _parse_icon_payload(raw: str, default_provider: str):
+    """Convierte el texto pegado en {class_name: provider}; devuelve también cuántas líneas son inválidas."""
+    max_length = Icon._meta.get_field('class_name').max_length
+    parsed = {}
+    invalid = 0
+    for line in raw.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        prov = default_provider if default_provider in ['bi','fa'] else ''
+        cls = line
+        # Permitir indicar provider al inicio: fa|fas fa-user
+        if '|' in line:
+            head, _, rest = line.partition('|')
+            head = head.strip().lower()
+            rest = rest.strip()
+            if head in ['fa','bi']:
+                prov = head
+                cls = rest
+        cls = ' '.join(cls.split())
+        if not cls or len(cls) > max_length or not _ICON_CLASS_RE.match(cls):
+            invalid += 1
+            continue
+        # Inferir provider por prefijo de clase
+        if not prov:
+            prov = 'fa' if cls.startswith('fa') else 'bi'
+        parsed[cls] = prov
+    return parsed, invalid
+
+
 @login_required
 def icons_import(request):
     """Importa íconos en bloque desde texto pegado (una clase por línea) u opcionalmente con prefijo de proveedor.
@@ -2241,33 +2636,36 @@ def icons_import(request):
       - fa|fas fa-user (provider explícito al inicio separado por '|')
     """
     if request.method == 'POST':
+        from .icon_index import invalidate
+        from .models import CatalogRevision
         raw = (request.POST.get('payload') or '').strip()
         default_provider = (request.POST.get('provider') or '').strip()
-        count = 0
-        errors = 0
-        for line in raw.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            prov = default_provider if default_provider in ['bi','fa'] else ''
-            cls = line
-            # Permitir indicar provider al inicio: fa|fas fa-user
-            if '|' in line:
-                head, _, rest = line.partition('|')
-                head = head.strip().lower()
-                rest = rest.strip()
-                if head in ['fa','bi']:
-                    prov = head
-                    cls = rest
-            # Inferir provider por prefijo de clase
-            if not prov:
-                prov = 'fa' if cls.startswith('fa') else ('bi' if cls.startswith('bi') else 'bi')
-            try:
-                Icon.objects.get_or_create(class_name=cls, defaults={'provider': prov})
-                count += 1
-            except Exception:
-                errors += 1
-        messages.success(request, f'Importación finalizada. Agregados/existentes: {count}. Errores: {errors}.')
+        parsed, invalid = _parse_icon_payload(raw, default_provider)
+        try:
+            with transaction.atomic():
+                existing = {
+                    ic.class_name: ic
+                    for ic in Icon.objects.filter(class_name__in=list(parsed)).only('id', 'class_name', 'provider')
+                }
+                new_icons = [Icon(class_name=cls, provider=prov) for cls, prov in parsed.items() if cls not in existing]
+                changed = []
+                for cls, ic in existing.items():
+                    if ic.provider != parsed[cls]:
+                        ic.provider = parsed[cls]
+                        changed.append(ic)
+                Icon.objects.bulk_create(new_icons, batch_size=500)
+                Icon.objects.bulk_update(changed, ['provider'], batch_size=500)
+                if new_icons or changed:
+                    CatalogRevision.bump('icons')
+            invalidate()
+        except Exception as exc:
+            messages.error(request, f'Error al importar íconos: {exc}')
+            return redirect('sapy:icons_import')
+        messages.success(
+            request,
+            f'Importación finalizada. Creados: {len(new_icons)}. Existentes: {len(existing)} '
+            f'({len(changed)} con proveedor actualizado). Inválidos: {invalid}.'
+        )
         return redirect('sapy:icons_list')
     return render(request, 'icons_import.html', {'title': 'Importar Íconos'})
 
@@ -2296,7 +2694,8 @@ def page_detail(request, page_id: int):
                 except Exception:
                     overrides_map = {}
                 db_cols = mf.db_table.table_columns.select_related('column').order_by('position')
-                for tc in db_cols:
+                # position tiene huecos (ver sapy.ordering); para ordenar se usa su rango 1..N
+                for rank, tc in enumerate(db_cols, start=1):
                     col = tc.column
                     if (col.name or '') in ['created_at','updated_at','id_auth_user']:
                         continue
@@ -2321,7 +2720,7 @@ def page_detail(request, page_id: int):
                     width_fraction = getattr(ov, 'width_fraction', None) or '1-1'
                     required = (ov.required_override if (ov and ov.required_override is not None) else base_required)
                     visible = (ov.visible if ov is not None else True)
-                    order_idx = (ov.order_index if (ov and ov.order_index is not None) else (getattr(fq, 'order', 1) if fq else (tc.position or 1)))
+                    order_idx = (ov.order_index if (ov and ov.order_index is not None) else (getattr(fq, 'order', 1) if fq else rank))
                     fields.append({
                         'fq_id': fq_id,
                         'db_col_id': col.id,
@@ -2572,6 +2971,14 @@ def check_table_exists_by_name_in_app(application, table_name: str) -> bool:
         return False
 
 
+def check_tables_exist_in_app(application, table_names) -> set[str] | None:
+    """Nombres de `table_names` que existen en la BD de la app, con una sola consulta al catálogo.
+    Retorna None si no se pudo conectar.
+    """
+    from .target_db import existing_tables
+    return existing_tables(application, table_names)
+
+
 def get_table_record_count(application, table):
 	"""Obtiene el número de registros en una tabla de la aplicación destino."""
 	try:
@@ -2636,6 +3043,69 @@ def _ensure_directory_writable(path: str, web_user: str = 'www-data') -> tuple[b
         return False, f'Error corrigiendo/verificando permisos del directorio: {e}'
 
 
+def _prepare_models_file(application) -> tuple[str, str | None]:
+    """Asegura el paquete de la app destino y un models.py escribible. Retorna (ruta, error)."""
+    # Construir ruta del archivo de modelos
+    base_path = application.base_path.rstrip('/')
+    app_name = application.name
+    model_file_path = f"{base_path}/{app_name}/{app_name}/models.py"
+    
+    print(f"DEBUG: Ruta del archivo de modelos: {model_file_path}")
+    
+    # Crear toda la estructura de directorios necesaria
+    import pwd
+    
+    # Asegurar permisos en app_base_dir y app_django_dir (no tocamos permisos de base_path del sistema)
+    app_base_dir = f"{base_path}/{app_name}"
+    app_django_dir = f"{app_base_dir}/{app_name}"
+    # 1) app_base_dir debe existir; no modificar permisos aquí (la app ya debió instalarse)
+    if not os.path.isdir(app_base_dir):
+        return model_file_path, f'Directorio de la app no existe: {app_base_dir}'
+    # 3) app_django_dir
+    ok, err = _ensure_directory_writable(app_django_dir)
+    if not ok:
+        return model_file_path, err
+    print(f"DEBUG: Directorios verificados: base={base_path} app_base={app_base_dir} app_django={app_django_dir}")
+    
+    # Crear archivo __init__.py si no existe
+    init_file = f"{app_django_dir}/__init__.py"
+    if not os.path.exists(init_file):
+        try:
+            with open(init_file, 'w') as f:
+                f.write("# Django app initialization\n")
+            print(f"DEBUG: Archivo __init__.py creado: {init_file}")
+        except Exception as e:
+            print(f"WARNING: No se pudo crear __init__.py: {e}")
+    
+    # Crear archivo models.py si no existe
+    if not os.path.exists(model_file_path):
+        try:
+            with open(model_file_path, 'w') as f:
+                f.write("# Django models\n")
+            print(f"DEBUG: Archivo models.py creado: {model_file_path}")
+        except Exception as e:
+            print(f"WARNING: No se pudo crear models.py: {e}")
+    
+    # Verificar permisos del archivo models.py
+    if os.path.exists(model_file_path):
+        if not os.access(model_file_path, os.W_OK):
+            try:
+                try:
+                    shutil.chown(model_file_path, user='www-data', group='www-data')
+                except Exception:
+                    pass
+                try:
+                    os.chmod(model_file_path, 0o664)
+                except Exception:
+                    pass
+                if not os.access(model_file_path, os.W_OK):
+                    return model_file_path, f'No hay permisos de escritura en: {model_file_path}'
+                print("DEBUG: Permisos de models.py verificados/corregidos (Python)")
+            except Exception as e:
+                return model_file_path, f'Error corrigiendo/verificando permisos de archivo: {e}'
+    return model_file_path, None
+
+
 def generate_django_model_for_table(application, table):
     """Genera un modelo Django para una tabla específica en la aplicación destino."""
     try:
@@ -2657,64 +3127,9 @@ def generate_django_model_for_table(application, table):
         # Generar el código del modelo
         model_code = generate_model_code(application, table, table_columns)
         
-        # Construir ruta del archivo de modelos
-        base_path = application.base_path.rstrip('/')
-        app_name = application.name
-        model_file_path = f"{base_path}/{app_name}/{app_name}/models.py"
-        
-        print(f"DEBUG: Ruta del archivo de modelos: {model_file_path}")
-        
-        # Crear toda la estructura de directorios necesaria
-        import pwd
-        
-        # Asegurar permisos en app_base_dir y app_django_dir (no tocamos permisos de base_path del sistema)
-        app_base_dir = f"{base_path}/{app_name}"
-        app_django_dir = f"{app_base_dir}/{app_name}"
-        # 1) app_base_dir debe existir; no modificar permisos aquí (la app ya debió instalarse)
-        if not os.path.isdir(app_base_dir):
-            return {'success': False, 'error': f'Directorio de la app no existe: {app_base_dir}'}
-        # 3) app_django_dir
-        ok, err = _ensure_directory_writable(app_django_dir)
-        if not ok:
-            return {'success': False, 'error': err}
-        print(f"DEBUG: Directorios verificados: base={base_path} app_base={app_base_dir} app_django={app_django_dir}")
-        
-        # Crear archivo __init__.py si no existe
-        init_file = f"{app_django_dir}/__init__.py"
-        if not os.path.exists(init_file):
-            try:
-                with open(init_file, 'w') as f:
-                    f.write("# Django app initialization\n")
-                print(f"DEBUG: Archivo __init__.py creado: {init_file}")
-            except Exception as e:
-                print(f"WARNING: No se pudo crear __init__.py: {e}")
-        
-        # Crear archivo models.py si no existe
-        if not os.path.exists(model_file_path):
-            try:
-                with open(model_file_path, 'w') as f:
-                    f.write("# Django models\n")
-                print(f"DEBUG: Archivo models.py creado: {model_file_path}")
-            except Exception as e:
-                print(f"WARNING: No se pudo crear models.py: {e}")
-        
-        # Verificar permisos del archivo models.py
-        if os.path.exists(model_file_path):
-            if not os.access(model_file_path, os.W_OK):
-                try:
-                    try:
-                        shutil.chown(model_file_path, user='www-data', group='www-data')
-                    except Exception:
-                        pass
-                    try:
-                        os.chmod(model_file_path, 0o664)
-                    except Exception:
-                        pass
-                    if not os.access(model_file_path, os.W_OK):
-                        return {'success': False, 'error': f'No hay permisos de escritura en: {model_file_path}'}
-                    print("DEBUG: Permisos de models.py verificados/corregidos (Python)")
-                except Exception as e:
-                    return {'success': False, 'error': f'Error corrigiendo/verificando permisos de archivo: {e}'}
+        model_file_path, prep_error = _prepare_models_file(application)
+        if prep_error:
+            return {'success': False, 'error': prep_error}
         
         # Escribir o actualizar el archivo de modelos
         try:
@@ -2774,40 +3189,48 @@ def generate_model_code(application, table, table_columns):
     return "\n".join(model_lines)
 
 
-def generate_field_definition(table_column, column):
-    """Genera la definición de un campo Django basado en DbTableColumn y DbColumn."""
+def generate_field_parts(table_column, column):
+    """Nombre y expresión Django (`models.X(...)`) de un campo, a partir de los valores efectivos
+    de DbTableColumn/DbColumn. La comparten models.py y las migraciones del motor DDL (sapy.ddl).
+    """
     field_name = column.name
+    is_nullable = table_column.get_effective_value('is_nullable')
+    is_primary_key = table_column.get_effective_value('is_primary_key')
+    is_auto_increment = table_column.get_effective_value('is_auto_increment')
+    default_value = table_column.default_value or column.default_value
+
+    # PK autoincremental: AutoField/BigAutoField (identity en PostgreSQL)
+    if is_primary_key and (is_auto_increment or column.data_type in ('serial', 'bigserial')):
+        auto_type = 'models.BigAutoField' if column.data_type in ('bigint', 'bigserial') else 'models.AutoField'
+        return field_name, f"{auto_type}(primary_key=True, serialize=False)"
+
     field_type = get_django_field_type(column.data_type, column.length, column.numeric_precision, column.numeric_scale)
     
     # Propiedades del campo
     properties = []
     
-    if not table_column.is_nullable:
+    if not is_nullable or is_primary_key:
         properties.append("null=False")
     else:
         properties.append("null=True")
     
-    if table_column.is_unique:
+    if table_column.get_effective_value('is_unique') and not is_primary_key:
         properties.append("unique=True")
     
-    if table_column.is_index:
+    if table_column.get_effective_value('is_index'):
         properties.append("db_index=True")
     
-    if table_column.is_primary_key:
+    if is_primary_key:
         properties.append("primary_key=True")
     
-    if table_column.is_auto_increment:
-        properties.append("auto_created=True")
-    
     # Valores específicos según el tipo
-    if column.data_type == 'varchar' and column.length:
-        properties.append(f"max_length={column.length}")
+    if column.data_type == 'varchar':
+        properties.append(f"max_length={column.length or 255}")
     
     if column.data_type == 'numeric':
         if column.numeric_precision:
-            properties.append(f"max_digits={column.numeric_scale + column.numeric_precision}")
-        if column.numeric_scale:
-            properties.append(f"decimal_places={column.numeric_scale}")
+            properties.append(f"max_digits={(column.numeric_scale or 0) + column.numeric_precision}")
+        properties.append(f"decimal_places={column.numeric_scale or 0}")
     
     # Reglas especiales por nombre de columna
     if field_name == 'created_at':
@@ -2816,28 +3239,49 @@ def generate_field_definition(table_column, column):
         properties.append('auto_now=True')
     else:
         # Valor por defecto genérico
-        if table_column.default_value:
+        if default_value:
             if column.data_type == 'boolean':
-                properties.append(f"default={table_column.default_value.lower()}")
+                properties.append(f"default={default_value.strip().lower() in ('true', '1', 't')}")
             elif column.data_type in ['integer', 'bigint', 'smallint']:
-                properties.append(f"default={table_column.default_value}")
+                properties.append(f"default={default_value}")
             else:
-                properties.append(f'default="{table_column.default_value}"')
+                properties.append(f"default={default_value.strip(chr(39))!r}")
     
     # Llave foránea
-    if field_name.startswith('id_') and len(field_name.split('_')) > 1:
-        referenced_table = field_name[3:]  # Remover 'id_'
-        properties.append("on_delete=models.CASCADE")
+    referenced_table = fk_referenced_table_name(table_column, column)
+    if referenced_table:
+        properties = [p for p in properties if p not in ('db_index=True',)]
+        properties.append(f"on_delete={_DJANGO_ON_DELETE.get(table_column.on_delete, 'models.CASCADE')}")
         properties.append(f'related_name="{table_column.table.name}_set"')
         # Forzar que la columna en BD sea exactamente el nombre provisto (p.ej., 'id_empresas')
         prop_str = ", ".join(properties + [f"db_column='{field_name}'"])
         if referenced_table == 'auth_user':
-            field_type = f"models.ForeignKey(settings.AUTH_USER_MODEL, {prop_str})"
-        else:
-            field_type = f"models.ForeignKey('{referenced_table.title()}', {prop_str})"
-    else:
-        field_type = f"{field_type}({', '.join(properties)})"
-    
+            return field_name, f"models.ForeignKey(settings.AUTH_USER_MODEL, {prop_str})"
+        return field_name, f"models.ForeignKey('{referenced_table.title()}', {prop_str})"
+    return field_name, f"{field_type}({', '.join(properties)})"
+
+
+_DJANGO_ON_DELETE = {
+    'CASCADE': 'models.CASCADE',
+    'RESTRICT': 'models.RESTRICT',
+    'SET NULL': 'models.SET_NULL',
+    'NO ACTION': 'models.DO_NOTHING',
+}
+
+
+def fk_referenced_table_name(table_column, column) -> str | None:
+    """Tabla referenciada por una columna: references_table explícita o convención id_<tabla>."""
+    if table_column.references_table_id:
+        return table_column.references_table.name
+    field_name = column.name
+    if field_name.startswith('id_') and len(field_name) > 3:
+        return field_name[3:]
+    return None
+
+
+def generate_field_definition(table_column, column):
+    """Genera la definición de un campo Django basado en DbTableColumn y DbColumn."""
+    field_name, field_type = generate_field_parts(table_column, column)
     # Comentario si hay notas
     if column.notes:
         return f"{field_name} = {field_type}  # {column.notes}"
@@ -2876,48 +3320,96 @@ def find_name_field(table_columns):
     return None
 
 
-def write_model_to_file(file_path, table_name, model_code):
-	"""Escribe o reemplaza de forma segura el modelo en models.py.
-	- Reemplaza el bloque completo `class {Model}(models.Model): ...` si existe
-	- Agrega imports una sola vez al inicio del archivo
+def merge_model_code(content, table_name, model_code):
+	"""Devuelve `content` (texto de models.py) con el modelo de la tabla agregado o reemplazado.
+	Para varias tablas usar directamente sapy.models_file.ModelsFile (un solo análisis del archivo).
 	"""
-	import os, re
-	model_class = f"{table_name.title()}"
-	class_header = f"class {model_class}(models.Model):"
-
-	existing_content = ""
-	if os.path.exists(file_path):
-		with open(file_path, 'r', encoding='utf-8') as f:
-			existing_content = f.read()
-	else:
-		existing_content = ""
-
-	# Asegurar imports únicos al inicio (limpiar duplicados y dejar uno solo)
-	from_lines = [
-		"from django.db import models\n",
-		"from django.utils import timezone\n",
-		"from django.conf import settings\n",
-	]
-	content = existing_content or ""
-	# Eliminar repeticiones de los mismos imports
-	for l in from_lines:
-		content = content.replace(l, "")
-	# Insertar cabecera limpia
-	content = "".join(from_lines) + "\n" + content.lstrip()
-
-    # Reemplazar bloque de clase existente usando regex multiline
-	pattern = rf"^class\s+{re.escape(model_class)}\(models\.Model\):[\s\S]*?(?=^class\s+|\Z)"
-	re_flags = re.MULTILINE
-	if re.search(pattern, content, flags=re_flags):
-		content = re.sub(pattern, model_code + "\n", content, flags=re_flags)
-	else:
-		# Agregar al final con dos saltos de línea
-		if not content.endswith('\n'):
-			content += '\n'
-		content += '\n' + model_code + '\n'
-
-	with open(file_path, 'w', encoding='utf-8') as f:
-		f.write(content)
+	from .models_file import ModelsFile
+	models_file = ModelsFile(content)
+	models_file.set_model(table_name, model_code)
+	return models_file.render()
+
+
+def write_model_to_file(file_path, table_name, model_code):
+	"""Escribe o reemplaza de forma segura el modelo en models.py (ver sapy.models_file)."""
+	from .models_file import ModelsFile
+	models_file = ModelsFile.load(file_path)
+	models_file.set_model(table_name, model_code)
+	models_file.save(file_path)
+
+
+def _app_python_env(application, app_dir: str) -> tuple[str, dict]:
+    """Intérprete (venv de la app si existe) y entorno para ejecutar manage.py en la app destino."""
+    # Configuración simple
+    venv_python = f"{app_dir}/venv/bin/python"
+    python_cmd = venv_python if os.path.exists(venv_python) else 'python'
+    print(f"DEBUG: Usando Python: {python_cmd}")
+    
+    # Entorno
+    env = os.environ.copy()
+    env['DJANGO_SETTINGS_MODULE'] = f"{application.name}.settings"
+    return python_cmd, env
+
+
+def _prepare_app_for_migrations(application, app_dir: str) -> str | None:
+    """Crea el paquete migrations y registra la app en INSTALLED_APPS/DATABASES. Retorna error o None."""
+    # Asegurar estructura de migraciones y que la app esté en INSTALLED_APPS
+    settings_path = f"{app_dir}/{application.name}/settings.py"
+    app_pkg_dir = f"{app_dir}/{application.name}"
+    migrations_dir = f"{app_pkg_dir}/migrations"
+    try:
+        os.makedirs(migrations_dir, exist_ok=True)
+        init_file = f"{migrations_dir}/__init__.py"
+        if not os.path.exists(init_file):
+            with open(init_file, 'w') as f:
+                f.write("")
+    except Exception as e:
+        return f'No se pudo preparar el paquete de migraciones: {e}'
+
+    try:
+        with open(settings_path, 'r', encoding='utf-8') as f:
+            s = f.read()
+        if 'INSTALLED_APPS' in s and application.name not in s:
+            # Insertar el app al final de la lista INSTALLED_APPS
+            s = re.sub(r"(INSTALLED_APPS\s*=\s*\[)([\s\S]*?)(\])",
+                       lambda m: m.group(1) + m.group(2).rstrip() + (",\n    '" + application.name + "'\n") + m.group(3),
+                       s, count=1)
+            # Asegurar import os en settings para DB config
+            if 'import os' not in s:
+                s = s.replace("from pathlib import Path\n", "from pathlib import Path\nimport os\n") if 'from pathlib import Path\n' in s else ("import os\n" + s)
+            # Asegurar DATABASES apuntando a la BD del modelo Application
+            db_block = [
+                "DATABASES = {\n",
+                "    'default': {\n",
+                "        'ENGINE': 'django.db.backends.postgresql',\n",
+                f"        'NAME': '{application.db_name}',\n",
+                f"        'USER': '{application.db_user}',\n",
+                f"        'PASSWORD': '{application.db_password}',\n",
+                f"        'HOST': '{application.db_host}',\n",
+                f"        'PORT': {application.db_port},\n",
+            ]
+            # sslmode si existe
+            if hasattr(application, 'db_sslmode') and getattr(application, 'db_sslmode'):
+                db_block.append("        'OPTIONS': {'sslmode': '" + str(application.db_sslmode) + "'},\n")
+            else:
+                # Si host parece de DO, forzar require
+                if 'ondigitalocean.com' in (application.db_host or ''):
+                    db_block.append("        'OPTIONS': {'sslmode': 'require'},\n")
+            db_block.extend([
+                "    }\n",
+                "}\n",
+            ])
+            # Reemplazar bloque DATABASES o anexar si no existe
+            if re.search(r"^DATABASES\s*=\s*\{[\s\S]*?\}\s*$", s, flags=re.MULTILINE):
+                s = re.sub(r"^DATABASES\s*=\s*\{[\s\S]*?\}\s*$", ''.join(db_block), s, flags=re.MULTILINE)
+            else:
+                s += "\n" + ''.join(db_block)
+            with open(settings_path, 'w', encoding='utf-8') as f:
+                f.write(s)
+            print(f"DEBUG: Añadido {application.name} a INSTALLED_APPS y configurada DATABASES")
+    except Exception as e:
+        print(f"WARNING: No se pudo asegurar INSTALLED_APPS: {e}")
+    return None
 
 
 def run_migrations_in_app(application, table_name):
@@ -2940,71 +3432,10 @@ def run_migrations_in_app(application, table_name):
         if not os.path.exists(app_dir):
             return {'success': False, 'error': f'Directorio de aplicación no existe: {app_dir}'}
         
-        # Configuración simple
-        venv_python = f"{app_dir}/venv/bin/python"
-        python_cmd = venv_python if os.path.exists(venv_python) else 'python'
-        print(f"DEBUG: Usando Python: {python_cmd}")
-        
-        # Entorno
-        env = os.environ.copy()
-        env['DJANGO_SETTINGS_MODULE'] = f"{application.name}.settings"
-        
-        # Asegurar estructura de migraciones y que la app esté en INSTALLED_APPS
-        settings_path = f"{app_dir}/{application.name}/settings.py"
-        app_pkg_dir = f"{app_dir}/{application.name}"
-        migrations_dir = f"{app_pkg_dir}/migrations"
-        try:
-            os.makedirs(migrations_dir, exist_ok=True)
-            init_file = f"{migrations_dir}/__init__.py"
-            if not os.path.exists(init_file):
-                with open(init_file, 'w') as f:
-                    f.write("")
-        except Exception as e:
-            return {'success': False, 'error': f'No se pudo preparar el paquete de migraciones: {e}'}
-
-        try:
-            with open(settings_path, 'r', encoding='utf-8') as f:
-                s = f.read()
-            if 'INSTALLED_APPS' in s and application.name not in s:
-                # Insertar el app al final de la lista INSTALLED_APPS
-                s = re.sub(r"(INSTALLED_APPS\s*=\s*\[)([\s\S]*?)(\])",
-                           lambda m: m.group(1) + m.group(2).rstrip() + (",\n    '" + application.name + "'\n") + m.group(3),
-                           s, count=1)
-                # Asegurar import os en settings para DB config
-                if 'import os' not in s:
-                    s = s.replace("from pathlib import Path\n", "from pathlib import Path\nimport os\n") if 'from pathlib import Path\n' in s else ("import os\n" + s)
-                # Asegurar DATABASES apuntando a la BD del modelo Application
-                db_block = [
-                    "DATABASES = {\n",
-                    "    'default': {\n",
-                    "        'ENGINE': 'django.db.backends.postgresql',\n",
-                    f"        'NAME': '{application.db_name}',\n",
-                    f"        'USER': '{application.db_user}',\n",
-                    f"        'PASSWORD': '{application.db_password}',\n",
-                    f"        'HOST': '{application.db_host}',\n",
-                    f"        'PORT': {application.db_port},\n",
-                ]
-                # sslmode si existe
-                if hasattr(application, 'db_sslmode') and getattr(application, 'db_sslmode'):
-                    db_block.append("        'OPTIONS': {'sslmode': '" + str(application.db_sslmode) + "'},\n")
-                else:
-                    # Si host parece de DO, forzar require
-                    if 'ondigitalocean.com' in (application.db_host or ''):
-                        db_block.append("        'OPTIONS': {'sslmode': 'require'},\n")
-                db_block.extend([
-                    "    }\n",
-                    "}\n",
-                ])
-                # Reemplazar bloque DATABASES o anexar si no existe
-                if re.search(r"^DATABASES\s*=\s*\{[\s\S]*?\}\s*$", s, flags=re.MULTILINE):
-                    s = re.sub(r"^DATABASES\s*=\s*\{[\s\S]*?\}\s*$", ''.join(db_block), s, flags=re.MULTILINE)
-                else:
-                    s += "\n" + ''.join(db_block)
-                with open(settings_path, 'w', encoding='utf-8') as f:
-                    f.write(s)
-                print(f"DEBUG: Añadido {application.name} a INSTALLED_APPS y configurada DATABASES")
-        except Exception as e:
-            print(f"WARNING: No se pudo asegurar INSTALLED_APPS: {e}")
+        python_cmd, env = _app_python_env(application, app_dir)
+        prep_error = _prepare_app_for_migrations(application, app_dir)
+        if prep_error:
+            return {'success': False, 'error': prep_error}
 
         # ENFOQUE SIMPLE: Si no se creó la migración, usar --empty para forzarla
         print(f"DEBUG: Intentando makemigrations para {table_name}")
@@ -3125,88 +3556,131 @@ def run_migrations_in_app(application, table_name):
 
 # ==== FUNCIONES AUXILIARES PARA DEPENDENCIAS DE TABLAS ====
 
-def get_table_dependencies(root_table: DbTable) -> list[DbTable]:
-	"""Devuelve las tablas (DbTable) de las que depende root_table vía columnas id_*. No incluye root_table.
-	Resuelve por nombre: id_familias -> DbTable(name='familias').
-	"""
-	deps: list[DbTable] = []
-	seen_names: set[str] = set()
-	for tc in root_table.table_columns.select_related('column').all():
-		col_name = tc.column.name or ''
-		if col_name.startswith('id_') and len(col_name) > 3:
-			ref_name = col_name[3:]
-			# Excepción: auth_user es tabla base de Django, no exigirla en catálogo
-			if ref_name == 'auth_user':
-				continue
-			if ref_name and ref_name not in seen_names:
-				dep = DbTable.objects.filter(name=ref_name).first()
-				if dep:
-					deps.append(dep)
-					seen_names.add(ref_name)
-	return deps
-
-
 def analyze_dependency_status(application: Application, root_table: DbTable) -> dict:
-	"""Analiza dependencias por columnas id_* y clasifica faltantes sin inventar tablas.
-	Devuelve dict con listas: missing_catalog (nombres), not_assigned (nombres), not_generated (nombres).
+	"""Analiza las dependencias directas (FK) de root_table y clasifica las faltantes sin inventar tablas.
+	Devuelve dict con listas: missing_catalog (nombres), not_assigned (nombres), not_generated (nombres),
+	y connection_error=True si no se pudo consultar la BD de la app (not_generated queda sin verificar).
+	Son tres consultas en total: catálogo, asignaciones y existencia física en la BD de la app.
 	"""
-	status = {'missing_catalog': [], 'not_assigned': [], 'not_generated': []}
-	seen_names: set[str] = set()
-	for tc in root_table.table_columns.select_related('column').all():
-		col_name = (tc.column.name or '').strip()
-		if not (col_name.startswith('id_') and len(col_name) > 3):
-			continue
-		ref_name = col_name[3:]
-		if not ref_name or ref_name in seen_names:
-			continue
-		# Excepción: auth_user existe por defecto en la app Django
-		if ref_name == 'auth_user':
-			seen_names.add(ref_name)
-			continue
-		seen_names.add(ref_name)
-		dep = DbTable.objects.filter(name=ref_name).first()
-		if not dep:
-			status['missing_catalog'].append(ref_name)
-			continue
-		# Debe estar asignada a la app
-		if not application.assigned_tables.filter(table=dep).exists():
-			status['not_assigned'].append(dep.name)
-			continue
-		# Debe existir físicamente en la BD de la app
-		if not check_table_exists_in_app(application, dep):
-			status['not_generated'].append(dep.name)
+	from .dependency_graph import table_references
+	status = {'missing_catalog': [], 'not_assigned': [], 'not_generated': [], 'connection_error': False}
+	refs = table_references(root_table)
+	if not refs:
+		return status
+	catalog = dict(DbTable.objects.filter(name__in=refs).values_list('name', 'id'))
+	status['missing_catalog'] = sorted(refs - set(catalog))
+	assigned_ids = set(
+		application.assigned_tables.filter(table_id__in=catalog.values()).values_list('table_id', flat=True)
+	)
+	status['not_assigned'] = sorted(name for name, table_id in catalog.items() if table_id not in assigned_ids)
+	# Deben existir físicamente en la BD de la app
+	to_check = sorted(name for name, table_id in catalog.items() if table_id in assigned_ids)
+	if to_check:
+		existing = check_tables_exist_in_app(application, to_check)
+		if existing is None:
+			status['connection_error'] = True
+		else:
+			status['not_generated'] = [name for name in to_check if name not in existing]
 	return status
 
 
 def get_generation_order_for_table(root_table: DbTable) -> list[DbTable]:
-	"""Calcula un orden de generación (topológico) simple: dependencias primero, luego root_table.
-	Evita ciclos simples mediante conjunto de visitados.
+	"""Orden de generación: dependencias primero (por niveles), luego root_table."""
+	return get_generation_order_for_tables([root_table])
+
+
+def get_generation_order_for_tables(tables) -> list[DbTable]:
+	"""Orden de generación para varias tablas y sus dependencias, sin repetir (ver sapy.dependency_graph)."""
+	from .dependency_graph import generation_plan
+	return generation_plan(tables)['order']
+
+
+def generate_django_models_batch(application: Application, tables) -> dict:
+	"""Genera los modelos de varias tablas de una sola vez (dependencias primero).
+	Con SAPY_MODEL_ENGINE='ddl' crea las tablas con sapy.ddl; con 'migrate' escribe todas
+	las clases en models.py, ejecuta un solo makemigrations y un solo migrate y verifica
+	el resultado con una sola consulta al catálogo de la BD destino.
 	"""
-	order: list[DbTable] = []
-	visited: set[int] = set()
-	stack: set[int] = set()
-
-	def dfs(t: DbTable):
-		if t.id in visited:
-			return
-		if t.id in stack:
-			return  # ciclo: no continuar para evitar loop
-		stack.add(t.id)
-		for dep in get_table_dependencies(t):
-			dfs(dep)
-		order.append(t)
-		stack.remove(t.id)
-		visited.add(t.id)
-
-	dfs(root_table)
-	# El resultado contiene root_table al final; remover duplicados preservando orden
-	seen: set[int] = set()
-	unique_order: list[DbTable] = []
-	for t in order:
-		if t.id not in seen:
-			unique_order.append(t)
-			seen.add(t.id)
-	return unique_order
+	from .dependency_graph import generation_plan
+	plan = generation_plan(tables)
+	order = plan['order']
+	existing = check_tables_exist_in_app(application, [t.name for t in order])
+	if existing is None:
+		return {'success': False, 'error': 'No se pudo conectar a la BD de la aplicación'}
+	pending = [t for t in order if t.name not in existing]
+	result = {
+		'success': True,
+		'generated': [],
+		'skipped': sorted(existing),
+		'order': [t.name for t in order],
+		# Tablas de un mismo nivel no dependen entre sí; los ciclos se crean juntos al final
+		'levels': [[t.name for t in level] for level in plan['levels']],
+		'cycles': plan['cycles'],
+	}
+	if not pending:
+		result['message'] = 'Todas las tablas ya existen en la BD'
+		return result
+
+	from .ddl import apply_tables, load_table_columns
+	columns_by_table = load_table_columns(pending)
+	empty = [t.name for t in pending if not columns_by_table[t.id]]
+	if empty:
+		return {**result, 'success': False, 'error': f"Tablas sin columnas definidas: {', '.join(empty)}"}
+
+	if settings.SAPY_MODEL_ENGINE == 'ddl':
+		# DDL directo en una transacción + migración registrada como aplicada (sapy.ddl)
+		ddl_result = apply_tables(application, pending)
+		if not ddl_result['success']:
+			return {**result, 'success': False, 'error': ddl_result['error']}
+		result['generated'] = [t.name for t in pending]
+		result['migration'] = ddl_result.get('migration')
+		result['message'] = (
+			f"{len(pending)} tabla(s) creadas por DDL en {ddl_result['elapsed_ms']} ms "
+			f"(migración {ddl_result.get('migration')})"
+		)
+		return result
+
+	model_file_path, prep_error = _prepare_models_file(application)
+	if prep_error:
+		return {**result, 'success': False, 'error': prep_error}
+	from .models_file import ModelsFile, ModelsFileError
+	try:
+		models_file = ModelsFile.load(model_file_path)
+		for t in pending:
+			models_file.set_model(t.name, generate_model_code(application, t, columns_by_table[t.id]))
+		models_file.save(model_file_path)
+	except ModelsFileError as e:
+		return {**result, 'success': False, 'error': str(e)}
+	except PermissionError:
+		return {**result, 'success': False, 'error': f'No hay permisos para escribir en: {model_file_path}'}
+	except Exception as e:
+		return {**result, 'success': False, 'error': f'Error escribiendo archivo: {e}'}
+
+	app_dir = f"{application.base_path}/{application.name}"
+	python_cmd, env = _app_python_env(application, app_dir)
+	prep_error = _prepare_app_for_migrations(application, app_dir)
+	if prep_error:
+		return {**result, 'success': False, 'error': prep_error}
+	steps = [
+		(['makemigrations', application.name], 120),
+		(['migrate', application.name], 300),
+	]
+	for args, timeout in steps:
+		proc = subprocess.run(
+			[python_cmd, 'manage.py', *args],
+			cwd=app_dir, capture_output=True, text=True, timeout=timeout, env=env
+		)
+		if proc.returncode != 0:
+			return {**result, 'success': False, 'error': f"Error en {args[0]}: {proc.stderr or proc.stdout}"}
+
+	created = check_tables_exist_in_app(application, [t.name for t in pending]) or set()
+	result['generated'] = [t.name for t in pending if t.name in created]
+	missing = [t.name for t in pending if t.name not in created]
+	if missing:
+		return {**result, 'success': False,
+				'error': f"Migraciones ejecutadas pero no se crearon: {', '.join(missing)}"}
+	result['message'] = f"{len(result['generated'])} modelo(s) generados con una sola migración"
+	return result
 
 
 def generate_table_with_dependencies(application: Application, root_table: DbTable) -> dict:
@@ -3214,31 +3688,36 @@ def generate_table_with_dependencies(application: Application, root_table: DbTab
 	Retorna dict con success y mensajes/resumen.
 	"""
 	from .models import ApplicationTable
-	generated: list[str] = []
-	assigned_now: list[str] = []
 	order = get_generation_order_for_table(root_table)
-	for table in order:
-		# Asegurar asignación a la app
-		if not application.assigned_tables.filter(table=table).exists():
-			ApplicationTable.objects.create(
-				application=application,
-				table=table,
-				notes=f"Asignada automáticamente por dependencia de {root_table.name}"
-			)
-			assigned_now.append(table.name)
-		# Saltar si ya existe físicamente en la app
-		if check_table_exists_in_app(application, table):
-			continue
-		res = generate_django_model_for_table(application, table)
-		if not res.get('success'):
-			return {
-				'success': False,
-				'error': f"Error generando '{table.name}': {res.get('error')}",
-				'assigned_auto': assigned_now,
-				'generated': generated,
-			}
-		generated.append(table.name)
-	return {'success': True, 'generated': generated, 'assigned_auto': assigned_now}
+	assigned_ids = set(application.assigned_tables.values_list('table_id', flat=True))
+	# Asegurar asignación a la app de todas las dependencias
+	missing = [table for table in order if table.id not in assigned_ids]
+	ApplicationTable.objects.bulk_create([
+		ApplicationTable(
+			application=application,
+			table=table,
+			notes=f"Asignada automáticamente por dependencia de {root_table.name}"
+		)
+		for table in missing
+	])
+	assigned_now = [table.name for table in missing]
+	# Un solo lote: todos los niveles en la misma transacción DDL / migración
+	res = generate_django_models_batch(application, [root_table])
+	if not res.get('success'):
+		return {
+			'success': False,
+			'error': f"Error generando '{root_table.name}': {res.get('error')}",
+			'assigned_auto': assigned_now,
+			'generated': res.get('generated', []),
+			'cycles': res.get('cycles', []),
+		}
+	return {
+		'success': True,
+		'generated': res['generated'],
+		'assigned_auto': assigned_now,
+		'levels': res.get('levels', []),
+		'cycles': res.get('cycles', []),
+	}
 
 # ==== Helpers de conexión a BD de aplicación destino ====
 
@@ -3374,7 +3853,7 @@ def application_dynamic_menu(request, app_name):
                             'slug': page.slug,
                             'url': f'/{page.slug}/',
                             'table_name': table_name,
-                            'orden': menu_page.order_index,
+                            'orden': len(pages) + 1,
                             'seccion': menu_page.section or 'General'
                         })
                 except Exception as e: